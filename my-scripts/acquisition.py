@@ -0,0 +1,122 @@
+'''
+File: acquisition.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Acquisition engine that reads a sample source off the Qt GUI thread.
+The source (serial port, recording replay or synthetic generator, see sources.py) returns
+parsed NumPy chunks. Each chunk is parsed once and published to every subscriber: the plot views
+each hold a Subscription with its own bounded queue, so a slow repaint or a window drag in one
+view never stalls reading from the UART or the other views. Chunks are shared, never modify them.
+'''
+
+import queue
+import sys
+import threading
+import traceback
+import serial
+from metrics import Metrics
+
+# Class for one consumer's queue of published chunks
+class Subscription:
+    # Initialize with room for queue_len chunks
+    def __init__(self, queue_len=256, metrics=None):
+        self.queue = queue.Queue(maxsize=queue_len)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.dropped_samples = 0  # Samples thrown away because this consumer fell behind
+
+    # Queue a chunk, dropping the oldest one when the consumer is not keeping up (worker thread)
+    def put_chunk(self, chunk):
+        while True:
+            try:
+                self.queue.put_nowait(chunk)
+                return
+            except queue.Full:
+                try:
+                    dropped = len(self.queue.get_nowait())
+                except queue.Empty:
+                    continue
+                self.dropped_samples += dropped
+                self.metrics.count("dropped", dropped)
+
+    # Return every chunk received since the last call (consumer thread)
+    def drain(self):
+        chunks = []
+        while True:
+            try:
+                chunks.append(self.queue.get_nowait())
+            except queue.Empty:
+                return chunks
+
+    # Wait up to timeout for a chunk, then return it with everything else queued (consumer thread)
+    def wait(self, timeout):
+        try:
+            first = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        return [first] + self.drain()
+
+# Class for the acquisition thread
+class AcquisitionWorker(threading.Thread):
+    # Initialize the worker, it owns the source from here on
+    def __init__(self, source, metrics=None):
+        super().__init__(daemon=True)
+        self.source = source
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.source.metrics = self.metrics
+        self.subscribers = []     # Replaced, never changed in place, so the worker can iterate it freely
+        self.recorder = None      # Optional Recorder that gets every chunk, even ones the views drop
+        self.error = None         # Exception that ended acquisition, None while running or after stop()
+        self._stop_event = threading.Event()
+
+    # Add a consumer, returns its Subscription
+    def subscribe(self, queue_len=256):
+        subscription = Subscription(queue_len, self.metrics)
+        self.subscribers = self.subscribers + [subscription]
+        return subscription
+
+    # Remove a consumer
+    def unsubscribe(self, subscription):
+        self.subscribers = [s for s in self.subscribers if s is not subscription]
+
+    # Start the thread unless a view sharing this worker already did
+    def start(self):
+        if not self.is_alive() and not self._stop_event.is_set():
+            super().start()
+
+    # Read continuously in blocking bulk reads until stopped or the source fails
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                chunk = self.source.read()
+                if len(chunk):
+                    self.publish(chunk)
+        except serial.SerialException as error:
+            self.error = error
+        except Exception as error:
+            # Anything else (a decoder or a subscriber failing) ends acquisition the same way
+            self.error = error
+            traceback.print_exc(file=sys.stderr)
+        finally:
+            self.source.close()
+
+    # Why acquisition ended for a view's status line, None while the worker runs or after stop()
+    def failure(self):
+        if self.error is None or self.is_alive():
+            return None
+        return f"Acquisition stopped: {type(self.error).__name__}: {self.error}"
+
+    # Hand a chunk to the recorder and every subscriber (worker thread)
+    def publish(self, chunk):
+        self.metrics.count("samples_in", len(chunk))
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.write(chunk)
+        for subscription in self.subscribers:
+            subscription.put_chunk(chunk)
+
+    # Ask the worker to finish and wait for it to close the source
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout=1.0)
@@ -0,0 +1,156 @@
+'''
+File: analysis.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Offline trigger search and measurements over recordings far larger than memory.
+The recording is memory mapped and cut into fixed size chunks that a process pool scans in
+parallel with the same EdgeTrigger as the live modes, so only the chunks being worked on are
+paged in. A scan started without history can only miss the crossing at a channel's first event
+in its chunk, so every chunk also reports where that event is and the state it ends in: merging
+the chunks in order adds the crossings that straddle a boundary and gives exactly the triggers
+one pass over the whole file would. Holdoff and re-arming after each window are applied in the
+merge the way TriggeredCapture applies them, then the windows are measured in parallel with
+measure(). Every measurement task reads its chunk plus the window length past its end, so a
+window that straddles into the next chunk is measured whole by the chunk it triggered in.
+Throughput grows with the number of worker processes up to the disk's read rate.
+
+Usage: python osc_cli.py analyze RECORDING.osc [--workers N] [--chunk SAMPLES] [trigger options]
+                         [--output FILE|-] [--measurements FILE|-]
+'''
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from recorder import Recording
+from measurements import measure
+
+CHUNK_SAMPLES = 1 << 20    # Samples per scan task, about 8 MB of a 3 channel recording
+
+# Recordings opened by this worker process, mapped once and shared by its tasks
+recordings = {}
+
+# Open a recording in a worker process, or reuse the one it already mapped
+def open_recording(path, tick_rate):
+    key = (path, tick_rate)
+    if key not in recordings:
+        recordings[key] = Recording(path, tick_rate)
+    return recordings[key]
+
+# Scan samples [start, stop) for crossings with no history before start (worker process)
+# Returns (trigger indices, per channel index of the first event if it reaches the level else -1,
+# per channel state at the end of the chunk, 0 where it had no event)
+def scan_chunk(path, tick_rate, trigger, source, start, stop):
+    values = open_recording(path, tick_rate).samples(start, stop)[:, source]
+    # The holdoff spans chunks, it is applied when they are merged
+    trigger.holdoff = 0
+    trigger.reset()
+    trigger.samples_seen = start
+    hits = trigger.scan(values)
+
+    # Triggers with a re-armed state before start would add a crossing at the first event only
+    events = trigger.events(values)
+    active = events != 0
+    first = active.argmax(axis=0)
+    channels = np.arange(events.shape[1])
+    rises = np.where(active.any(axis=0) & (events[first, channels] == 1), first + start, -1)
+    return hits, rises, trigger.state
+
+# Measure the windows starting at the given sample indices (worker process)
+# Returns a (windows, measurements, channels) array
+def measure_chunk(path, tick_rate, starts, length):
+    recording = open_recording(path, tick_rate)
+    # The chunk's samples and the length of one window past them
+    first = int(starts[0])
+    block = recording.samples(first, int(starts[-1]) + length)
+    return np.stack([measure(block[s - first:s - first + length].T, tick_rate=tick_rate)
+                     for s in starts])
+
+# Class for the offline analysis of one recording
+class OfflineAnalysis:
+    # Initialize with a recording path and a TriggeredCapture holding the trigger and window settings
+    # workers is the number of processes, None for one per core
+    def __init__(self, path, capture, chunk=CHUNK_SAMPLES, workers=None, tick_rate=1000.0):
+        self.path = os.path.abspath(path)
+        self.recording = Recording(self.path, tick_rate)
+        self.count = len(self.recording)    # Samples written when the analysis started
+        self.capture = capture
+        self.chunk = chunk
+        self.workers = workers
+        self.tick_rate = tick_rate
+        self.hits_found = 0    # Triggers before holdoff and re-arming
+
+    # Sample ranges of the scan tasks
+    def chunks(self):
+        return [(start, min(start + self.chunk, self.count)) for start in range(0, self.count, self.chunk)]
+
+    # Absolute index of every trigger that completes a window, in order
+    def find_triggers(self, executor):
+        trigger = self.capture.trigger
+        futures = [executor.submit(scan_chunk, self.path, self.tick_rate, trigger, self.capture.source, start, stop)
+                   for start, stop in self.chunks()]
+        # The chunks are merged in order, carrying each channel's state over the boundaries
+        state = 0
+        hits = [np.empty(0, dtype=np.int64)]
+        for future in futures:
+            chunk_hits, rises, end_state = future.result()
+            straddling = rises[(rises >= 0) & (state == -1)]
+            hits.append(np.union1d(chunk_hits, straddling) if len(straddling) else chunk_hits)
+            state = np.where(end_state != 0, end_state, state)
+        hits = np.concatenate(hits)
+        self.hits_found = len(hits)
+        return self.accept(hits)
+
+    # Keep the triggers TriggeredCapture would capture from the ones the scans found
+    def accept(self, hits):
+        holdoff = self.capture.trigger.holdoff
+        if holdoff > 0:
+            held = []
+            next_allowed = 0
+            for hit in hits.tolist():
+                if hit >= next_allowed:
+                    held.append(hit)
+                    next_allowed = hit + holdoff
+            hits = held
+        else:
+            hits = hits.tolist()
+
+        # A window has to fit in the recording after the previous one and have its pre-trigger samples
+        pre = self.capture.pre_samples()
+        length = self.capture.length
+        accepted = []
+        rearm_at = 0
+        for hit in hits:
+            if hit < rearm_at:
+                continue
+            end = hit - pre + length - 1
+            if end >= self.count:
+                break
+            rearm_at = end + 1
+            if hit >= pre:
+                accepted.append(hit)
+        return np.array(accepted, dtype=np.int64)
+
+    # Window of the trigger at absolute index hit, as a (columns, length) array
+    def window(self, hit):
+        start = hit - self.capture.pre_samples()
+        return np.array(self.recording.samples(start, start + self.capture.length).T)
+
+    # Find every trigger and measure its window, yields (trigger index, measurements) in order
+    # measurements is None when with_measurements is False
+    def run(self, with_measurements=True):
+        with ProcessPoolExecutor(self.workers) as executor:
+            hits = self.find_triggers(executor)
+            if not with_measurements:
+                for hit in hits.tolist():
+                    yield hit, None
+                return
+            # One measurement task per scan chunk the windows start in
+            starts = hits - self.capture.pre_samples()
+            groups = np.split(hits, np.searchsorted(starts, np.arange(self.chunk, self.count, self.chunk)))
+            futures = [(group, executor.submit(measure_chunk, self.path, self.tick_rate,
+                                               group - self.capture.pre_samples(), self.capture.length))
+                       for group in groups if len(group)]
+            for group, future in futures:
+                for hit, results in zip(group.tolist(), future.result()):
+                    yield hit, results
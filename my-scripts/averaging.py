@@ -0,0 +1,129 @@
+'''
+File: averaging.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Acquisition modes that trade update rate or sample rate for less noise.
+Each accumulator takes (columns, length) capture windows, timestamp row first, and returns the
+window to draw in a float array it owns (valid until the next call, copy it to keep it):
+    SweepAverage        mean of the last N trigger-aligned sweeps, a running sum updated with the
+                        newest sweep in and the oldest out of a preallocated ring of N sweeps
+    ExponentialAverage  running average weighting the newest sweep 1/N, cumulative until N sweeps
+    HiRes               boxcar average of every N consecutive samples, N times fewer samples with
+                        about log2(N) / 2 extra bits for uncorrelated noise
+None of them sums the history again, every update costs one window.
+'''
+
+import numpy as np
+
+# Class for N-sweep averaging of trigger-aligned windows
+class SweepAverage:
+    # Initialize for the mean of the last sweeps windows
+    def __init__(self, sweeps=16):
+        self.sweeps = max(int(sweeps), 1)
+        self.reset()
+
+    # Forget every sweep
+    def reset(self):
+        self.ring = None
+        self.count = 0
+
+    # Allocate the ring, running sum and output for windows of this shape
+    def allocate(self, shape):
+        self.ring = np.zeros((self.sweeps, shape[0] - 1, shape[1]))
+        self.total = np.zeros((shape[0] - 1, shape[1]))
+        self.out = np.empty(shape)
+        self.count = 0
+
+    # Add a window, returns the average so far with the newest window's timestamps
+    def add(self, window):
+        if self.ring is None or self.out.shape != window.shape:
+            self.allocate(window.shape)
+        slot = self.ring[self.count % self.sweeps]
+        # Codes are integers, so the float64 running sum stays exact however long it runs
+        self.total -= slot
+        slot[:] = window[1:]
+        self.total += slot
+        self.count += 1
+        self.out[0] = window[0]
+        np.multiply(self.total, 1.0 / min(self.count, self.sweeps), out=self.out[1:])
+        return self.out
+
+    # Index of a window's trigger sample in the output
+    def index(self, trigger_index):
+        return trigger_index
+
+# Class for exponential running averaging of trigger-aligned windows
+class ExponentialAverage:
+    # Initialize, the newest window gets weight 1 / weight
+    def __init__(self, weight=16):
+        self.weight = max(int(weight), 1)
+        self.reset()
+
+    # Forget every sweep
+    def reset(self):
+        self.out = None
+        self.count = 0
+
+    # Add a window, returns the running average with the newest window's timestamps
+    def add(self, window):
+        if self.out is None or self.out.shape != window.shape:
+            self.out = np.zeros(window.shape)
+            self.count = 0
+        self.count += 1
+        self.out[0] = window[0]
+        # Plain cumulative mean until there are weight sweeps, so the start isn't biased to zero
+        average = self.out[1:]
+        average += (window[1:] - average) * (1.0 / min(self.count, self.weight))
+        return self.out
+
+    # Index of a window's trigger sample in the output
+    def index(self, trigger_index):
+        return trigger_index
+
+# Class for boxcar high resolution decimation of each window
+class HiRes:
+    # Initialize, every factor samples are averaged into one
+    # A window shorter than factor is averaged into a single point
+    def __init__(self, factor=4):
+        self.requested = max(int(factor), 1)
+        self.factor = self.requested   # Factor of the last window, at most its length
+        self.reset()
+
+    # Nothing is carried between windows
+    def reset(self):
+        self.out = None
+
+    # Extra bits of resolution gained for uncorrelated noise
+    @property
+    def extra_bits(self):
+        return 0.5 * np.log2(self.factor)
+
+    # Decimate a window, returns it with the timestamp of each block's first sample
+    def add(self, window):
+        columns, length = window.shape
+        self.factor = max(min(self.requested, length), 1)
+        blocks = length // self.factor
+        if self.out is None or self.out.shape != (columns, blocks):
+            self.out = np.empty((columns, blocks))
+        used = window[:, :blocks * self.factor]
+        self.out[0] = used[0, ::self.factor]
+        np.mean(used[1:].reshape(columns - 1, blocks, self.factor), axis=2, out=self.out[1:])
+        return self.out
+
+    # Index of a window's trigger sample in the output
+    def index(self, trigger_index):
+        return trigger_index // self.factor
+
+# Acquisition modes offered by the plotters, None draws every capture as is
+ACQUISITION_MODES = {
+    "Normal": None,
+    "Average": SweepAverage,
+    "Exponential": ExponentialAverage,
+    "Hi-res": HiRes,
+}
+
+# Build the accumulator for a mode with its sweep count, weight or factor
+def make_averager(mode, count):
+    cls = ACQUISITION_MODES[mode]
+    return None if cls is None else cls(count)
@@ -1,21 +1,28 @@
 import sys
-from collections import deque
-import serial
+import numpy as np
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QSlider, QLabel
 )
 from PySide6.QtCore import QTimer, Qt
 import pyqtgraph as pg
+from acquisition import AcquisitionWorker
+from sources import SerialSource, source_from_args
+from sample_parser import ValueParser, codes_to_volts
+from ring_buffer import RingBuffer
 
 class BatchSerialPlotter(QWidget):
-    def __init__(self, port='COM8', baud=115200, buffer_len=1024):
+    def __init__(self, port='COM8', baud=115200, buffer_len=1024, source=None):
         super().__init__()
         self.buffer_len = buffer_len
-        self.buffer = deque(maxlen=buffer_len)
+        self.buffer = RingBuffer(buffer_len, columns=1, max_length=2048, dtype=np.float32)
         self.is_paused = False
+        self.failure_shown = False
 
-        # Set up Serial
-        self.serial = serial.Serial(port, baud, timeout=0.05)
+        # Set up the acquisition worker, it owns the sample source
+        if source is None:
+            source = SerialSource(port, baud, parser=ValueParser())
+        self.worker = AcquisitionWorker(source)
+        self.subscription = self.worker.subscribe()
 
         # Create plot widget
         self.plot_widget = pg.PlotWidget(title="Batch UART Plot")
@@ -60,28 +67,27 @@ class BatchSerialPlotter(QWidget):
         main_layout.addWidget(self.plot_widget)     # Plot on the right
         self.setLayout(main_layout)
 
+        self.worker.start()
+
         # Timer for reading and plotting
         self.timer = QTimer()
         self.timer.timeout.connect(self.read_and_plot)
         self.timer.start(20)  # 50 Hz polling
 
     def read_and_plot(self):
-        if self.is_paused:
-            return
-
-        # Read incoming UART data
-        while self.serial.in_waiting:
-            try:
-                line = self.serial.readline().decode('utf-8', errors='ignore').strip()
-                if line:
-                    value = float(line)
-                    self.buffer.append(value)
-            except ValueError:
-                continue  # Skip malformed data
-
-        # When buffer is full, plot and clear
-        if len(self.buffer) >= self.buffer_len:
-            self.plot_curve.setData(list(self.buffer))
+        # Take incoming UART data from the acquisition worker, also while paused so nothing goes stale
+        for chunk in self.subscription.drain():
+            self.buffer.extend(codes_to_volts(chunk))
+
+        # The plot title says why acquisition stopped if the worker failed
+        if not self.failure_shown and self.worker.failure() is not None:
+            self.failure_shown = True
+            self.plot_widget.setTitle(self.worker.failure(), color='r')
+
+        # When buffer is full, plot (unless paused) and clear
+        if self.buffer.is_full():
+            if not self.is_paused:
+                self.plot_curve.setData(self.buffer.view(0))
             self.buffer.clear()
 
     def toggle_pause(self, checked):
@@ -100,15 +106,17 @@ class BatchSerialPlotter(QWidget):
         self.slider_label.setText(f"Buffer: {value}")
         
         # Clear and resize the buffer
-        self.buffer = deque(maxlen=value)
+        self.buffer.set_length(value)
+        self.buffer.clear()
         self.plot_widget.setXRange(0, value - 1, padding=0)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = QMainWindow()
-    plotter = BatchSerialPlotter()
+    plotter = BatchSerialPlotter(source=source_from_args(sys.argv[1:], parser=ValueParser()))
     window.setCentralWidget(plotter)
     window.setWindowTitle("Batch UART Plot with Pause/Replay")
     window.resize(900, 400)
     window.show()
+    app.aboutToQuit.connect(plotter.worker.stop)
     sys.exit(app.exec())
@@ -11,15 +11,20 @@ import sys
 from PySide6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QHBoxLayout
 from collections import deque
 import pyqtgraph as pg
-import serial
 from PySide6.QtCore import QTimer
+from acquisition import AcquisitionWorker
+from sources import SerialSource, source_from_args
+from sample_parser import ValueParser, codes_to_volts
 
 class SerialPlotter(QWidget):
-    def __init__(self, port='COM8', baud=115200, buffer_len=128):
+    def __init__(self, port='COM8', baud=115200, buffer_len=128, source=None):
         super().__init__()
 
         self.buffer = deque([0]*buffer_len, maxlen=buffer_len)
-        self.serial = serial.Serial(port, baud, timeout=0.05)
+        if source is None:
+            source = SerialSource(port, baud, parser=ValueParser())
+        self.worker = AcquisitionWorker(source)
+        self.subscription = self.worker.subscribe()
 
         self.plot_widget = pg.PlotWidget(title="UART Live Buffer Plot")
         self.plot_curve = self.plot_widget.plot(list(self.buffer), pen=pg.mkPen('g', width=2))
@@ -42,24 +47,23 @@ class SerialPlotter(QWidget):
         self.setLayout(hlayout)
 
         self.is_paused = False
+        self.failure_shown = False
+        self.worker.start()
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_plot)
         self.timer.start(40)  # update every 40 ms
 
     def update_plot(self):
-        if self.is_paused:
-            return
-
-        while self.serial.in_waiting:
-            try:
-                line = self.serial.readline().decode('utf-8', errors='ignore').strip()
-                if line:
-                    value = float(line)
-                    self.buffer.append(value)
-            except ValueError:
-                continue
-        self.plot_curve.setData(list(self.buffer))
+        # Pause only freezes the display, samples keep flowing into the buffer
+        for chunk in self.subscription.drain():
+            self.buffer.extend(codes_to_volts(chunk).tolist())
+        # The plot title says why acquisition stopped if the worker failed
+        if not self.failure_shown and self.worker.failure() is not None:
+            self.failure_shown = True
+            self.plot_widget.setTitle(self.worker.failure(), color='r')
+        if not self.is_paused:
+            self.plot_curve.setData(list(self.buffer))
 
     def toggle_pause(self, checked):
         if checked:
@@ -74,9 +78,10 @@ class SerialPlotter(QWidget):
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     main_window = QMainWindow()
-    plotter = SerialPlotter(port='COM8', baud=115200, buffer_len=128)
+    plotter = SerialPlotter(buffer_len=128, source=source_from_args(sys.argv[1:], parser=ValueParser()))
     main_window.setCentralWidget(plotter)
     main_window.setWindowTitle("STM32 UART Real-Time Live Plot")
     main_window.resize(900, 400)
     main_window.show()
+    app.aboutToQuit.connect(plotter.worker.stop)
     sys.exit(app.exec())
@@ -0,0 +1,304 @@
+'''
+File: bench.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+End-to-end benchmark of every plotting mode against the pty firmware emulator.
+Each mode runs headless (offscreen Qt, Agg for matplotlib) for a few seconds at every sample rate
+of a sweep. The emulator runs in its own process, so only the plotter's CPU time is counted.
+For each run it reports the sample rate sustained up to the display, samples dropped, left unread
+or drawn late, the latency from a sample being due on the "UART" until the frame showing it was
+drawn, and the CPU time per sample. Results are saved as JSON, --compare shows the change
+against an earlier run. --cold-start instead times how long the headless CLI takes to deliver its
+first sample against importing the GUI windows.
+
+Usage: python bench.py [--modes osc_roll_pyqt ...] [--rates 500 1000 ...] [--duration 3]
+                       [--binary] [--output bench.json] [--compare old.json]
+       python bench.py --cold-start
+'''
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+from fw_emulator import FirmwareEmulator
+from sources import SerialSource
+from sample_parser import ValueParser
+
+# Mode: (stream the script expects, plotter class or None for matplotlib, button that starts plotting)
+MODES = {
+    "roll_plt": ("values", None, None),
+    "plotter_plt": ("values", None, None),
+    "basicroll_pyqt": ("values", "SerialPlotter", None),
+    "basicplotter_pyqt": ("values", "BatchSerialPlotter", None),
+    "osc_normal_pyqt": ("text", "UARTBufferTriggerPlotter", "toggle_button"),
+    "osc_roll_pyqt": ("text", "UARTMultiChannelPlotter", "start_stop_button"),
+    "osc_trigger_pyqt": ("text", "UARTTriggerPlotter", "arm_button"),
+}
+# Plot class of each matplotlib script
+PLT_CLASSES = {"roll_plt": "RollPlot", "plotter_plt": "BatchPlot"}
+
+DEFAULT_RATES = [250, 500, 1000, 2000, 5000, 10000, 20000]
+
+# Emulator side of the benchmark, runs in a child process
+def emulator_process(conn, rate, binary, values):
+    emulator = FirmwareEmulator(rate, binary=binary, values=values)
+    conn.send(emulator.port)
+    conn.recv()    # The plotter has opened the port
+    emulator.start()
+    # Wall clock time of sample 0, comparable across processes
+    conn.send(time.time() - (time.perf_counter() - emulator.start_time))
+    conn.recv()    # The run is over
+    emulator.stop()
+    conn.send(emulator.samples_sent)
+
+# Class that counts samples reaching the display and times how late they are drawn
+class Probe:
+    # Initialize for an emulator sending rate samples per second from wall clock time start
+    def __init__(self, rate, late_after=0.1):
+        self.rate = rate
+        self.late_after = late_after
+        self.start = None
+        self.received = 0      # Samples handed to the display code
+        self.skipped = 0       # Samples consumed without reaching it (drops, bad lines)
+        self.undrawn = 0       # Samples received since the last drawn frame
+        self.late = 0
+        self.frames = 0
+        self.latencies = []
+
+    # Count samples handed to the display code
+    def count(self, n):
+        self.received += n
+        self.undrawn += n
+
+    # Called after an event loop pass, skipped is the running total of samples lost on the way
+    def frame_done(self, skipped):
+        self.skipped = skipped
+        if self.undrawn == 0:
+            return
+        newest = self.received + self.skipped - 1
+        latency = time.time() - self.start - newest / self.rate
+        self.latencies.append(latency)
+        if latency > self.late_after:
+            self.late += self.undrawn
+        self.undrawn = 0
+        self.frames += 1
+
+# Run one of the pyqtgraph modes until the deadline
+def run_qt_mode(name, port, probe, start_emulator, duration):
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QEventLoop
+    app = QApplication.instance() or QApplication([])
+    _, class_name, button_name = MODES[name]
+    plotter = getattr(importlib.import_module(name), class_name)(port=port)
+
+    # Count every chunk the plotter takes from its subscription to the acquisition worker
+    worker = plotter.worker
+    # Binary frame timestamps are converted at the emulator's rate instead of waiting for an estimate
+    worker.source.sample_rate = probe.rate
+    worker.source.update_sample_rate()
+    subscription = plotter.subscription
+    drain = subscription.drain
+    def counted_drain():
+        chunks = drain()
+        probe.count(sum(len(chunk) for chunk in chunks))
+        return chunks
+    subscription.drain = counted_drain
+
+    # Views with a render scheduler draw on their display timer, samples are shown when it renders
+    scheduler = getattr(plotter, "scheduler", None)
+    if scheduler is not None:
+        render = scheduler.render
+        def timed_render():
+            render()
+            probe.frame_done(subscription.dropped_samples + worker.source.parser.malformed)
+        scheduler.render = timed_render
+
+    button = getattr(plotter, button_name) if button_name else None
+    plotter.resize(1200, 600)
+    plotter.show()
+    start_emulator()
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        # Single shot trigger mode is re-armed after every capture to keep the trigger path busy
+        if button is not None and not button.isChecked():
+            button.setChecked(True)
+        # Block like app.exec() would until the next timer or paint event
+        app.processEvents(QEventLoop.WaitForMoreEvents)
+        if scheduler is None:
+            probe.frame_done(subscription.dropped_samples + worker.source.parser.malformed)
+    worker.stop()
+    plotter.close()
+    plotter.deleteLater()
+
+# Run one of the matplotlib modes until the deadline, blitting after every frame like FuncAnimation
+def run_plt_mode(name, port, probe, start_emulator, duration):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from plt_render import Blitter
+
+    source = SerialSource(port, parser=ValueParser())
+    read = source.read
+    def counted_read():
+        values = read()
+        probe.count(len(values))
+        return values
+    source.read = counted_read
+
+    fig, ax = plt.subplots()
+    plot = getattr(importlib.import_module(name), PLT_CLASSES[name])(ax, source)
+    blitter = Blitter(fig)
+    blitter.draw(plot.init())
+    start_emulator()
+    end = time.perf_counter() + duration
+    frame = 0
+    while time.perf_counter() < end:
+        blitter.draw(plot.update(frame))
+        probe.frame_done(source.parser.malformed)
+        frame += 1
+    plt.close(fig)
+    source.close()
+
+# Benchmark one mode at one sample rate, returns the result record
+def run_mode(name, rate, duration, binary=False, late_after=0.1):
+    stream = MODES[name][0]
+    # Spawned rather than forked, the benchmark process may already be running Qt threads
+    context = multiprocessing.get_context("spawn")
+    conn, child_conn = context.Pipe()
+    child = context.Process(target=emulator_process,
+                            args=(child_conn, rate, binary and stream == "text", stream == "values"))
+    child.start()
+    port = conn.recv()
+    probe = Probe(rate, late_after)
+    start_cpu = [0.0]
+    start_wall = [0.0]
+
+    # Called by the runner once the plotter is up and has opened the port
+    def start_emulator():
+        conn.send("start")
+        probe.start = conn.recv()
+        start_cpu[0] = time.process_time()
+        start_wall[0] = time.perf_counter()
+
+    runner = run_plt_mode if MODES[name][1] is None else run_qt_mode
+    runner(name, port, probe, start_emulator, duration)
+    cpu = time.process_time() - start_cpu[0]
+    elapsed = time.perf_counter() - start_wall[0]
+
+    conn.send("stop")
+    sent = conn.recv()
+    child.join()
+
+    latencies = np.array(probe.latencies) * 1000
+    return {
+        "mode": name,
+        "format": "binary" if binary and stream == "text" else stream,
+        "rate": rate,
+        "duration": round(elapsed, 3),
+        "input_rate": round(sent / elapsed, 1),
+        "display_rate": round(probe.received / elapsed, 1),
+        "samples_sent": sent,
+        "samples_displayed": probe.received,
+        "dropped": probe.skipped,
+        "unread": max(sent - probe.received - probe.skipped, 0),
+        "late": probe.late,
+        "frames_per_s": round(probe.frames / elapsed, 1),
+        "latency_ms": {
+            "mean": round(float(latencies.mean()), 2) if len(latencies) else None,
+            "p50": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+            "p95": round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None,
+            "max": round(float(latencies.max()), 2) if len(latencies) else None,
+        },
+        "cpu_us_per_sample": round(cpu / probe.received * 1e6, 2) if probe.received else None,
+    }
+
+# Cold start commands: the headless CLI up to its first sample, and importing each GUI window
+COLD_START = {
+    "osc_cli roll": ["osc_cli.py", "roll", "--synthetic", "--speed", "max", "--samples", "1", "--output", os.devnull],
+    "import osc_roll_pyqt": ["-c", "import osc_roll_pyqt"],
+    "import osc_multi_pyqt": ["-c", "import osc_multi_pyqt"],
+}
+
+# Median wall clock time in ms of starting each cold start command in a fresh interpreter
+def cold_start(runs=5):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    here = os.path.dirname(os.path.abspath(__file__))
+    times = {}
+    for name, command in COLD_START.items():
+        runs_ms = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + command, cwd=here, env=env, check=True,
+                           stdout=subprocess.DEVNULL)
+            runs_ms.append((time.perf_counter() - start) * 1000)
+        times[name] = round(float(np.median(runs_ms)), 1)
+        print(f"{name:<24} {times[name]:>8.1f} ms")
+    return times
+
+# Print one result as a table row
+def print_result(result):
+    p95 = result["latency_ms"]["p95"]
+    cpu = result["cpu_us_per_sample"]
+    print(f"{result['mode']:<18} {result['rate']:>7g} {result['input_rate']:>10.0f} {result['display_rate']:>10.0f} "
+          f"{result['dropped']:>8} {result['unread']:>8} {result['late']:>8} "
+          f"{'-' if p95 is None else f'{p95:.1f}':>9} {'-' if cpu is None else f'{cpu:.1f}':>8}")
+
+# Print the change in sustained rate and latency against an earlier results file
+def compare(results, path):
+    with open(path) as f:
+        old = {(r["mode"], r["rate"], r["format"]): r for r in json.load(f)["results"]}
+    print(f"\nChange against {path}:")
+    for result in results:
+        before = old.get((result["mode"], result["rate"], result["format"]))
+        if before is None:
+            continue
+        rate_change = (result["display_rate"] / before["display_rate"] - 1) * 100 if before["display_rate"] else 0.0
+        old_p95, new_p95 = before["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        latency = f"{old_p95:.1f} -> {new_p95:.1f} ms" if old_p95 is not None and new_p95 is not None else "-"
+        print(f"{result['mode']:<18} {result['rate']:>7g}  display rate {rate_change:+6.1f}%  p95 latency {latency}")
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the plotting modes against the firmware emulator")
+    arg_parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    arg_parser.add_argument("--rates", nargs="+", type=float, default=DEFAULT_RATES, help="samples per second")
+    arg_parser.add_argument("--duration", type=float, default=3.0, help="seconds per run")
+    arg_parser.add_argument("--binary", action="store_true", help="send binary frames to the osc_* modes")
+    arg_parser.add_argument("--late-after", type=float, default=0.1, help="latency in seconds counted as late")
+    arg_parser.add_argument("--output", default="bench.json")
+    arg_parser.add_argument("--compare", metavar="OLD_JSON")
+    arg_parser.add_argument("--cold-start", action="store_true", help="only time the start up of the CLI and GUI imports")
+    args = arg_parser.parse_args()
+
+    if args.cold_start:
+        cold_start()
+        sys.exit(0)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    print(f"{'mode':<18} {'rate':>7} {'input/s':>10} {'shown/s':>10} {'dropped':>8} {'unread':>8} "
+          f"{'late':>8} {'p95 [ms]':>9} {'cpu [us]':>8}")
+    results = []
+    for name in args.modes:
+        for rate in args.rates:
+            result = run_mode(name, rate, args.duration, args.binary, args.late_after)
+            print_result(result)
+            results.append(result)
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "duration": args.duration,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nSaved {len(results)} results to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,186 @@
+'''
+File: decimation.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Deep sample memory with a min/max decimation pyramid for display.
+Raw samples go into a ring addressed by absolute sample number. Level k of the pyramid keeps the
+min and max of every block of factor**k samples and is updated incrementally as chunks arrive.
+A query for any visible range picks the level that gives about one min/max pair per screen pixel,
+so drawing costs the same whether the history holds 2 k or 10 M samples.
+'''
+
+import numpy as np
+
+# Class for one ring of values addressed by absolute index
+class _AbsoluteRing:
+    # Initialize with capacity entries of rows values each
+    def __init__(self, rows, capacity, dtype):
+        self.capacity = capacity
+        self.data = np.zeros((rows, capacity), dtype=dtype)
+
+    # Write a (rows, N) block whose first entry has absolute index start
+    def write(self, start, block):
+        n = block.shape[1]
+        if n > self.capacity:
+            block = block[:, -self.capacity:]
+            start += n - self.capacity
+            n = self.capacity
+        pos = start % self.capacity
+        first = min(n, self.capacity - pos)
+        self.data[:, pos:pos + first] = block[:, :first]
+        self.data[:, :n - first] = block[:, first:]
+
+    # Read absolute entries [start, stop), a view unless the range wraps
+    def read(self, start, stop):
+        pos = start % self.capacity
+        end = pos + (stop - start)
+        if end <= self.capacity:
+            return self.data[:, pos:end]
+        return np.concatenate((self.data[:, pos:], self.data[:, :end - self.capacity]), axis=1)
+
+# Class for the sample history with its decimation pyramid
+class MinMaxPyramid:
+    # Initialize for a history of length samples of an (N, columns) stream, column 0 is the timestamp
+    def __init__(self, length, columns=4, factor=4, top_blocks=1024):
+        self.columns = columns
+        self.channels = columns - 1
+        self.factor = factor
+        self.top_blocks = top_blocks
+        self.length = length
+        self.total = 0   # Absolute number of samples ever added
+        self.allocate(length)
+
+    # Allocate the raw ring and pyramid levels for a capacity of at least length samples
+    def allocate(self, length):
+        capacity = self.factor
+        while capacity < length:
+            capacity *= self.factor
+        self.capacity = capacity
+        self.raw = _AbsoluteRing(self.columns, capacity, np.uint16)
+        # Level k holds min rows then max rows for blocks of factor**k samples
+        self.levels = []
+        block = self.factor
+        while capacity // block >= self.top_blocks or not self.levels:
+            self.levels.append((block, _AbsoluteRing(2 * self.channels, capacity // block, np.uint16)))
+            block *= self.factor
+
+    # Oldest absolute sample index still in the history window
+    def start(self):
+        return max(self.total - self.length, 0)
+
+    # Number of samples in the history window
+    def __len__(self):
+        return self.total - self.start()
+
+    # Change the history length, growing the storage and rebuilding the pyramid if needed
+    def set_length(self, length):
+        if length > self.capacity:
+            keep_start = self.start()
+            kept = self.raw.read(keep_start, self.total).T.copy()
+            self.allocate(length)
+            self.total = keep_start
+            self.length = length
+            self.extend(kept)
+        self.length = length
+
+    # Forget all samples
+    def clear(self):
+        self.total = 0
+
+    # Append an (N, columns) chunk and update every pyramid level it completes
+    def extend(self, chunk):
+        n = len(chunk)
+        if n == 0:
+            return
+        old_total = self.total
+        self.raw.write(old_total, chunk.T)
+        self.total += n
+
+        # Level k is built from the level below it, only for blocks completed by this chunk
+        below_block = 1
+        for block, ring in self.levels:
+            first = old_total // block
+            last = self.total // block
+            if last > first:
+                # Never reach back past what the raw ring still holds
+                first = max(first, -(-(self.total - self.capacity) // block))
+                step = block // below_block
+                if below_block == 1:
+                    values = self.raw.read(first * block, last * block)[1:]
+                    mins = values.reshape(self.channels, -1, step).min(axis=2)
+                    maxs = values.reshape(self.channels, -1, step).max(axis=2)
+                else:
+                    below = self.levels_ring(below_block).read(first * step, last * step)
+                    mins = below[:self.channels].reshape(self.channels, -1, step).min(axis=2)
+                    maxs = below[self.channels:].reshape(self.channels, -1, step).max(axis=2)
+                ring.write(first, np.concatenate((mins, maxs)))
+            below_block = block
+
+    # Ring of the level with the given block size
+    def levels_ring(self, block):
+        for level_block, ring in self.levels:
+            if level_block == block:
+                return ring
+        raise KeyError(block)
+
+    # Min and max per channel over absolute samples [start, stop) using the coarsest levels possible
+    def range_minmax(self, start, stop):
+        mins = np.full(self.channels, 0xFFFF, dtype=np.uint16)
+        maxs = np.zeros(self.channels, dtype=np.uint16)
+        for block, ring in reversed(self.levels):
+            first = -(-start // block)
+            last = stop // block
+            if last > first:
+                entries = ring.read(first, last)
+                np.minimum(mins, entries[:self.channels].min(axis=1), out=mins)
+                np.maximum(maxs, entries[self.channels:].max(axis=1), out=maxs)
+                # The uncovered pieces on both sides are handled by finer levels
+                left = self.range_minmax(start, first * block) if start < first * block else None
+                right = self.range_minmax(last * block, stop) if last * block < stop else None
+                for part in (left, right):
+                    if part is not None:
+                        np.minimum(mins, part[0], out=mins)
+                        np.maximum(maxs, part[1], out=maxs)
+                return mins, maxs
+        values = self.raw.read(start, stop)[1:]
+        return values.min(axis=1), values.max(axis=1)
+
+    # Display data for absolute samples [start, stop) at about max_points points per channel
+    # Returns x (absolute sample numbers) and a (channels, N) array of y values
+    def query(self, start, stop, max_points=2000):
+        start = int(max(start, self.start()))
+        stop = int(min(stop, self.total))
+        if stop <= start:
+            return np.empty(0), np.empty((self.channels, 0), dtype=np.uint16)
+
+        # Few enough samples: draw them all
+        per_point = (stop - start) / max(max_points, 1)
+        chosen = None
+        for block, ring in self.levels:
+            if block <= per_point:
+                chosen = (block, ring)
+        if chosen is None:
+            return np.arange(start, stop), self.raw.read(start, stop)[1:]
+
+        # Whole blocks from the chosen level, drawn as min/max pairs at the block start
+        block, ring = chosen
+        first = -(-start // block)
+        last = stop // block
+        entries = ring.read(first, last)
+        count = last - first
+        x = np.repeat(np.arange(first, last) * block, 2)
+        y = np.empty((self.channels, 2 * count), dtype=np.uint16)
+        y[:, 0::2] = entries[:self.channels]
+        y[:, 1::2] = entries[self.channels:]
+
+        # Partial blocks at either edge, e.g. the newest samples that haven't filled a block yet
+        if start < first * block:
+            mins, maxs = self.range_minmax(start, first * block)
+            x = np.concatenate(([start, start], x))
+            y = np.concatenate((np.stack((mins, maxs), axis=1), y), axis=1)
+        if last * block < stop:
+            mins, maxs = self.range_minmax(last * block, stop)
+            x = np.concatenate((x, [last * block, last * block]))
+            y = np.concatenate((y, np.stack((mins, maxs), axis=1)), axis=1)
+        return x, y
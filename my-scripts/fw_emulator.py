@@ -0,0 +1,149 @@
+'''
+File: fw_emulator.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Stand-in for the NUCLEO firmware on a pseudo terminal, so the plotters can be run without the board.
+It streams the same three channels as main.c, either as the "%5u %4u %4u %4u" printf text
+or as binary frames, at a chosen sample rate. Corruption can be injected to exercise resync.
+--values sends only channel 1 in volts, one value per line, for the basic and matplotlib scripts.
+
+Usage: python fw_emulator.py [--binary | --values] [--rate 1000] [--corrupt 0.0]
+then point a plotter at the printed port instead of COM8. POSIX only (needs pty).
+'''
+
+import argparse
+import os
+import threading
+import time
+import numpy as np
+from sample_parser import ADC_CHANS, SAMPLES_PER_FRAME, encode_frames
+
+DAC_BUF_LEN = 32
+
+# Generate n samples of the three ADC channels starting at sample index start
+def generate_samples(start, n, rate):
+    i = start + np.arange(n)
+    # Channel 1 follows the DAC lookup table written by main.c
+    k = np.arange(DAC_BUF_LEN)
+    dac_buf = (1.3 * k * (k - 15) * (k - 31) + 1970).astype(np.uint16)
+    ch1 = dac_buf[i % DAC_BUF_LEN]
+    # Channels 2 and 3: a 7 Hz sine and a 3 Hz 25% duty square wave
+    t = i / rate
+    ch2 = 2048 + 1500 * np.sin(2 * np.pi * 7 * t)
+    ch3 = np.where((t * 3) % 1 < 0.25, 3900, 200)
+    samples = np.stack([ch1, ch2, ch3], axis=1)[:, :ADC_CHANS]
+    return np.clip(samples, 0, 4095).astype(np.uint16)
+
+# Timestamps of samples [start, start + n) like the firmware's: SysTick milliseconds since the
+# last button press (sample tick_base), wrapping at 16 bits
+def systick_timestamps(start, n, rate, tick_base=0):
+    ms = (start - tick_base + np.arange(n)) * 1000 // rate
+    return ms.astype(np.int64) & 0xFFFF
+
+# Format samples exactly like the firmware's printf call
+def format_lines(timestamps, samples):
+    return "".join(f"{t:5d} {a:4d} {b:4d} {c:4d}\r\n"
+                   for t, (a, b, c) in zip(timestamps.tolist(), samples.tolist())).encode()
+
+# Format channel 1 as one voltage per line, the stream the single value plotters read
+def format_values(samples, vref=3.3):
+    return "".join(f"{v:.3f}\r\n" for v in (samples[:, 0] * (vref / 4095)).tolist()).encode()
+
+# Class for the emulated board on a pty
+class FirmwareEmulator:
+    # Initialize the emulator, the port to open is in self.port
+    def __init__(self, rate=1000, binary=False, corrupt=0.0, seed=0, values=False):
+        self.rate = rate
+        self.binary = binary
+        self.values = values
+        self.corrupt = corrupt
+        self.rng = np.random.default_rng(seed)
+        # Imported here, the signal generators are used on every platform but the pty is POSIX only
+        import pty
+        import tty
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.samples_sent = 0
+        self.bytes_sent = 0
+        self.start_time = None   # perf_counter() time of sample 0, sample i is due at start_time + i / rate
+        self.tick_base = 0       # Sample at the last emulated button press, the timestamp restarts there
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+
+    # Start streaming in the background
+    def start(self):
+        self.start_time = time.perf_counter()
+        self._thread.start()
+        return self
+
+    # Write samples in small batches paced to the requested rate
+    def run(self):
+        start_time = self.start_time
+        batch = SAMPLES_PER_FRAME if self.binary else 1
+        while not self._stop_event.is_set():
+            due = int((time.perf_counter() - start_time) * self.rate)
+            n = (due - self.samples_sent) // batch * batch
+            if n <= 0:
+                time.sleep(0.001)
+                continue
+            samples = generate_samples(self.samples_sent, n, self.rate)
+            timestamps = systick_timestamps(self.samples_sent, n, self.rate, self.tick_base)
+            if self.binary:
+                data = encode_frames(samples, seq=self.samples_sent // SAMPLES_PER_FRAME,
+                                     timestamp=self.samples_sent & 0xFFFF)
+            elif self.values:
+                data = format_values(samples)
+            else:
+                data = format_lines(timestamps, samples)
+            if self.corrupt:
+                data = self.inject_errors(data)
+            try:
+                self.write_all(data)
+            except OSError:
+                break
+            self.samples_sent += n
+            self.bytes_sent += len(data)
+
+    # Emulate the user button, which resets the firmware's timestamp to 0
+    def press_button(self):
+        self.tick_base = self.samples_sent
+
+    # Write everything, a pty may accept only part of a large write
+    def write_all(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.master, view):]
+
+    # Flip random bytes to emulate line noise
+    def inject_errors(self, data):
+        raw = np.frombuffer(data, dtype=np.uint8).copy()
+        hits = self.rng.random(len(raw)) < self.corrupt
+        raw[hits] = self.rng.integers(0, 256, size=np.count_nonzero(hits))
+        return raw.tobytes()
+
+    # Stop streaming and close the pty
+    def stop(self):
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        os.close(self.master)
+        os.close(self.slave)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Emulate the oscilloscope firmware on a pty")
+    arg_parser.add_argument("--binary", action="store_true", help="send binary frames instead of printf text")
+    arg_parser.add_argument("--values", action="store_true", help="send channel 1 volts, one value per line")
+    arg_parser.add_argument("--rate", type=float, default=1000, help="samples per second")
+    arg_parser.add_argument("--corrupt", type=float, default=0.0, help="probability of corrupting each byte")
+    args = arg_parser.parse_args()
+
+    emulator = FirmwareEmulator(args.rate, args.binary, args.corrupt, values=args.values).start()
+    fmt = "binary" if args.binary else "values" if args.values else "text"
+    print(f"Emulating firmware on {emulator.port} ({fmt}, {args.rate:g} S/s)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        emulator.stop()
@@ -0,0 +1,112 @@
+'''
+File: measurement_panel.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Measurements panel for the osc_* plotters (see measurements.py).
+Every capture handed to it is measured and added to the running statistics, the table itself is
+only refreshed a few times a second. A selector switches the table between the latest capture and
+the mean, min, max or standard deviation over all captures since the last reset.
+Roll mode has no captures and hands it the newest samples whenever the table is due.
+'''
+
+import time
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QTableWidget, QTableWidgetItem
+)
+from measurements import MEASUREMENTS, RunningStats, measure, format_si
+from timeline import unwrap
+
+STATISTICS = ["Latest", "Mean", "Min", "Max", "Std dev"]
+
+# Class for the table of measurements per channel
+class MeasurementPanel(QWidget):
+    # Initialize the panel, hidden until toggled on
+    def __init__(self, channels=3, tick_rate=1000.0, refresh=0.25):
+        super().__init__()
+        self.tick_rate = tick_rate
+        self.refresh = refresh
+        self.last_refresh = 0.0
+        self.stats = RunningStats((len(MEASUREMENTS), channels))
+        self.latest = None
+        # Sample period estimate over all captures, a single window's timestamps are only
+        # good to a millisecond
+        self.ticks = 0.0
+        self.steps = 0
+
+        self.table = QTableWidget(len(MEASUREMENTS), channels)
+        self.table.setVerticalHeaderLabels([name for name, _ in MEASUREMENTS])
+        self.table.setHorizontalHeaderLabels([f"Channel {i + 1}" for i in range(channels)])
+        for row in range(len(MEASUREMENTS)):
+            for col in range(channels):
+                self.table.setItem(row, col, QTableWidgetItem("-"))
+        self.table.resizeColumnsToContents()
+
+        self.statistic_selector = QComboBox()
+        self.statistic_selector.addItems(STATISTICS)
+        self.statistic_selector.currentTextChanged.connect(self.redraw)
+        self.reset_button = QPushButton("Reset")
+        self.reset_button.clicked.connect(self.reset_stats)
+        self.captures_label = QLabel("Captures: 0")
+
+        top_row = QHBoxLayout()
+        top_row.addWidget(self.statistic_selector)
+        top_row.addWidget(self.reset_button)
+        top_row.addWidget(self.captures_label)
+        top_row.addStretch(1)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top_row)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+        self.hide()
+
+    # Show or hide the panel, captures are only measured while shown
+    def set_shown(self, checked):
+        self.setVisible(checked)
+        if checked:
+            self.redraw()
+
+    # Measure a (columns, length) capture window and add it to the statistics
+    def add_capture(self, window):
+        if not self.isVisible() or window.shape[1] < 2:
+            return
+        times = unwrap(window[0])
+        self.ticks += times[-1] - times[0]
+        self.steps += len(times) - 1
+        self.latest = measure(window, self.ticks / self.steps / self.tick_rate if self.ticks else None,
+                              self.tick_rate)
+        self.stats.update(self.latest)
+
+    # Forget the statistics and the sample period estimate
+    def reset_stats(self):
+        self.stats.reset()
+        self.latest = None
+        self.ticks = 0.0
+        self.steps = 0
+        self.redraw()
+
+    # Refresh the table on the next call to refresh_panel
+    def redraw(self, *_):
+        self.last_refresh = 0.0
+        self.refresh_panel()
+
+    # True when the table is shown and due for a refresh
+    def due(self):
+        return self.isVisible() and time.monotonic() - self.last_refresh >= self.refresh
+
+    # Refresh the table when due, called from the plotter's timer
+    def refresh_panel(self):
+        if not self.due():
+            return
+        self.last_refresh = time.monotonic()
+        statistic = self.statistic_selector.currentText()
+        if statistic == "Latest":
+            values = self.latest
+        else:
+            values = self.stats.get(statistic)
+        self.captures_label.setText(f"Captures: {self.stats.captures}")
+        for row, (_, unit) in enumerate(MEASUREMENTS):
+            for col in range(self.table.columnCount()):
+                text = "-" if values is None else format_si(values[row, col], unit)
+                self.table.item(row, col).setText(text)
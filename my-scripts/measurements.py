@@ -0,0 +1,179 @@
+'''
+File: measurements.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Automatic measurements of captured windows, for every channel at once.
+Min, max, Vpp, mean and RMS are plain NumPy reductions over the window. The timing measurements
+come from vectorized crossing detection: edges are found with a hysteresis band between the 10%
+and 90% levels of each channel's min to max span, so noise around a level is not taken for an
+edge, and the 10%, 50% and 90% crossing of each edge are interpolated to a fraction of a sample.
+Frequency, period, duty cycle and pulse width use the 50% crossings, rise and fall time the 10%
+and 90% ones. The results of one window are a (measurements, channels) array with NaN where a
+measurement doesn't apply, RunningStats keeps min, max, mean and standard deviation of them over
+captures with Welford's update.
+'''
+
+import numpy as np
+from timeline import unwrap
+
+# Rows of a measurement array: name and unit
+MEASUREMENTS = (
+    ("Frequency", "Hz"),
+    ("Period", "s"),
+    ("Duty cycle", "%"),
+    ("Pulse width", "s"),
+    ("Rise time", "s"),
+    ("Fall time", "s"),
+    ("Min", "V"),
+    ("Max", "V"),
+    ("Vpp", "V"),
+    ("Mean", "V"),
+    ("RMS", "V"),
+)
+ROWS = {name: row for row, (name, _) in enumerate(MEASUREMENTS)}
+
+MIN_SPAN = 16    # Channels with a smaller min to max span in codes are treated as flat
+
+# Fractional sample positions where x crosses level upwards (rising) or downwards
+def crossings(x, level, rising=True):
+    below = x < level
+    if rising:
+        idx = np.flatnonzero(below[:-1] & ~below[1:])
+    else:
+        idx = np.flatnonzero(~below[:-1] & below[1:])
+    x0 = x[idx]
+    return idx + (level - x0) / (x[idx + 1] - x0)
+
+# Sample indices where x completes a transition from at most low to at least high (rising)
+# or the other way round, hysteresis style
+def edge_ends(x, low, high, rising=True):
+    idx = np.arange(len(x))
+    last_low = np.maximum.accumulate(np.where(x <= low, idx, -1))
+    last_high = np.maximum.accumulate(np.where(x >= high, idx, -1))
+    if rising:
+        ends = (x[1:] >= high) & (last_low[:-1] > last_high[:-1])
+    else:
+        ends = (x[1:] <= low) & (last_high[:-1] > last_low[:-1])
+    return np.flatnonzero(ends) + 1
+
+# Last crossing in positions at or before each edge end
+def last_before(positions, ends):
+    return positions[np.searchsorted(positions, ends, side="right") - 1]
+
+# Timing measurements of one channel in samples: period, pulse width, rise and fall time
+def channel_timing(x, base, top):
+    span = top - base
+    timing = np.full(4, np.nan)
+    if span < MIN_SPAN:
+        return timing
+    low, mid, high = base + 0.1 * span, base + 0.5 * span, base + 0.9 * span
+
+    rise_ends = edge_ends(x, low, high, rising=True)
+    fall_ends = edge_ends(x, low, high, rising=False)
+    # Every edge passes each level at least once between its start and end
+    rises = last_before(crossings(x, mid, True), rise_ends)
+    falls = last_before(crossings(x, mid, False), fall_ends)
+
+    if len(rises) >= 2:
+        timing[0] = np.diff(rises).mean()
+    if len(rises) and len(falls):
+        # Each rise with the first fall after it and before the next rise
+        following = np.searchsorted(falls, rises)
+        has_fall = following < len(falls)
+        next_rise = np.append(rises[1:], np.inf)
+        fall = falls[np.minimum(following, len(falls) - 1)]
+        complete = has_fall & (fall < next_rise)
+        if np.any(complete):
+            timing[1] = (fall - rises)[complete].mean()
+    if len(rise_ends):
+        timing[2] = (last_before(crossings(x, high, True), rise_ends)
+                     - last_before(crossings(x, low, True), rise_ends)).mean()
+    if len(fall_ends):
+        timing[3] = (last_before(crossings(x, low, False), fall_ends)
+                     - last_before(crossings(x, high, False), fall_ends)).mean()
+    return timing
+
+# Seconds per sample of a (columns, length) window from its timestamps
+def window_period(window, tick_rate=1000.0):
+    times = unwrap(window[0])
+    return (times[-1] - times[0]) / (len(times) - 1) / tick_rate if len(times) > 1 else np.nan
+
+# Measure every channel of a (columns, length) window, returns a (measurements, channels) array
+# sample_period in seconds, estimated from the window's timestamps when not given
+def measure(window, sample_period=None, tick_rate=1000.0, vref=3.3):
+    if sample_period is None:
+        sample_period = window_period(window, tick_rate)
+    values = np.asarray(window[1:], dtype=np.float64)
+    channels = len(values)
+    results = np.full((len(MEASUREMENTS), channels), np.nan)
+    volts = vref / 4095
+
+    mins = values.min(axis=1)
+    maxs = values.max(axis=1)
+    results[ROWS["Min"]] = mins * volts
+    results[ROWS["Max"]] = maxs * volts
+    results[ROWS["Vpp"]] = (maxs - mins) * volts
+    results[ROWS["Mean"]] = values.mean(axis=1) * volts
+    results[ROWS["RMS"]] = np.sqrt(np.einsum("ij,ij->i", values, values) / values.shape[1]) * volts
+
+    for ch in range(channels):
+        period, width, rise, fall = channel_timing(values[ch], mins[ch], maxs[ch]) * sample_period
+        results[ROWS["Period"], ch] = period
+        results[ROWS["Frequency"], ch] = 1.0 / period
+        results[ROWS["Pulse width"], ch] = width
+        results[ROWS["Duty cycle"], ch] = width / period * 100
+        results[ROWS["Rise time"], ch] = rise
+        results[ROWS["Fall time"], ch] = fall
+    return results
+
+# Class for running statistics of measurement arrays over captures
+class RunningStats:
+    # Initialize for arrays of the given shape
+    def __init__(self, shape=(len(MEASUREMENTS), 3)):
+        self.shape = shape
+        self.reset()
+
+    # Forget all captures so far
+    def reset(self):
+        self.captures = 0
+        self.count = np.zeros(self.shape, dtype=np.int64)    # Captures each entry was measured in
+        self.mean = np.zeros(self.shape)
+        self.m2 = np.zeros(self.shape)                       # Sum of squared differences from the mean
+        self.min = np.full(self.shape, np.inf)
+        self.max = np.full(self.shape, -np.inf)
+
+    # Add the measurements of one capture, NaN entries are left out
+    def update(self, results):
+        self.captures += 1
+        valid = ~np.isnan(results)
+        values = np.where(valid, results, 0.0)
+        self.count += valid
+        delta = np.where(valid, values - self.mean, 0.0)
+        self.mean += delta / np.maximum(self.count, 1)
+        self.m2 += delta * (values - self.mean) * valid
+        np.fmin(self.min, np.where(valid, values, np.inf), out=self.min)
+        np.fmax(self.max, np.where(valid, values, -np.inf), out=self.max)
+
+    # Sample standard deviation, NaN where there are fewer than two values
+    @property
+    def std(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+    # Statistic by name: "Mean", "Min", "Max" or "Std dev", NaN where nothing was measured
+    def get(self, name):
+        values = {"Mean": self.mean, "Min": self.min, "Max": self.max, "Std dev": self.std}[name]
+        return np.where(self.count > 0, values, np.nan)
+
+# Format a value with an SI prefix, e.g. 1.250 kHz
+def format_si(value, unit):
+    if value is None or not np.isfinite(value):
+        return "-"
+    if unit == "%":
+        return f"{value:.1f} %"
+    prefixes = ((1e9, "G"), (1e6, "M"), (1e3, "k"), (1.0, ""), (1e-3, "m"), (1e-6, "u"), (1e-9, "n"))
+    for scale, prefix in prefixes:
+        if abs(value) >= scale:
+            return f"{value / scale:.4g} {prefix}{unit}"
+    return f"{value:.4g} {unit}"
@@ -0,0 +1,158 @@
+'''
+File: metrics.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Hot-path instrumentation for the acquisition worker and the plotters.
+Stages (read, parse, trigger, plot) are timed into rolling windows of the latest durations,
+alongside counters for bytes and samples in, samples and frames shown, parse errors, drops
+and the serial backlog. A snapshot turns these into percentiles, log-spaced histograms and
+input versus display rates, and can be appended to a JSON lines file.
+When disabled every call returns straight away, so the hooks can stay in the hot path.
+
+Plotters take --stats to show the overlay at start and --metrics FILE to export snapshots.
+'''
+
+import argparse
+import json
+import threading
+import time
+import numpy as np
+
+# Histogram bin edges in seconds, half decades from 1 us to 1 s
+HISTOGRAM_EDGES = 10.0 ** np.arange(-6.0, 0.5, 0.5)
+
+# Class collecting timings and counters, shared between the worker thread and the GUI thread
+class Metrics:
+    # Initialize, history is the number of durations kept per stage
+    def __init__(self, enabled=False, history=1024, export_path=None, export_interval=1.0):
+        self.enabled = enabled or export_path is not None
+        self.history = history
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.last_export = time.monotonic()
+        self.times = {}       # Stage name: ring of the latest durations
+        self.recorded = {}    # Stage name: number of durations ever recorded
+        # Stages are timed on the worker thread while the GUI thread resets and reads them
+        self.lock = threading.Lock()
+        # Each counter is only ever written by one thread
+        self.counters = dict.fromkeys(("bytes_in", "samples_in", "samples_shown", "frames", "dropped"), 0)
+        self.gauges = dict.fromkeys(("backlog_bytes", "parse_errors", "skipped", "target_fps"), 0)
+        self.last_counters = dict(self.counters)
+        self.last_snapshot = time.monotonic()
+
+    # Start timing a stage
+    def start(self):
+        if not self.enabled:
+            return 0.0
+        return time.perf_counter()
+
+    # Finish timing a stage started at start, a start taken while disabled (0.0) is not timed
+    def stop(self, stage, start):
+        if not self.enabled or not start:
+            return
+        duration = time.perf_counter() - start
+        with self.lock:
+            ring = self.times.get(stage)
+            if ring is None:
+                ring = self.times[stage] = np.zeros(self.history)
+                self.recorded[stage] = 0
+            n = self.recorded[stage]
+            ring[n % self.history] = duration
+            self.recorded[stage] = n + 1
+
+    # Add to a counter
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] += n
+
+    # Set a gauge to its current value
+    def set(self, name, value):
+        if self.enabled:
+            self.gauges[name] = value
+
+    # Forget all timings and counters
+    def reset(self):
+        with self.lock:
+            self.times.clear()
+            self.recorded.clear()
+        for name in self.counters:
+            self.counters[name] = 0
+        self.last_counters = dict(self.counters)
+        self.last_snapshot = time.monotonic()
+
+    # Summary of the stages and the rates since the previous snapshot
+    def snapshot(self):
+        now = time.monotonic()
+        elapsed = max(now - self.last_snapshot, 1e-9)
+        counters = dict(self.counters)
+        delta = {name: counters[name] - self.last_counters[name] for name in counters}
+        self.last_counters = counters
+        self.last_snapshot = now
+
+        # Copies of the rings, so the statistics are worked out without holding the lock
+        with self.lock:
+            recorded = [(stage, ring[:min(self.recorded[stage], self.history)].copy(), self.recorded[stage])
+                        for stage, ring in self.times.items()]
+        stages = {}
+        for stage, durations, count in recorded:
+            if len(durations) == 0:
+                continue
+            p50, p95 = np.percentile(durations, (50, 95))
+            stages[stage] = {
+                "count": count,
+                "mean_ms": float(durations.mean()) * 1000,
+                "p50_ms": float(p50) * 1000,
+                "p95_ms": float(p95) * 1000,
+                "max_ms": float(durations.max()) * 1000,
+                "histogram": np.histogram(durations, HISTOGRAM_EDGES)[0].tolist(),
+            }
+
+        input_rate = delta["samples_in"] / elapsed
+        # Backlog in seconds from the bytes still queued in the OS and the current bytes per sample
+        bytes_per_sample = counters["bytes_in"] / counters["samples_in"] if counters["samples_in"] else 0.0
+        backlog_samples = self.gauges["backlog_bytes"] / bytes_per_sample if bytes_per_sample else 0.0
+        return {
+            "time": time.time(),
+            "stages": stages,
+            "input_rate": input_rate,
+            "display_rate": delta["samples_shown"] / elapsed,
+            "fps": delta["frames"] / elapsed,
+            "target_fps": self.gauges["target_fps"],
+            "backlog_bytes": self.gauges["backlog_bytes"],
+            "backlog_s": backlog_samples / input_rate if input_rate else 0.0,
+            "parse_errors": self.gauges["parse_errors"],
+            "dropped": counters["dropped"],
+            "skipped": self.gauges["skipped"],
+            "counters": counters,
+        }
+
+    # Append a snapshot to the export file when one is due
+    def export(self, snapshot):
+        if self.export_path is None or time.monotonic() - self.last_export < self.export_interval:
+            return
+        self.last_export = time.monotonic()
+        with open(self.export_path, "a") as f:
+            f.write(json.dumps(snapshot) + "\n")
+
+# Format a snapshot as a few lines of text for the overlay
+def format_snapshot(snapshot):
+    lines = [f"in {snapshot['input_rate']:,.0f} S/s   shown {snapshot['display_rate']:,.0f} S/s   "
+             f"{snapshot['fps']:.0f} fps" + (f" (max {snapshot['target_fps']:.0f})" if snapshot.get("target_fps") else ""),
+             f"backlog {snapshot['backlog_bytes']:,} B ({snapshot['backlog_s'] * 1000:.0f} ms)   "
+             f"parse errors {snapshot['parse_errors']:,}   dropped {snapshot['dropped']:,}   "
+             f"skipped {snapshot['skipped']:,}"]
+    for stage, stats in snapshot["stages"].items():
+        lines.append(f"{stage:<8} p50 {stats['p50_ms']:7.3f}  p95 {stats['p95_ms']:7.3f}  "
+                     f"max {stats['max_ms']:7.3f} ms")
+    return "\n".join(lines)
+
+# Build the metrics picked on the command line, returns (metrics, show overlay at start)
+def metrics_from_args(argv):
+    arg_parser = argparse.ArgumentParser(add_help=False)
+    arg_parser.add_argument("--stats", action="store_true", help="show the metrics overlay")
+    arg_parser.add_argument("--metrics", metavar="FILE", help="append metrics snapshots to FILE")
+    arg_parser.add_argument("--metrics-interval", type=float, default=1.0, help="seconds between snapshots")
+    args, _ = arg_parser.parse_known_args(argv)
+    metrics = Metrics(args.stats, export_path=args.metrics, export_interval=args.metrics_interval)
+    return metrics, args.stats
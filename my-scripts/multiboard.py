@@ -0,0 +1,146 @@
+'''
+File: multiboard.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Concurrent acquisition from several boards, aligned onto one host timebase.
+Every board gets its own BoardWorker thread, an AcquisitionWorker that reads only its own port,
+so a slow or stalled port never holds up the others and throughput grows with the number of ports.
+Each worker unwraps its board's SysTick timestamps, spreads the samples that share a millisecond
+evenly over it, and maps board time onto the host's monotonic clock with ClockAlignment before
+publishing. Subscribers get (N, 4) float64 chunks of host seconds since the acquisition started
+followed by the three channels, so samples of different boards with the same time were taken at
+the same moment to within the alignment error (about a millisecond, the timestamp resolution).
+'''
+
+import argparse
+import time
+import numpy as np
+from acquisition import AcquisitionWorker
+from metrics import Metrics
+from sources import source_from_args
+from timeline import Timeline
+
+# Class that maps one board's clock onto the host clock
+class ClockAlignment:
+    # Initialize, drift is the largest clock rate difference to follow in seconds per second
+    def __init__(self, tick_rate=1000.0, drift=200e-6):
+        self.tick_rate = tick_rate
+        self.drift = drift
+        self.reset()
+
+    # Forget the offset
+    def reset(self):
+        self.offset = None          # Host time minus board time in seconds
+        self.latency = 0.0          # Transfer latency of the newest chunk over the offset
+        self.last_arrival = None
+
+    # Update with the board time in ticks of a chunk's newest sample and the host time it arrived at,
+    # returns the offset
+    def update(self, ticks, arrival):
+        # A sample can't arrive before it was taken, so arrival minus board time is the offset plus
+        # the transfer latency, and the smallest value seen is the closest bound on the offset
+        candidate = arrival - ticks / self.tick_rate
+        if self.offset is None:
+            self.offset = candidate
+        else:
+            # The bound may creep up by the allowed drift, so a board clock running slow is followed
+            creep = self.drift * (arrival - self.last_arrival)
+            self.offset = min(candidate, self.offset + creep)
+        self.latency = candidate - self.offset
+        self.last_arrival = arrival
+        return self.offset
+
+# Class for the acquisition thread of one board, publishing chunks on the host timebase
+class BoardWorker(AcquisitionWorker):
+    # Initialize for one board's source, epoch is the host time that becomes 0
+    def __init__(self, source, name="", epoch=None, metrics=None, tick_rate=1000.0):
+        super().__init__(source, metrics=metrics)
+        self.name = name
+        self.epoch = time.monotonic() if epoch is None else epoch
+        self.timeline = Timeline(tick_rate)
+        self.clock = ClockAlignment(tick_rate)
+        self.run_length = 0         # Samples so far with the newest tick value
+        self.last_tick = None
+        self.last_time = -np.inf    # Host time of the newest published sample
+
+    # Spread the samples sharing each tick value over that tick, returns float ticks
+    def spread(self, times):
+        n = len(times)
+        change = np.empty(n, dtype=bool)
+        change[0] = times[0] != self.last_tick
+        change[1:] = times[1:] != times[:-1]
+        index = np.arange(n)
+        starts = np.where(change, index, -1)
+        np.maximum.accumulate(starts, out=starts)
+        # Samples before the first new tick value continue the previous chunk's run
+        position = np.where(starts >= 0, index - starts, index + self.run_length)
+        self.run_length = int(position[-1]) + 1
+        self.last_tick = int(times[-1])
+        period = self.timeline.period or 1.0
+        return times + np.minimum(position * period, 0.999)
+
+    # Align a chunk onto the host timebase and hand it to every subscriber (worker thread)
+    def publish(self, chunk):
+        arrival = time.monotonic()
+        start = self.metrics.start()
+        self.metrics.count("samples_in", len(chunk))
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.write(chunk)
+
+        ticks = self.spread(self.timeline.feed(chunk[:, 0]))
+        offset = self.clock.update(ticks[-1], arrival)
+        aligned = np.empty(chunk.shape)
+        aligned[:, 0] = ticks / self.timeline.tick_rate + (offset - self.epoch)
+        aligned[:, 1:] = chunk[:, 1:]
+        # A lower offset found later must not send the board's time backwards
+        np.maximum.accumulate(aligned[:, 0], out=aligned[:, 0])
+        np.maximum(aligned[:, 0], self.last_time, out=aligned[:, 0])
+        self.last_time = aligned[-1, 0]
+        self.metrics.stop("align", start)
+
+        for subscription in self.subscribers:
+            subscription.put_chunk(aligned)
+
+# Class for the set of board workers sharing one timebase
+class MultiBoardAcquisition:
+    # Initialize with one source per board, metrics is copied for the enabled flag only since
+    # every worker writes its own counters
+    def __init__(self, sources, names=None, metrics=None, tick_rate=1000.0):
+        enabled = metrics.enabled if metrics is not None else False
+        self.epoch = time.monotonic()
+        names = names or [f"Board {k + 1}" for k in range(len(sources))]
+        self.boards = [BoardWorker(source, name, self.epoch, Metrics(enabled), tick_rate)
+                       for source, name in zip(sources, names)]
+
+    # Number of boards
+    def __len__(self):
+        return len(self.boards)
+
+    # One Subscription per board, in board order
+    def subscribe(self, queue_len=256):
+        return [board.subscribe(queue_len) for board in self.boards]
+
+    # Start every board's thread
+    def start(self):
+        for board in self.boards:
+            board.start()
+
+    # Stop every board's thread
+    def stop(self):
+        for board in self.boards:
+            board._stop_event.set()
+        for board in self.boards:
+            board.stop()
+
+# Build one source per board from the command line: --ports for serial ports, otherwise --boards
+# copies of the source the other options pick (e.g. --synthetic), returns (sources, names)
+def sources_from_args(argv):
+    arg_parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    arg_parser.add_argument("--ports", nargs="+")
+    arg_parser.add_argument("--boards", type=int, default=2)
+    args, _ = arg_parser.parse_known_args(argv)
+    if args.ports:
+        return [source_from_args(argv + ["--port", port]) for port in args.ports], list(args.ports)
+    return [source_from_args(argv) for _ in range(args.boards)], None
@@ -0,0 +1,231 @@
+'''
+File: osc_boards_pyqt.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Roll view of several boards at once, every channel of every board on one time axis.
+Each board is read by its own thread (see multiboard.py) and its samples arrive already aligned
+onto the host timebase, so the view only keeps a float64 history per board and draws the last
+span seconds of all of them against the newest sample of any board. A board that stops sending
+simply stops moving while the others carry on.
+
+Usage: python osc_boards_pyqt.py --ports COM8 COM9 [--baud 115200]
+       python osc_boards_pyqt.py --boards 2 --synthetic [--rate 5000]
+       plus the other source and metrics options.
+'''
+
+import sys
+import numpy as np
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel,
+    QHBoxLayout, QPushButton, QCheckBox, QDoubleSpinBox, QGridLayout
+)
+import pyqtgraph as pg
+from multiboard import MultiBoardAcquisition, sources_from_args
+from metrics import Metrics, metrics_from_args
+from ring_buffer import RingBuffer
+from stats_overlay import StatsOverlay
+from render_scheduler import RenderScheduler, RangeCache, fast_curve
+
+# Samples of history kept per board
+HISTORY = 2 ** 19
+
+# Pen colors per channel, one line style per board
+CHANNEL_COLORS = ('r', 'g', 'b')
+BOARD_STYLES = (pg.QtCore.Qt.SolidLine, pg.QtCore.Qt.DashLine, pg.QtCore.Qt.DotLine, pg.QtCore.Qt.DashDotLine)
+
+# Class for the multi-board roll plotter
+class UARTMultiBoardPlotter(QWidget):
+    # Initialize with one source per board, or an acquisition another view already made
+    def __init__(self, sources=None, names=None, metrics=None, acquisition=None):
+        super().__init__()
+
+        if acquisition is None:
+            acquisition = MultiBoardAcquisition(sources, names=names, metrics=metrics)
+        self.acquisition = acquisition
+        # The view's own timings, every board worker keeps its own counters
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.subscriptions = acquisition.subscribe()
+        self.buffers = [RingBuffer(HISTORY, columns=4, dtype=np.float64) for _ in acquisition.boards]
+        self.span = 2.0           # Seconds shown
+        self.is_running = False
+
+        self.init_ui()
+        self.acquisition.start()
+
+        # Boards are drained every 10 ms, the plot is redrawn at the display frame rate
+        self.scheduler = RenderScheduler(self.read_and_update, self.render, metrics=self.metrics)
+        self.scheduler.start()
+
+    # Initialize the UI components
+    def init_ui(self):
+        self.plot_widget = pg.PlotWidget(title="Roll Mode: All Boards vs Host Time")
+        self.plot_widget.setYRange(0, 4095, padding=0)
+        self.plot_widget.showGrid(x=True, y=True)
+        self.plot_widget.setLabel('bottom', 'Time', units='s')
+        self.stats_overlay = StatsOverlay(self.plot_widget, self.metrics)
+        self.ranges = RangeCache(self.plot_widget)
+
+        # One curve per board and channel, peak downsampled to the screen and clipped to the view
+        self.curves = []
+        self.channel_checks = []
+        checks_layout = QGridLayout()
+        for b, board in enumerate(self.acquisition.boards):
+            style = BOARD_STYLES[b % len(BOARD_STYLES)]
+            checks_layout.addWidget(QLabel(board.name), b, 0)
+            curves, checks = [], []
+            for ch, color in enumerate(CHANNEL_COLORS):
+                curve = fast_curve(self.plot_widget, pen=pg.mkPen(color, width=2, style=style),
+                                   name=f"{board.name} Ch {ch + 1}")
+                check = QCheckBox(f"Ch {ch + 1}")
+                check.setChecked(True)
+                check.setStyleSheet(f"color: {('red', 'green', 'blue')[ch]};")
+                check.toggled.connect(self.change_channels)
+                checks_layout.addWidget(check, b, ch + 1)
+                curves.append(curve)
+                checks.append(check)
+            self.curves.append(curves)
+            self.channel_checks.append(checks)
+
+        # Start/Stop button
+        self.start_stop_button = QPushButton("Start")
+        self.start_stop_button.setCheckable(True)
+        self.start_stop_button.setStyleSheet("background-color: green; color: white; font-weight: bold;")
+        self.start_stop_button.toggled.connect(self.toggle_start_stop)
+
+        # Time span shown
+        self.span_box = QDoubleSpinBox()
+        self.span_box.setRange(0.01, 60.0)
+        self.span_box.setDecimals(2)
+        self.span_box.setValue(self.span)
+        self.span_box.setPrefix("Span ")
+        self.span_box.setSuffix(" s")
+        self.span_box.valueChanged.connect(self.change_span)
+
+        # Per board rate, clock offset, transfer latency and drops
+        self.board_label = QLabel("")
+
+        # Checkbox to show the hot-path metrics over the plot
+        self.stats_check = QCheckBox("Stats")
+        self.stats_check.toggled.connect(self.stats_overlay.set_shown)
+
+        left_layout = QVBoxLayout()
+        left_layout.addWidget(self.start_stop_button)
+        left_layout.addWidget(self.span_box)
+        left_layout.addLayout(checks_layout)
+        left_layout.addWidget(self.board_label)
+        left_layout.addWidget(self.stats_check)
+        left_layout.addStretch()
+
+        main_layout = QHBoxLayout()
+        main_layout.addLayout(left_layout)
+        main_layout.addWidget(self.plot_widget, stretch=1)
+        self.setLayout(main_layout)
+
+    # Toggle start/stop button
+    def toggle_start_stop(self, checked):
+        self.is_running = checked
+        if checked:
+            self.start_stop_button.setText("Stop")
+            self.start_stop_button.setStyleSheet("background-color: red; color: white; font-weight: bold;")
+            for buffer in self.buffers:
+                buffer.clear()
+        else:
+            self.start_stop_button.setText("Start")
+            self.start_stop_button.setStyleSheet("background-color: green; color: white; font-weight: bold;")
+
+    # Change the time span shown
+    def change_span(self, value):
+        self.span = value
+        self.scheduler.mark_dirty()
+
+    # Show the checked curves, a hidden curve is emptied so it comes back with fresh samples only
+    def change_channels(self, *_):
+        for curves, checks in zip(self.curves, self.channel_checks):
+            for curve, check in zip(curves, checks):
+                curve.setVisible(check.isChecked())
+                if not check.isChecked():
+                    curve.clear()
+        self.scheduler.mark_dirty()
+
+    # Take every board's aligned samples (ingest timer)
+    def read_and_update(self):
+        metrics = self.metrics
+        start = metrics.start()
+        received = 0
+        for subscription, buffer in zip(self.subscriptions, self.buffers):
+            for chunk in subscription.drain():
+                buffer.extend(chunk)
+                received += len(chunk)
+        metrics.stop("buffer", start)
+
+        if self.is_running and received:
+            metrics.count("samples_shown", received)
+            self.scheduler.mark_dirty()
+        self.update_board_label()
+        self.stats_overlay.refresh_stats()
+
+    # Draw the newest samples while running (display timer)
+    def render(self):
+        if self.is_running:
+            start = self.metrics.start()
+            self.update_plot()
+            self.metrics.stop("plot", start)
+            self.metrics.count("frames")
+
+    # Newest span seconds of a board up to time end, as a (columns, N) array
+    def recent(self, b, end):
+        buffer = self.buffers[b]
+        rate = self.acquisition.boards[b].timeline.sample_rate
+        # Only the tail that can fall in the span is read, so a deep history costs nothing to draw
+        n = len(buffer) if rate is None else min(len(buffer), int(self.span * rate * 1.25) + 16)
+        window = buffer.tail(n)
+        first = int(np.searchsorted(window[0], end - self.span))
+        return window[:, first:]
+
+    # Draw the last span seconds of every board
+    def update_plot(self):
+        ends = [buffer.data[0, buffer.head - 1] for buffer in self.buffers if len(buffer)]
+        if not ends:
+            return
+        end = max(ends)
+        for b, curves in enumerate(self.curves):
+            window = self.recent(b, end) if len(self.buffers[b]) else None
+            for ch, curve in enumerate(curves):
+                if not self.channel_checks[b][ch].isChecked():
+                    continue
+                if window is not None and len(window[0]):
+                    curve.setData(window[0], window[ch + 1])
+                else:
+                    curve.clear()
+        self.ranges.set_x(end - self.span, end, padding=0)
+
+    # Show each board's sample rate, clock offset, latency and samples dropped by this view,
+    # or why its acquisition stopped
+    def update_board_label(self):
+        lines = []
+        for board, subscription in zip(self.acquisition.boards, self.subscriptions):
+            rate = board.timeline.sample_rate
+            offset = board.clock.offset
+            lines.append(
+                f"{board.name}: {'-' if rate is None else f'{rate:,.0f} S/s'}, "
+                f"offset {'-' if offset is None else f'{(offset - self.acquisition.epoch) * 1000:+.1f} ms'}, "
+                f"latency {board.clock.latency * 1000:.1f} ms, dropped {subscription.dropped_samples:,}")
+            failure = board.failure()
+            if failure is not None:
+                lines.append(f"{board.name}: {failure}")
+        self.board_label.setText("\n".join(lines))
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = QMainWindow()
+    metrics, show_stats = metrics_from_args(sys.argv[1:])
+    sources, names = sources_from_args(sys.argv[1:])
+    plotter = UARTMultiBoardPlotter(sources, names=names, metrics=metrics)
+    plotter.stats_check.setChecked(show_stats)
+    window.setCentralWidget(plotter)
+    window.setWindowTitle("UART Multi-Board Roll Plotter")
+    window.resize(1200, 600)
+    window.show()
+    app.aboutToQuit.connect(plotter.acquisition.stop)
+    sys.exit(app.exec())
@@ -0,0 +1,326 @@
+'''
+File: osc_cli.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Headless capture from the command line, for logging and scripted measurements without a display.
+Every mode reads the sample source directly in one thread with the same trigger, segment and
+measurement code as the plotters, and never imports Qt or pyqtgraph:
+    roll      log the sample stream to a recording (.osc) or as text lines
+    normal    trigger repeatedly and write every capture
+    trigger   arm once for one or more segments, exits 1 if nothing triggered before the timeout
+    analyze   trigger and measure over a whole recording offline, in parallel (see analysis.py)
+Captures go to an .npz file or as CSV text, measurements as one JSON line per capture followed by
+a summary of their running statistics. Output "-" is stdout. The GUI windows are only imported
+once one is asked for with the gui subcommand.
+
+Usage: python osc_cli.py roll [--duration S] [--samples N] [--output FILE|-]
+       python osc_cli.py normal [--captures N] [--duration S] [trigger options] [--output FILE|-] [--measurements FILE|-]
+       python osc_cli.py trigger [--segments N] [--timeout S] [trigger options] [--output FILE|-] [--measurements FILE|-]
+       python osc_cli.py analyze RECORDING.osc [--workers N] [--chunk SAMPLES] [trigger options] [--output FILE|-] [--measurements FILE|-]
+       python osc_cli.py gui {roll,normal,trigger,fft,multi} [window options]
+       plus the source options of every plotter (--port, --baud, --replay, --synthetic, --rate, --speed, ...)
+       Trigger options: --level CODE --edge {rising,falling} --source {1,2,3,any} --hysteresis CODES
+                        --holdoff SAMPLES --length SAMPLES --pre-trigger FRACTION
+'''
+
+import time
+START = time.perf_counter()    # Cold start is timed from here, before anything heavy is imported
+
+import argparse
+import json
+import runpy
+import sys
+import numpy as np
+from sources import source_from_args
+from trigger import EdgeTrigger, TriggeredCapture
+from segments import SegmentedCapture
+from measurements import MEASUREMENTS, RunningStats, measure
+
+# GUI windows by name, imported only when one is opened
+GUI_MODULES = {
+    "roll": "osc_roll_pyqt",
+    "normal": "osc_normal_pyqt",
+    "trigger": "osc_trigger_pyqt",
+    "fft": "osc_fft_pyqt",
+    "multi": "osc_multi_pyqt",
+}
+
+CHANNEL_SOURCES = {"1": 1, "2": 2, "3": 3, "any": [1, 2, 3]}
+
+# Open a text output, "-" is stdout and None is no output
+def open_text(path):
+    if path is None:
+        return None
+    return sys.stdout if path == "-" else open(path, "w")
+
+# Class that hands out chunks from the source until a duration, a sample count or the end of a replay
+class ChunkReader:
+    # Initialize, duration in seconds and samples are limits, None for no limit
+    def __init__(self, source, duration=None, samples=None, verbose=False):
+        self.source = source
+        self.deadline = None if duration is None else time.monotonic() + duration
+        self.samples = samples
+        self.verbose = verbose
+        self.samples_read = 0
+
+    # True once a limit is reached
+    def done(self):
+        if self.samples is not None and self.samples_read >= self.samples:
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+        return getattr(self.source, "finished", False)
+
+    # Yield (N, 4) chunks, the last one trimmed to the sample limit
+    def __iter__(self):
+        while not self.done():
+            chunk = self.source.read()
+            if len(chunk) == 0:
+                time.sleep(0.002)
+                continue
+            if self.samples is not None:
+                chunk = chunk[:self.samples - self.samples_read]
+            if self.samples_read == 0 and self.verbose:
+                print(f"First samples {(time.perf_counter() - START) * 1000:.1f} ms after start, "
+                      f"Qt loaded: {'PySide6' in sys.modules}", file=sys.stderr)
+            self.samples_read += len(chunk)
+            yield chunk
+
+# Class that writes capture windows as CSV text or collects them into an .npz file
+class CaptureWriter:
+    # Initialize for an output path, ".npz" files are written on close, anything else is text
+    def __init__(self, path):
+        self.path = path
+        self.npz = path is not None and path.endswith(".npz")
+        self.file = None if self.npz else open_text(path)
+        self.windows, self.trigger_index, self.trigger_time = [], [], []
+
+    # Write one (columns, length) window, trigger_time in ticks or None
+    def write(self, number, window, trigger_index, trigger_time=None):
+        if self.npz:
+            self.windows.append(window.copy())
+            self.trigger_index.append(trigger_index)
+            self.trigger_time.append(-1 if trigger_time is None else trigger_time)
+        elif self.file is not None:
+            timing = "" if trigger_time is None else f" trigger_time {trigger_time}"
+            self.file.write(f"# capture {number} trigger_index {trigger_index}{timing}\n")
+            np.savetxt(self.file, window.T, fmt="%d", delimiter=",", header="timestamp,ch1,ch2,ch3", comments="")
+            self.file.flush()
+
+    # Finish the output
+    def close(self):
+        if self.npz and self.windows:
+            windows = np.stack(self.windows)
+            np.savez(self.path, data=windows[:, 1:].transpose(0, 2, 1), timestamps=windows[:, 0],
+                     trigger_index=np.array(self.trigger_index), trigger_time=np.array(self.trigger_time))
+        elif self.file not in (None, sys.stdout):
+            self.file.close()
+
+# Class that measures captures and writes a JSON line for each, then a summary
+class MeasurementWriter:
+    # Initialize for an output path, None measures nothing
+    def __init__(self, path, tick_rate=1000.0):
+        self.file = open_text(path)
+        self.tick_rate = tick_rate
+        self.stats = RunningStats()
+
+    # Measure one window and write its results
+    def write(self, number, window):
+        if self.file is None:
+            return
+        self.write_results(number, measure(window, tick_rate=self.tick_rate))
+
+    # Write the measurements of one capture, fields are added to its line
+    def write_results(self, number, results, **fields):
+        self.stats.update(results)
+        self.file.write(json.dumps({"capture": number, **fields, **self.as_dict(results)}) + "\n")
+        self.file.flush()
+
+    # {measurement: [per channel values]} with None where nothing was measured
+    @staticmethod
+    def as_dict(results):
+        return {name: [None if np.isnan(v) else float(v) for v in row]
+                for (name, _), row in zip(MEASUREMENTS, results)}
+
+    # Write the running statistics over every capture and finish the output
+    def close(self):
+        if self.file is None:
+            return
+        if self.stats.captures:
+            summary = {name: self.as_dict(self.stats.get(name)) for name in ("Mean", "Min", "Max", "Std dev")}
+            self.file.write(json.dumps({"captures": self.stats.captures, "summary": summary}) + "\n")
+        if self.file is not sys.stdout:
+            self.file.close()
+
+# Log the sample stream, returns the exit code
+def run_roll(args, reader):
+    if args.output is not None and args.output.endswith(".osc"):
+        from recorder import Recorder
+        from timeline import Timeline
+        # The source's nominal rate goes in the header, else the rate estimated from the timestamps
+        recorder = Recorder(args.output, channels=3, sample_rate=getattr(reader.source, "sample_rate", None) or 0.0)
+        timeline = Timeline()
+        recorder.start()
+        for chunk in reader:
+            recorder.write(chunk)
+            if not recorder.sample_rate:
+                timeline.feed(chunk[:, 0])
+                recorder.sample_rate = timeline.sample_rate or 0.0
+        if not recorder.stop(timeout=1.0):
+            print(f"Writing {recorder.queue.qsize():,} queued chunks to {args.output}", file=sys.stderr)
+            recorder.stop()
+        if recorder.dropped_samples:
+            print(f"Dropped {recorder.dropped_samples:,} samples, the disk fell behind", file=sys.stderr)
+    else:
+        out = open_text(args.output or "-")
+        for chunk in reader:
+            np.savetxt(out, chunk, fmt="%d")
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+# Build the trigger and capture for the normal or trigger subcommand
+def make_capture(args, segments=None):
+    trigger = EdgeTrigger(args.level, args.edge == "rising", args.hysteresis, args.holdoff)
+    source = CHANNEL_SOURCES[args.source]
+    length = args.length
+    if segments is None:
+        return TriggeredCapture(trigger, length=length, pre_trigger=args.pre_trigger, source=source,
+                                max_length=length)
+    return SegmentedCapture(trigger, length=length, pre_trigger=args.pre_trigger, source=source,
+                            segments=segments, max_length=length)
+
+# Trigger repeatedly and write every capture, returns the exit code
+def run_normal(args, reader):
+    capture = make_capture(args)
+    captures = CaptureWriter(args.output)
+    measurements = MeasurementWriter(args.measurements)
+    capture.arm()
+    count = 0
+    for chunk in reader:
+        for trigger_index, window in capture.feed(chunk):
+            captures.write(count, window, trigger_index)
+            measurements.write(count, window)
+            count += 1
+            if args.captures is not None and count >= args.captures:
+                break
+        if args.captures is not None and count >= args.captures:
+            break
+    captures.close()
+    measurements.close()
+    return 0 if count else 1
+
+# Arm once for a sequence of segments and write them, returns the exit code
+def run_trigger(args, reader):
+    capture = make_capture(args, segments=args.segments)
+    capture.arm()
+    for chunk in reader:
+        capture.feed(chunk)
+        if capture.is_full():
+            break
+    captures = CaptureWriter(args.output)
+    measurements = MeasurementWriter(args.measurements)
+    for k in range(capture.count):
+        window = capture.window(k)
+        captures.write(k, window, int(capture.trigger_index[k]), int(capture.trigger_time[k]))
+        measurements.write(k, window)
+    captures.close()
+    measurements.close()
+    if capture.count < capture.segments:
+        print(f"Captured {capture.count} of {capture.segments} segments", file=sys.stderr)
+    return 0 if capture.count else 1
+
+# Trigger and measure over a whole recording with a process pool, returns the exit code
+def run_analyze(args):
+    from analysis import OfflineAnalysis
+    capture = make_capture(args)
+    analysis = OfflineAnalysis(args.recording, capture, chunk=args.chunk, workers=args.workers)
+    captures = CaptureWriter(args.output)
+    measurements = MeasurementWriter(args.measurements)
+    pre = capture.pre_samples()
+    start = time.perf_counter()
+    count = 0
+    for hit, results in analysis.run(with_measurements=measurements.file is not None):
+        if args.output is not None:
+            window = analysis.window(hit)
+            # Unwrapped ticks from the start of the recording, like the trigger_time of 'trigger'
+            captures.write(count, window, pre, analysis.recording.time_at(hit))
+        if results is not None:
+            measurements.write_results(count, results, sample=hit)
+        count += 1
+    captures.close()
+    measurements.close()
+    if args.verbose:
+        elapsed = time.perf_counter() - start
+        print(f"{count} captures from {analysis.hits_found} triggers in {analysis.count:,} samples, "
+              f"{elapsed:.2f} s ({analysis.count / max(elapsed, 1e-9) / 1e6:.1f} MS/s)", file=sys.stderr)
+    return 0 if count else 1
+
+# Open a GUI window with the remaining arguments, the Qt stack is imported only here
+def run_gui(mode, argv):
+    sys.argv = [GUI_MODULES[mode] + ".py"] + argv
+    runpy.run_module(GUI_MODULES[mode], run_name="__main__")
+    return 0
+
+# Add the options shared by the triggered subcommands
+def add_trigger_options(parser):
+    parser.add_argument("--level", type=int, default=2048, help="ADC code")
+    parser.add_argument("--edge", choices=("rising", "falling"), default="rising")
+    parser.add_argument("--source", choices=list(CHANNEL_SOURCES), default="1")
+    parser.add_argument("--hysteresis", type=int, default=0, help="ADC codes")
+    parser.add_argument("--holdoff", type=int, default=0, help="samples")
+    parser.add_argument("--length", type=int, default=1024, help="samples per capture")
+    parser.add_argument("--pre-trigger", type=float, default=0.5, help="fraction of the capture")
+    parser.add_argument("--output", metavar="FILE", help=".npz, or CSV text, '-' for stdout")
+    parser.add_argument("--measurements", metavar="FILE", help="JSON lines, '-' for stdout")
+
+def main(argv):
+    # The GUI takes every remaining argument as is
+    if argv[:1] == ["gui"]:
+        gui_parser = argparse.ArgumentParser(prog="osc_cli.py gui")
+        gui_parser.add_argument("mode", choices=list(GUI_MODULES))
+        args, rest = gui_parser.parse_known_args(argv[1:])
+        return run_gui(args.mode, rest)
+
+    arg_parser = argparse.ArgumentParser(description="Headless capture from the oscilloscope")
+    arg_parser.add_argument("--verbose", action="store_true", help="report the start up time on stderr")
+    modes = arg_parser.add_subparsers(dest="mode", required=True)
+    roll = modes.add_parser("roll", help="log the sample stream")
+    roll.add_argument("--duration", type=float, help="seconds")
+    roll.add_argument("--samples", type=int)
+    roll.add_argument("--output", metavar="FILE", help=".osc recording, or text lines, '-' for stdout")
+    normal = modes.add_parser("normal", help="trigger repeatedly")
+    normal.add_argument("--captures", type=int)
+    normal.add_argument("--duration", type=float, help="seconds")
+    add_trigger_options(normal)
+    single = modes.add_parser("trigger", help="arm once for one or more segments")
+    single.add_argument("--segments", type=int, default=1)
+    single.add_argument("--timeout", type=float, help="seconds")
+    add_trigger_options(single)
+    analyze = modes.add_parser("analyze", help="trigger and measure over a recording offline")
+    analyze.add_argument("recording", help=".osc recording")
+    analyze.add_argument("--workers", type=int, help="processes, one per core by default")
+    analyze.add_argument("--chunk", type=int, default=1 << 20, help="samples per task")
+    add_trigger_options(analyze)
+    modes.add_parser("gui", help="open a window: roll, normal, trigger, fft or multi")
+    args, _ = arg_parser.parse_known_args(argv)
+    if args.mode == "analyze":
+        try:
+            return run_analyze(args)
+        except KeyboardInterrupt:
+            return 130
+
+    source = source_from_args(argv)
+    duration = args.timeout if args.mode == "trigger" else args.duration
+    reader = ChunkReader(source, duration=duration, samples=getattr(args, "samples", None), verbose=args.verbose)
+    try:
+        return {"roll": run_roll, "normal": run_normal, "trigger": run_trigger}[args.mode](args, reader)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if hasattr(source, "close"):
+            source.close()
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,232 @@
+'''
+File: osc_fft_pyqt.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+A script for spectrum analyzer mode of all three channels.
+The latest FFT frame's samples are shown in a time view next to the magnitude spectrum.
+FFT frames are computed by a SpectrumWorker (see spectrum.py) at the full input rate, the display
+only picks up the newest results. Window function, FFT size, overlap, Welch averages, peak-hold
+and dB or linear scale can be changed while running.
+
+Usage: python osc_fft_pyqt.py plus the source and metrics options.
+'''
+
+import sys
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel,
+    QHBoxLayout, QPushButton, QComboBox, QSpinBox, QFormLayout, QCheckBox
+)
+from PySide6.QtCore import Qt
+import pyqtgraph as pg
+from acquisition import AcquisitionWorker
+from sources import SerialSource, source_from_args
+from metrics import metrics_from_args
+from stats_overlay import StatsOverlay
+from spectrum import Spectrum, SpectrumWorker, WINDOWS
+from render_scheduler import RenderScheduler, fast_curve
+
+FFT_SIZES = [256, 512, 1024, 2048, 4096, 8192, 16384]
+
+class UARTSpectrumPlotter(QWidget):
+    def __init__(self, port="COM8", baud=115200, source=None, metrics=None, worker=None):
+        super().__init__()
+        # Share another view's acquisition worker, or read the source here
+        if worker is None:
+            worker = AcquisitionWorker(source if source is not None else SerialSource(port, baud),
+                                       metrics=metrics)
+        self.worker = worker
+        self.metrics = worker.metrics
+        self.spectrum_worker = SpectrumWorker(worker, Spectrum(nfft=1024, overlap=0.5, window="Hann", averages=8))
+        self.subscription = self.spectrum_worker.subscription
+        self.is_running = False   # Start/Stop freezes the display, the FFT keeps running
+        self.shown_version = -1
+        self.failure_shown = False   # The status label already says why acquisition stopped
+
+        self.init_ui()
+        self.worker.start()
+        self.spectrum_worker.start()
+
+        # New spectra are looked for every 10 ms, drawing runs at the display frame rate
+        self.scheduler = RenderScheduler(self.check_results, self.update_plot, metrics=self.metrics)
+        self.scheduler.start()
+
+    def init_ui(self):
+        # Time view of the latest frame and the spectrum next to it
+        self.time_widget = pg.PlotWidget(title="Latest FFT Frame")
+        self.time_widget.setYRange(0, 4095, padding=0)
+        self.time_widget.showGrid(x=True, y=True)
+        self.time_widget.setLabel('bottom', 'Sample Number')
+        self.plot_widget = pg.PlotWidget(title="Spectrum")
+        self.plot_widget.showGrid(x=True, y=True)
+        self.plot_widget.setLabel('bottom', 'Frequency [Hz]')
+        self.plot_widget.setLabel('left', 'Magnitude [dBFS]')
+        self.time_curves = []
+        self.curves = []
+        self.peak_curves = []
+        for i, color in enumerate('rgb'):
+            self.time_curves.append(fast_curve(self.time_widget, pen=pg.mkPen(color, width=1)))
+            self.curves.append(fast_curve(self.plot_widget, pen=pg.mkPen(color, width=2), name=f'Channel {i + 1}'))
+            self.peak_curves.append(fast_curve(self.plot_widget, pen=pg.mkPen(color, width=1, style=Qt.DashLine)))
+        self.stats_overlay = StatsOverlay(self.plot_widget, self.metrics)
+
+        # Start/Stop Button
+        self.toggle_button = QPushButton("Start")
+        self.toggle_button.setCheckable(True)
+        self.toggle_button.setStyleSheet("background-color: green; color: white; font-weight: bold; font-size: 14px;")
+        self.toggle_button.toggled.connect(self.toggle_start_stop)
+
+        # FFT settings
+        spectrum = self.spectrum_worker.spectrum
+        self.window_selector = QComboBox()
+        self.window_selector.addItems(list(WINDOWS))
+        self.window_selector.setCurrentText(spectrum.window_name)
+        self.window_selector.currentTextChanged.connect(lambda name: self.spectrum_worker.configure(window=name))
+        self.size_selector = QComboBox()
+        self.size_selector.addItems([str(size) for size in FFT_SIZES])
+        self.size_selector.setCurrentText(str(spectrum.nfft))
+        self.size_selector.currentTextChanged.connect(lambda size: self.spectrum_worker.configure(nfft=int(size)))
+        self.overlap_box = QSpinBox()
+        self.overlap_box.setRange(0, 95)
+        self.overlap_box.setSuffix(" %")
+        self.overlap_box.setValue(int(spectrum.overlap * 100))
+        self.overlap_box.valueChanged.connect(lambda value: self.spectrum_worker.configure(overlap=value / 100))
+        self.averages_box = QSpinBox()
+        self.averages_box.setRange(1, 256)
+        self.averages_box.setValue(spectrum.averages)
+        self.averages_box.valueChanged.connect(lambda value: self.spectrum_worker.configure(averages=value))
+        self.scale_selector = QComboBox()
+        self.scale_selector.addItems(["dB", "Linear"])
+        self.scale_selector.currentTextChanged.connect(self.change_scale)
+        fft_form = QFormLayout()
+        fft_form.addRow("Window:", self.window_selector)
+        fft_form.addRow("FFT size:", self.size_selector)
+        fft_form.addRow("Overlap:", self.overlap_box)
+        fft_form.addRow("Averages:", self.averages_box)
+        fft_form.addRow("Scale:", self.scale_selector)
+
+        # Peak-hold trace, dashed
+        self.peak_check = QCheckBox("Peak hold")
+        self.peak_check.toggled.connect(self.toggle_peak_hold)
+        self.peak_reset_button = QPushButton("Reset peak")
+        self.peak_reset_button.clicked.connect(self.spectrum_worker.reset_peak)
+
+        # Checkboxes to show or hide each channel
+        self.channel_checks = []
+        for i, color in enumerate(("red", "green", "blue")):
+            chk = QCheckBox(f"Channel {i + 1}")
+            chk.setChecked(True)
+            chk.setStyleSheet(f"color: {color};")
+            chk.toggled.connect(self.redraw)
+            self.channel_checks.append(chk)
+
+        # Hot-path metrics over the plot
+        self.stats_check = QCheckBox("Stats")
+        self.stats_check.toggled.connect(self.stats_overlay.set_shown)
+
+        # Why acquisition stopped, shown only when the worker failed
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        self.status_label.setStyleSheet("color: red; font-weight: bold;")
+        self.status_label.hide()
+
+        # Left column: Start/Stop and settings
+        left_layout = QVBoxLayout()
+        left_layout.addWidget(self.toggle_button)
+        left_layout.addWidget(self.status_label)
+        left_layout.addWidget(self.stats_check)
+        for chk in self.channel_checks:
+            left_layout.addWidget(chk)
+        left_layout.addLayout(fft_form)
+        left_layout.addWidget(self.peak_check)
+        left_layout.addWidget(self.peak_reset_button)
+        left_layout.addStretch()
+
+        # Main layout
+        main_layout = QHBoxLayout()
+        main_layout.addLayout(left_layout)
+        main_layout.addWidget(self.time_widget, stretch=1)
+        main_layout.addWidget(self.plot_widget, stretch=2)
+        self.setLayout(main_layout)
+
+    def toggle_start_stop(self, checked):
+        self.is_running = checked
+        if checked:
+            self.toggle_button.setText("Stop")
+            self.toggle_button.setStyleSheet("background-color: red; color: white; font-weight: bold; font-size: 14px;")
+            self.redraw()
+        else:
+            self.toggle_button.setText("Start")
+            self.toggle_button.setStyleSheet("background-color: green; color: white; font-weight: bold; font-size: 14px;")
+
+    def toggle_peak_hold(self, checked):
+        # A fresh peak trace from the moment it is shown
+        if checked:
+            self.spectrum_worker.reset_peak()
+        self.redraw()
+
+    def change_scale(self, scale):
+        self.plot_widget.setLabel('left', 'Magnitude [dBFS]' if scale == "dB" else 'Magnitude [codes]')
+        self.redraw()
+
+    # Draw again on the next frame even without new spectra
+    def redraw(self, *_):
+        self.shown_version = -1
+        self.scheduler.mark_dirty()
+
+    # Mark the plot dirty when the spectrum worker has finished a new frame (ingest timer)
+    def check_results(self):
+        if self.is_running and self.spectrum_worker.version != self.shown_version:
+            self.scheduler.mark_dirty()
+        # The worker only stops on its own when the source or a consumer failed
+        if not self.failure_shown and self.worker.failure() is not None:
+            self.failure_shown = True
+            self.status_label.setText(self.worker.failure())
+            self.status_label.show()
+        self.stats_overlay.refresh_stats()
+
+    # Draw the newest spectra (display timer)
+    def update_plot(self):
+        version = self.spectrum_worker.version
+        if self.is_running and version != self.shown_version:
+            results = self.spectrum_worker.results(db=self.scale_selector.currentText() == "dB")
+            if results is not None:
+                start = self.metrics.start()
+                self.plot_results(*results)
+                self.metrics.stop("plot", start)
+                self.metrics.count("frames")
+                self.shown_version = version
+
+    # Draw the averaged and peak-hold spectra and the frame they end with
+    def plot_results(self, freqs, average, peak, frame):
+        show_peak = self.peak_check.isChecked()
+        for i in range(len(self.curves)):
+            if self.channel_checks[i].isChecked():
+                self.time_curves[i].setData(frame[i])
+                self.curves[i].setData(freqs, average[i])
+                if show_peak:
+                    self.peak_curves[i].setData(freqs, peak[i])
+                else:
+                    self.peak_curves[i].clear()
+            else:
+                self.time_curves[i].clear()
+                self.curves[i].clear()
+                self.peak_curves[i].clear()
+
+    def closeEvent(self, event):
+        self.spectrum_worker.stop()
+        super().closeEvent(event)
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = QMainWindow()
+    metrics, show_stats = metrics_from_args(sys.argv[1:])
+    plotter = UARTSpectrumPlotter(source=source_from_args(sys.argv[1:]), metrics=metrics)
+    plotter.stats_check.setChecked(show_stats)
+    window.setCentralWidget(plotter)
+    window.setWindowTitle("UART Spectrum Analyzer")
+    window.resize(1300, 600)
+    window.show()
+    app.aboutToQuit.connect(plotter.spectrum_worker.stop)
+    app.aboutToQuit.connect(plotter.worker.stop)
+    sys.exit(app.exec())
@@ -0,0 +1,62 @@
+'''
+File: osc_multi_pyqt.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Normal, roll, trigger and spectrum views of the same signal in one window.
+All views subscribe to a single acquisition worker, so the port is opened once and every sample
+is parsed once however many views are open. Each view keeps its own controls and buffers.
+
+Usage: python osc_multi_pyqt.py [--views roll normal trigger fft] plus the source and metrics options.
+'''
+
+import argparse
+import sys
+from PySide6.QtWidgets import QApplication, QMainWindow, QSplitter
+from PySide6.QtCore import Qt
+from acquisition import AcquisitionWorker
+from sources import source_from_args
+from metrics import metrics_from_args
+from osc_normal_pyqt import UARTBufferTriggerPlotter
+from osc_roll_pyqt import UARTMultiChannelPlotter
+from osc_trigger_pyqt import UARTTriggerPlotter
+from osc_fft_pyqt import UARTSpectrumPlotter
+
+VIEWS = {
+    "roll": UARTMultiChannelPlotter,
+    "normal": UARTBufferTriggerPlotter,
+    "trigger": UARTTriggerPlotter,
+    "fft": UARTSpectrumPlotter,
+}
+DEFAULT_VIEWS = ["roll", "normal", "trigger"]
+
+# Class for the window holding several views of one acquisition worker
+class MultiViewWindow(QMainWindow):
+    # Initialize with one view per name in views, all fed by worker
+    def __init__(self, worker, views=("roll", "normal", "trigger")):
+        super().__init__()
+        self.worker = worker
+        self.views = [VIEWS[name](worker=worker) for name in views]
+
+        splitter = QSplitter(Qt.Vertical)
+        for view in self.views:
+            splitter.addWidget(view)
+        self.setCentralWidget(splitter)
+        self.setWindowTitle("UART Oscilloscope: " + ", ".join(views))
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(add_help=False)
+    arg_parser.add_argument("--views", nargs="+", choices=list(VIEWS), default=DEFAULT_VIEWS)
+    args, _ = arg_parser.parse_known_args(sys.argv[1:])
+
+    app = QApplication(sys.argv)
+    metrics, show_stats = metrics_from_args(sys.argv[1:])
+    worker = AcquisitionWorker(source_from_args(sys.argv[1:]), metrics=metrics)
+    window = MultiViewWindow(worker, args.views)
+    window.views[0].stats_check.setChecked(show_stats)
+    window.resize(1200, 300 * len(window.views))
+    window.show()
+    app.aboutToQuit.connect(worker.stop)
+    app.aboutToQuit.connect(lambda: [view.finish_recording()
+                                     for view in window.views if hasattr(view, "finish_recording")])
+    sys.exit(app.exec())
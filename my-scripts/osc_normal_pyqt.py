@@ -4,42 +4,81 @@ Author: Surya Turaga
 Date: 25 July 2025
 
 A script for normal mode plotting of ADC values.
+Besides the latest traces it can show an intensity graded persistence image of every capture,
+or an eye diagram folded on the recovered period (see persistence.py). The traces can be averaged
+over sweeps or hi-res decimated (see averaging.py).
 '''
 
 import sys
-from collections import deque
-import serial
+import time
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout,
-    QHBoxLayout, QPushButton, QSlider, QLabel
+    QHBoxLayout, QPushButton, QSlider, QLabel, QComboBox, QSpinBox, QDoubleSpinBox, QFormLayout, QCheckBox
 )
-from PySide6.QtCore import QTimer, Qt
+from PySide6.QtCore import Qt, QRectF
 import pyqtgraph as pg
+from acquisition import AcquisitionWorker
+from sources import SerialSource, source_from_args
+from metrics import metrics_from_args
+from stats_overlay import StatsOverlay
+from measurement_panel import MeasurementPanel
+from trigger import EdgeTrigger, TriggeredCapture, TRIGGER_SOURCES
+from timeline import unwrap
+from persistence import Persistence, EyeDiagram
+from averaging import ACQUISITION_MODES, make_averager
+from render_scheduler import RenderScheduler, RangeCache, fast_curve
 
 class UARTBufferTriggerPlotter(QWidget):
-    def __init__(self, port="COM8", baud=115200):
+    def __init__(self, port="COM8", baud=115200, source=None, metrics=None, worker=None):
         super().__init__()
-        self.serial = serial.Serial(port, baud, timeout=0.05)
+        # Share another view's acquisition worker, or read the source here
+        if worker is None:
+            worker = AcquisitionWorker(source if source is not None else SerialSource(port, baud),
+                                       metrics=metrics)
+        self.worker = worker
+        # Hot-path timings and counters, collected only while shown or exported
+        self.metrics = worker.metrics
+        self.subscription = worker.subscribe()
         self.buffer_len = 512
         self.trigger_value = 2048  # Default trigger value
         self.is_running = False   # Start/Stop determines plotting/freeze
+        # Persistence histograms, filled with every capture while shown
+        self.display = "Traces"
+        self.histograms = {"Persistence": Persistence(), "Eye diagram": EyeDiagram()}
+        self.image_refresh = 0.05
+        self.last_image = 0.0
+        self.image_dirty = False
+        # Averaging or hi-res accumulator fed with every capture, None draws captures as they are
+        self.averager = None
+        self.pending_window = None   # Newest window to draw on the next frame
+        self.shown_window = None     # Window on screen, drawn again when a channel is shown
+        self.failure_shown = False   # The status label already says why acquisition stopped
 
-        # Buffers: timestamp and value
-        self.buffer_timestamps = deque(maxlen=self.buffer_len)
-        self.buffer_values = deque(maxlen=self.buffer_len)
+        # Repeating capture of all channels triggered on channel 1, the window starts at the trigger point
+        self.capture = TriggeredCapture(EdgeTrigger(self.trigger_value), length=self.buffer_len,
+                                        pre_trigger=0.0, source=1)
 
         self.init_ui()
+        self.worker.start()
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.read_serial_and_handle_trigger)
-        self.timer.start(10)
+        # Triggers are searched every 10 ms, the plot is only redrawn when there is something new
+        self.scheduler = RenderScheduler(self.read_serial_and_handle_trigger, self.render, metrics=self.metrics)
+        self.scheduler.start()
 
     def init_ui(self):
         # Plot setup
-        self.plot_widget = pg.PlotWidget(title="Plotter Ch1: ADC Values vs Time")
-        self.curve = self.plot_widget.plot(pen=pg.mkPen('g', width=2), name='Value')
+        self.plot_widget = pg.PlotWidget(title="Normal Mode: ADC Values vs Time")
+        self.curves = [fast_curve(self.plot_widget, pen=pg.mkPen(color, width=2), name=f'Channel {i + 1}')
+                       for i, color in enumerate('rgb')]
         self.plot_widget.setYRange(0, 4095, padding=0)
+        self.ranges = RangeCache(self.plot_widget)
         self.plot_widget.showGrid(x=True, y=True)
+        self.plot_widget.setLabel('bottom', 'Time [ms]')
+        self.persistence_image = pg.ImageItem()
+        self.persistence_image.setColorMap(pg.colormap.get('inferno'))
+        self.persistence_image.hide()
+        self.plot_widget.addItem(self.persistence_image)
+        self.stats_overlay = StatsOverlay(self.plot_widget, self.metrics)
 
         # Start/Stop Button
         self.toggle_button = QPushButton("Start")
@@ -47,6 +86,61 @@ class UARTBufferTriggerPlotter(QWidget):
         self.toggle_button.setStyleSheet("background-color: green; color: white; font-weight: bold; font-size: 14px;")
         self.toggle_button.toggled.connect(self.toggle_start_stop)
 
+        # Trigger settings: source channel, edge, hysteresis band, holdoff and trigger position in the window
+        self.source_selector = QComboBox()
+        self.source_selector.addItems(list(TRIGGER_SOURCES))
+        self.source_selector.currentTextChanged.connect(self.change_source)
+        self.edge_selector = QComboBox()
+        self.edge_selector.addItems(["Posedge", "Negedge"])
+        self.edge_selector.currentTextChanged.connect(self.change_edge)
+        self.hysteresis_box = QSpinBox()
+        self.hysteresis_box.setRange(0, 1000)
+        self.hysteresis_box.valueChanged.connect(self.change_hysteresis)
+        self.holdoff_box = QSpinBox()
+        self.holdoff_box.setRange(0, 1000000)
+        self.holdoff_box.setSuffix(" samples")
+        self.holdoff_box.valueChanged.connect(self.change_holdoff)
+        self.pre_trigger_box = QSpinBox()
+        self.pre_trigger_box.setRange(0, 100)
+        self.pre_trigger_box.setSuffix(" %")
+        self.pre_trigger_box.valueChanged.connect(self.change_pre_trigger)
+        trigger_form = QFormLayout()
+        trigger_form.addRow("Source:", self.source_selector)
+        trigger_form.addRow("Edge:", self.edge_selector)
+        trigger_form.addRow("Hysteresis:", self.hysteresis_box)
+        trigger_form.addRow("Holdoff:", self.holdoff_box)
+        trigger_form.addRow("Pre-trigger:", self.pre_trigger_box)
+
+        # Display: latest traces, persistence or eye diagram of one channel with decay per capture
+        self.display_selector = QComboBox()
+        self.display_selector.addItems(["Traces", *self.histograms])
+        self.display_selector.currentTextChanged.connect(self.change_display)
+        self.persistence_channel = QComboBox()
+        self.persistence_channel.addItems(["Channel 1", "Channel 2", "Channel 3"])
+        self.persistence_channel.currentTextChanged.connect(self.clear_persistence)
+        self.decay_box = QDoubleSpinBox()
+        self.decay_box.setRange(0.0, 50.0)
+        self.decay_box.setSingleStep(0.1)
+        self.decay_box.setSuffix(" %")
+        self.decay_box.valueChanged.connect(self.change_decay)
+        self.clear_button = QPushButton("Clear")
+        self.clear_button.clicked.connect(self.clear_persistence)
+        # Acquisition mode: averaging over sweeps or hi-res, count is sweeps, weight or samples per point
+        self.acquire_selector = QComboBox()
+        self.acquire_selector.addItems(list(ACQUISITION_MODES))
+        self.acquire_selector.currentTextChanged.connect(self.change_acquisition)
+        self.acquire_count_box = QSpinBox()
+        self.acquire_count_box.setRange(2, 1024)
+        self.acquire_count_box.setValue(16)
+        self.acquire_count_box.valueChanged.connect(self.change_acquisition)
+        display_form = QFormLayout()
+        display_form.addRow("Acquire:", self.acquire_selector)
+        display_form.addRow("Count:", self.acquire_count_box)
+        display_form.addRow("Display:", self.display_selector)
+        display_form.addRow("Channel:", self.persistence_channel)
+        display_form.addRow("Decay:", self.decay_box)
+        display_form.addRow(self.clear_button)
+
         # Buffer length slider + label
         self.buffer_slider_label = QLabel(f"Buffer length: {self.buffer_len}")
         self.buffer_slider = QSlider(Qt.Vertical)
@@ -66,9 +160,40 @@ class UARTBufferTriggerPlotter(QWidget):
         self.trigger_slider.setValue(self.trigger_value)
         self.trigger_slider.valueChanged.connect(self.change_trigger_value)
 
+        # Checkboxes to show or hide each channel
+        self.channel_checks = []
+        for i, color in enumerate(("red", "green", "blue")):
+            chk = QCheckBox(f"Channel {i + 1}")
+            chk.setChecked(True)
+            chk.setStyleSheet(f"color: {color};")
+            chk.toggled.connect(self.change_channels)
+            self.channel_checks.append(chk)
+
+        # Hot-path metrics over the plot
+        self.stats_check = QCheckBox("Stats")
+        self.stats_check.toggled.connect(self.stats_overlay.set_shown)
+
+        # Automatic measurements of every capture, next to the plot
+        self.measure_panel = MeasurementPanel()
+        self.measure_check = QCheckBox("Measure")
+        self.measure_check.toggled.connect(self.measure_panel.set_shown)
+
+        # Why acquisition stopped, shown only when the worker failed
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        self.status_label.setStyleSheet("color: red; font-weight: bold;")
+        self.status_label.hide()
+
         # Left column: Start/Stop, sliders and labels
         left_layout = QVBoxLayout()
         left_layout.addWidget(self.toggle_button)
+        left_layout.addWidget(self.status_label)
+        left_layout.addWidget(self.stats_check)
+        left_layout.addWidget(self.measure_check)
+        for chk in self.channel_checks:
+            left_layout.addWidget(chk)
+        left_layout.addLayout(trigger_form)
+        left_layout.addLayout(display_form)
         left_layout.addWidget(self.buffer_slider_label)
         left_layout.addWidget(self.buffer_slider)
         left_layout.addWidget(self.trigger_slider_label)
@@ -79,81 +204,219 @@ class UARTBufferTriggerPlotter(QWidget):
         main_layout = QHBoxLayout()
         main_layout.addLayout(left_layout)
         main_layout.addWidget(self.plot_widget, stretch=1)
+        main_layout.addWidget(self.measure_panel)
         self.setLayout(main_layout)
 
     def change_buffer_length(self, value):
         value = (value // 32) * 32
         self.buffer_len = value
         self.buffer_slider_label.setText(f"Buffer length: {value}")
-        self.buffer_timestamps = deque(maxlen=self.buffer_len)
-        self.buffer_values = deque(maxlen=self.buffer_len)
-        self.curve.clear()
-        self.plot_widget.setXRange(0, 1, padding=0.05)
+        self.capture.set_length(self.buffer_len)
+        if self.is_running:
+            self.capture.arm()
+        self.clear_curves()
+        self.clear_persistence()
+        self.reset_averager()
+        self.ranges.set_x(0, 1, padding=0.05)
 
     def change_trigger_value(self, value):
         self.trigger_value = value
+        self.capture.trigger.level = value
         self.trigger_slider_label.setText(f"Trigger: {value}")
 
+    def change_source(self, name):
+        self.capture.set_source(TRIGGER_SOURCES[name])
+
+    def change_edge(self, edge):
+        self.capture.trigger.rising = edge == "Posedge"
+
+    def change_hysteresis(self, value):
+        self.capture.trigger.hysteresis = value
+
+    def change_holdoff(self, value):
+        self.capture.trigger.holdoff = value
+
+    def change_pre_trigger(self, value):
+        self.capture.pre_trigger = value / 100
+        self.clear_persistence()
+        self.reset_averager()
+
+    def change_display(self, display):
+        self.display = display
+        traces = display == "Traces"
+        self.change_channels()
+        self.persistence_image.setVisible(not traces)
+        if traces:
+            self.plot_widget.setLabel('bottom', 'Time [ms]')
+        elif display == "Eye diagram":
+            self.plot_widget.setLabel('bottom', 'Unit intervals')
+        else:
+            self.plot_widget.setLabel('bottom', 'Samples from trigger')
+        self.clear_persistence()
+
+    # Show the checked channels' curves in traces mode, a curve shown again gets the window on screen
+    def change_channels(self, *_):
+        traces = self.display == "Traces"
+        for chk, curve in zip(self.channel_checks, self.curves):
+            curve.setVisible(traces and chk.isChecked())
+        if traces and self.pending_window is None and self.shown_window is not None:
+            self.pending_window = self.shown_window
+            self.scheduler.mark_dirty()
+
+    def change_acquisition(self, *_):
+        self.averager = make_averager(self.acquire_selector.currentText(), self.acquire_count_box.value())
+
+    def reset_averager(self):
+        if self.averager is not None:
+            self.averager.reset()
+
+    def change_decay(self, value):
+        for histogram in self.histograms.values():
+            histogram.decay = value / 100
+
+    # Start the persistence image over, one histogram column per pixel of the plot
+    def clear_persistence(self, *_):
+        columns = max(int(self.plot_widget.getViewBox().width()), 256)
+        for histogram in self.histograms.values():
+            histogram.set_columns(columns)
+        self.persistence_image.clear()
+        self.last_image = 0.0
+        self.image_dirty = False
+
     def toggle_start_stop(self, checked):
         if checked:
             self.is_running = True
             self.toggle_button.setText("Stop")
             self.toggle_button.setStyleSheet("background-color: red; color: white; font-weight: bold; font-size: 14px;")
-            self.clear_buffers()
-            self.curve.clear()
-            self.plot_widget.setXRange(0, 1, padding=0.05)
+            self.capture.arm()
+            self.reset_averager()
+            self.clear_curves()
+            self.ranges.set_x(0, 1, padding=0.05)
         else:
             self.is_running = False
             self.toggle_button.setText("Start")
             self.toggle_button.setStyleSheet("background-color: green; color: white; font-weight: bold; font-size: 14px;")
             # Freeze graph, keep collecting in buffers
+            self.capture.disarm()
 
-    def clear_buffers(self):
-        self.buffer_timestamps.clear()
-        self.buffer_values.clear()
-
+    # Ingest timer
     def read_serial_and_handle_trigger(self):
-        # Collect UART data, always appending to buffers
-        try:
-            while self.serial.in_waiting:
-                line = self.serial.readline().decode(errors="ignore").strip()
-                if not line:
-                    continue
-                parts = line.split()
-                if len(parts) < 4:
-                    continue
-                try:
-                    timestamp = float(parts[0])
-                    value = float(parts[1])
-                except ValueError:
-                    continue
-                self.buffer_timestamps.append(timestamp)
-                self.buffer_values.append(value)
-
-            # Trigger check operates only in Start (running) state, and only when buffer is full
-            if self.is_running and len(self.buffer_values) == self.buffer_len:
-                first_value = self.buffer_values[0]
-                second_value = self.buffer_values[1]
-                #if int(first_value) >= self.trigger_value - 100 and int(first_value) <= self.trigger_value + 100:
-                if (int(first_value) - self.trigger_value) * (int(second_value) - self.trigger_value) <= 0:
-                    # Trigger condition met, plot the data
-                    x = list(self.buffer_timestamps)
-                    y = list(self.buffer_values)
-                    self.curve.setData(x, y)
-                    if x:
-                        self.plot_widget.setXRange(min(x), max(x), padding=0.05)
-                    # After trigger event: clear buffers, freeze graph until next event
-                    self.clear_buffers()
-
-        except serial.SerialException:
-            pass
+        # Collect samples from the acquisition worker, always appending to buffers
+        metrics = self.metrics
+        # Triggers are only searched in Start (running) state, each capture is a full window
+        captures = []
+        chunks = self.subscription.drain()
+        if chunks:
+            start = metrics.start()
+            for chunk in chunks:
+                captures += self.capture.feed(chunk)
+            metrics.stop("trigger", start)
+            if self.is_running:
+                metrics.count("samples_shown", sum(len(chunk) for chunk in chunks))
+
+        # Every capture goes into the persistence image, which is drawn a few dozen times a second
+        if self.display != "Traces":
+            if captures:
+                start = metrics.start()
+                histogram = self.histograms[self.display]
+                channel = self.persistence_channel.currentIndex() + 1
+                for trigger_index, window in captures:
+                    histogram.add_window(window[channel], trigger_index)
+                metrics.stop("persist", start)
+                self.image_dirty = True
+                self.scheduler.mark_dirty()
+
+        # Only the newest capture is worth drawing, averaging takes all of them
+        elif captures:
+            if self.averager is None:
+                _, window = captures[-1]
+            else:
+                start = metrics.start()
+                for _, window in captures:
+                    window = self.averager.add(window)
+                metrics.stop("average", start)
+            self.pending_window = window
+            self.scheduler.mark_dirty()
+
+        # Every capture is measured, not only the one drawn
+        if captures:
+            start = metrics.start()
+            for _, window in captures:
+                self.measure_panel.add_capture(window)
+            metrics.stop("measure", start)
+        self.measure_panel.refresh_panel()
+
+        # The worker only stops on its own when the source or a consumer failed
+        if not self.failure_shown and self.worker.failure() is not None:
+            self.failure_shown = True
+            self.status_label.setText(self.worker.failure())
+            self.status_label.show()
+
+        self.stats_overlay.refresh_stats()
+
+    # Draw the newest capture or the persistence image (display timer)
+    def render(self):
+        if self.display != "Traces":
+            self.plot_persistence()
+            # An image held back by its refresh interval is drawn on a later frame
+            if self.image_dirty:
+                self.scheduler.mark_dirty()
+        elif self.pending_window is not None:
+            start = self.metrics.start()
+            self.plot_window(self.pending_window)
+            self.shown_window = self.pending_window
+            self.pending_window = None
+            self.metrics.stop("plot", start)
+            self.metrics.count("frames")
+
+    # Draw every shown channel of a (columns, length) capture window, hidden curves are left alone
+    def plot_window(self, window):
+        x = unwrap(window[0])
+        for i, curve in enumerate(self.curves):
+            if self.channel_checks[i].isChecked():
+                curve.setData(x, window[i + 1])
+        self.ranges.set_x(x[0], x[-1], padding=0.05)
+
+    # Draw the persistence image when due
+    def plot_persistence(self):
+        histogram = self.histograms[self.display]
+        if not self.image_dirty or time.monotonic() - self.last_image < self.image_refresh:
+            return
+        self.last_image = time.monotonic()
+        self.image_dirty = False
+        start = self.metrics.start()
+        # About one image row per pixel of plot height
+        rows = max(int(self.plot_widget.getViewBox().height()), 1)
+        code_step = 1
+        while code_step < 64 and histogram.codes // (code_step * 2) >= rows:
+            code_step *= 2
+        image = histogram.image(code_step)
+        self.persistence_image.setImage(image, levels=(0, max(float(image.max()), 1e-9)))
+        if self.display == "Eye diagram":
+            self.persistence_image.setRect(QRectF(0, 0, histogram.unit_intervals, histogram.codes))
+            self.ranges.set_x(0, histogram.unit_intervals, padding=0.02)
+        else:
+            pre = self.capture.pre_samples()
+            self.persistence_image.setRect(QRectF(-pre, 0, self.buffer_len, histogram.codes))
+            self.ranges.set_x(-pre, self.buffer_len - pre, padding=0.02)
+        self.metrics.stop("plot", start)
+        self.metrics.count("frames")
+
+    def clear_curves(self):
+        for curve in self.curves:
+            curve.clear()
+        self.pending_window = None
+        self.shown_window = None
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = QMainWindow()
-    plotter = UARTBufferTriggerPlotter()
+    metrics, show_stats = metrics_from_args(sys.argv[1:])
+    plotter = UARTBufferTriggerPlotter(source=source_from_args(sys.argv[1:]), metrics=metrics)
+    plotter.stats_check.setChecked(show_stats)
     window.setCentralWidget(plotter)
     window.setWindowTitle("UART Trigger Plotter")
     window.resize(1100, 600)
     window.show()
+    app.aboutToQuit.connect(plotter.worker.stop)
     sys.exit(app.exec())
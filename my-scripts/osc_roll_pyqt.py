@@ -1,49 +1,77 @@
 import sys
-from collections import deque
-import serial
+import time
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel,
-    QHBoxLayout, QPushButton, QSlider, QCheckBox
+    QHBoxLayout, QPushButton, QSlider, QCheckBox, QDoubleSpinBox
 )
-from PySide6.QtCore import QTimer, Qt
+from PySide6.QtCore import Qt
 import pyqtgraph as pg
+from acquisition import AcquisitionWorker
+from sources import SerialSource, source_from_args
+from metrics import metrics_from_args
+from stats_overlay import StatsOverlay
+from measurement_panel import MeasurementPanel
+from decimation import MinMaxPyramid
+from recorder import Recorder
+from timeline import Timeline, TimeIndex
+from render_scheduler import RenderScheduler, RangeCache, fast_curve
+
+# Newest samples handed to the measurements panel
+MEASURE_SAMPLES = 16384
 
 # Class for roll mode plotter
 class UARTMultiChannelPlotter(QWidget):
     # Initialize the UARTMultiChannelPlotter
-    def __init__(self, port="COM8", baud=115200):
+    def __init__(self, port="COM8", baud=115200, source=None, metrics=None, worker=None):
         super().__init__()
 
-        self.serial = serial.Serial(port, baud, timeout=0.05)
+        # Share another view's acquisition worker, or read the source here
+        if worker is None:
+            worker = AcquisitionWorker(source if source is not None else SerialSource(port, baud),
+                                       metrics=metrics)
+        self.worker = worker
+        # Hot-path timings and counters, collected only while shown or exported
+        self.metrics = worker.metrics
+        self.subscription = worker.subscribe()
+        # Buffer lengths are powers of two, the slider picks the exponent
         self.buffer_len = 1024
-        self.buffer_len_min = 32
-        self.buffer_len_max = 2048
-        self.buffer_len_step = 32
+        self.buffer_len_min = 2 ** 5
+        self.buffer_len_max = 2 ** 24
 
         self.trigger_threshold = 2048  # Not used directly here but can be extended
 
-        # Buffers for timestamp and 3 values
-        self.buffer_timestamps = deque(maxlen=self.buffer_len)
-        self.buffer_values1 = deque(maxlen=self.buffer_len)
-        self.buffer_values2 = deque(maxlen=self.buffer_len)
-        self.buffer_values3 = deque(maxlen=self.buffer_len)
+        # Deep sample history (timestamp and 3 values) with a min/max pyramid for drawing
+        self.buffer = MinMaxPyramid(self.buffer_len, columns=4)
+        # Unwrapped timestamps of the history, to find any time window by binary search
+        self.timeline = Timeline()
+        self.time_index = TimeIndex()
 
         self.is_running = False  # True when plotting, false when frozen
+        self.recorder = None     # Active capture-to-disk recorder, if any
+        self.saving = None       # Stopped recorder still writing its queue to disk
+        self.frozen_range = None # Sample range to draw next while frozen, after a zoom or pan
+        self.failure_shown = False  # The timeline label already says why acquisition stopped
 
         self.init_ui()
+        self.worker.start()
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.read_serial_and_update)
-        self.timer.start(10)
+        # Samples are taken in every 10 ms, the plot is only redrawn when they changed it
+        self.scheduler = RenderScheduler(self.read_serial_and_update, self.render, metrics=self.metrics)
+        self.scheduler.start()
 
     # Initialize the UI components
     def init_ui(self):
         self.plot_widget = pg.PlotWidget(title="Roll Mode: ADC Values vs Time")
-        self.curve1 = self.plot_widget.plot(pen=pg.mkPen('r', width=2), name='Channel 1')
-        self.curve2 = self.plot_widget.plot(pen=pg.mkPen('g', width=2), name='Channel 2')
-        self.curve3 = self.plot_widget.plot(pen=pg.mkPen('b', width=2), name='Channel 3')
+        self.curve1 = fast_curve(self.plot_widget, pen=pg.mkPen('r', width=2), name='Channel 1')
+        self.curve2 = fast_curve(self.plot_widget, pen=pg.mkPen('g', width=2), name='Channel 2')
+        self.curve3 = fast_curve(self.plot_widget, pen=pg.mkPen('b', width=2), name='Channel 3')
         self.plot_widget.setYRange(0, 4095, padding=0)
+        self.ranges = RangeCache(self.plot_widget)
         self.plot_widget.showGrid(x=True, y=True)
+        self.plot_widget.setLabel('bottom', 'Sample Number')
+        # Zooming or panning a frozen plot redraws it from the matching pyramid level
+        self.plot_widget.sigXRangeChanged.connect(self.view_range_changed)
+        self.stats_overlay = StatsOverlay(self.plot_widget, self.metrics)
 
         # Start/Stop button
         self.start_stop_button = QPushButton("Start")
@@ -51,16 +79,30 @@ class UARTMultiChannelPlotter(QWidget):
         self.start_stop_button.setStyleSheet("background-color: green; color: white; font-weight: bold;")
         self.start_stop_button.toggled.connect(self.toggle_start_stop)
 
+        # Record button: streams every sample to a capture file on disk
+        self.record_button = QPushButton("Record")
+        self.record_button.setCheckable(True)
+        self.record_button.toggled.connect(self.toggle_record)
+
         # Buffer length slider + label
-        self.buffer_slider_label = QLabel(f"Buffer length: {self.buffer_len}")
+        self.buffer_slider_label = QLabel(f"Buffer length: {self.buffer_len:,}")
         self.buffer_slider = QSlider(Qt.Vertical)
-        self.buffer_slider.setMinimum(self.buffer_len_min)
-        self.buffer_slider.setMaximum(self.buffer_len_max)
-        self.buffer_slider.setSingleStep(self.buffer_len_step)
-        self.buffer_slider.setPageStep(self.buffer_len_step)
-        self.buffer_slider.setValue(self.buffer_len)
+        self.buffer_slider.setMinimum(self.buffer_len_min.bit_length() - 1)
+        self.buffer_slider.setMaximum(self.buffer_len_max.bit_length() - 1)
+        self.buffer_slider.setSingleStep(1)
+        self.buffer_slider.setPageStep(1)
+        self.buffer_slider.setValue(self.buffer_len.bit_length() - 1)
         self.buffer_slider.valueChanged.connect(self.change_buffer_length)
 
+        # Timebase status and a jump to a time in the history (when stopped)
+        self.timeline_label = QLabel("Rate: -")
+        self.goto_box = QDoubleSpinBox()
+        self.goto_box.setRange(0, 1e7)
+        self.goto_box.setDecimals(3)
+        self.goto_box.setSuffix(" s")
+        self.goto_box.setPrefix("Go to ")
+        self.goto_box.editingFinished.connect(self.go_to_time)
+
         # Checkboxes to toggle curves
         self.chk_val1 = QCheckBox("Channel 1")
         self.chk_val2 = QCheckBox("Channel 2")
@@ -71,49 +113,60 @@ class UARTMultiChannelPlotter(QWidget):
         self.chk_val1.setStyleSheet("color: red;")
         self.chk_val2.setStyleSheet("color: green;")
         self.chk_val3.setStyleSheet("color: blue;")
+        # Hidden curves are not updated, showing one again redraws it
+        for check, curve in ((self.chk_val1, self.curve1), (self.chk_val2, self.curve2), (self.chk_val3, self.curve3)):
+            check.toggled.connect(curve.setVisible)
+            check.toggled.connect(self.redraw)
+
+        # Checkbox to show the hot-path metrics over the plot
+        self.stats_check = QCheckBox("Stats")
+        self.stats_check.toggled.connect(self.stats_overlay.set_shown)
+
+        # Automatic measurements of the newest samples, next to the plot
+        self.measure_panel = MeasurementPanel()
+        self.measure_check = QCheckBox("Measure")
+        self.measure_check.toggled.connect(self.measure_panel.set_shown)
 
         # Left layout: Start/Stop + buffer slider + checkboxes
         left_layout = QVBoxLayout()
         top_row = QHBoxLayout()
         top_row.addWidget(self.start_stop_button)
+        top_row.addWidget(self.record_button)
         top_row.addStretch()
         left_layout.addLayout(top_row)
         left_layout.addWidget(self.buffer_slider_label)
         left_layout.addWidget(self.buffer_slider)
+        left_layout.addWidget(self.timeline_label)
+        left_layout.addWidget(self.goto_box)
         left_layout.addWidget(self.chk_val1)
         left_layout.addWidget(self.chk_val2)
         left_layout.addWidget(self.chk_val3)
+        left_layout.addWidget(self.stats_check)
+        left_layout.addWidget(self.measure_check)
         left_layout.addStretch()
 
         # Main layout horizontal: left controls + plot on right
         main_layout = QHBoxLayout()
         main_layout.addLayout(left_layout)
         main_layout.addWidget(self.plot_widget, stretch=1)
+        main_layout.addWidget(self.measure_panel)
 
         self.setLayout(main_layout)
 
-    # Change the buffer length
+    # Change the buffer length, value is the power of two picked on the slider
     def change_buffer_length(self, value):
-        value = (value // self.buffer_len_step) * self.buffer_len_step
+        value = 2 ** value
         self.buffer_len = value
-        self.buffer_slider_label.setText(f"Buffer length: {value}")
-
-        keep_len = min(len(self.buffer_values1), value)
-        new_timestamps = deque(list(self.buffer_timestamps)[-keep_len:], maxlen=value)
-        new_values1 = deque(list(self.buffer_values1)[-keep_len:], maxlen=value)
-        new_values2 = deque(list(self.buffer_values2)[-keep_len:], maxlen=value)
-        new_values3 = deque(list(self.buffer_values3)[-keep_len:], maxlen=value)
-        self.buffer_timestamps = new_timestamps
-        self.buffer_values1 = new_values1
-        self.buffer_values2 = new_values2
-        self.buffer_values3 = new_values3
-
-        if self.buffer_timestamps:
-            self.plot_widget.setXRange(min(self.buffer_timestamps),
-                                        max(self.buffer_timestamps),
-                                        padding=0.05)
+        self.buffer_slider_label.setText(f"Buffer length: {value:,}")
+
+        # Keeps the newest samples, storage only grows when the new length needs it
+        self.buffer.set_length(value)
+
+        if len(self.buffer):
+            self.ranges.set_x(self.buffer.start(), self.buffer.total, padding=0.05)
         else:
-            self.plot_widget.setXRange(0, 1, padding=0.05)
+            self.ranges.set_x(0, 1, padding=0.05)
+        self.redraw()
 
     # Toggle start/stop button
     def toggle_start_stop(self, checked):
@@ -123,11 +176,9 @@ class UARTMultiChannelPlotter(QWidget):
             self.start_stop_button.setText("Stop")
             self.start_stop_button.setStyleSheet("background-color: red; color: white; font-weight: bold;")
             self.clear_buffers()
-            self.plot_widget.clear()
-            # recreate curves to assign to plot
-            self.curve1 = self.plot_widget.plot(pen=pg.mkPen('r', width=2), name='Channel 1')
-            self.curve2 = self.plot_widget.plot(pen=pg.mkPen('g', width=2), name='Channel 2')
-            self.curve3 = self.plot_widget.plot(pen=pg.mkPen('b', width=2), name='Channel 3')
+            # The curves are kept, only their data goes
+            for curve in (self.curve1, self.curve2, self.curve3):
+                curve.clear()
         else:
             # Stop pressed
             self.is_running = False
@@ -135,68 +186,147 @@ class UARTMultiChannelPlotter(QWidget):
             self.start_stop_button.setStyleSheet("background-color: green; color: white; font-weight: bold;")
             # Keep buffers collecting, but plot frozen (no plotting updates)
 
+    # Start or stop recording to a new capture file
+    def toggle_record(self, checked):
+        if checked:
+            path = time.strftime("capture_%Y%m%d_%H%M%S.osc")
+            # The rate estimated so far, or the source's nominal one, is kept in the file header
+            rate = self.timeline.sample_rate or getattr(self.worker.source, "sample_rate", None) or 0.0
+            self.recorder = Recorder(path, channels=3, sample_rate=rate)
+            self.recorder.start()
+            self.worker.recorder = self.recorder
+            self.record_button.setStyleSheet("background-color: red; color: white;")
+        else:
+            self.worker.recorder = None
+            # A slow disk finishes writing in the background, the button waits for it instead of the GUI
+            if self.recorder.stop(timeout=0.2):
+                self.record_button.setText("Record")
+            else:
+                self.saving = self.recorder
+                self.record_button.setEnabled(False)
+            self.recorder = None
+            self.record_button.setStyleSheet("")
+
+    # Stop recording and wait until everything queued is on disk, when quitting
+    def finish_recording(self):
+        self.record_button.setChecked(False)
+        if self.saving is not None:
+            self.saving.stop()
+
     # Clear all buffers
     def clear_buffers(self):
-        self.buffer_timestamps.clear()
-        self.buffer_values1.clear()
-        self.buffer_values2.clear()
-        self.buffer_values3.clear()
+        self.buffer.clear()
+        self.timeline.reset()
+        self.time_index = TimeIndex()
+
+    # Show the history from the time picked in the spin box, keeping the zoom (stopped only)
+    def go_to_time(self):
+        if self.is_running or len(self.time_index) == 0:
+            return
+        t0 = self.goto_box.value() * self.timeline.tick_rate
+        start, _ = self.time_index.find(t0, t0)
+        x_range = self.plot_widget.getViewBox().viewRange()[0]
+        self.ranges.set_x(start, start + (x_range[1] - x_range[0]), padding=0)
 
-    # Read serial data and update buffers
+    # Take samples from the acquisition worker and update buffers (ingest timer)
     def read_serial_and_update(self):
-        try:
-            while self.serial.in_waiting:
-                line = self.serial.readline().decode(errors="ignore").strip()
-                if not line:
-                    continue
-                parts = line.split()
-                if len(parts) < 4:
-                    continue
-                try:
-                    timestamp = float(parts[0])
-                    v1 = float(parts[1])
-                    v2 = float(parts[2])
-                    v3 = float(parts[3])
-                except ValueError:
-                    continue
-
-                self.buffer_timestamps.append(timestamp)
-                self.buffer_values1.append(v1)
-                self.buffer_values2.append(v2)
-                self.buffer_values3.append(v3)
-
-            if self.is_running and self.buffer_timestamps:
-                self.update_plot()
-
-        except serial.SerialException:
-            pass
-
-    # Update the plot with the current buffer data
-    def update_plot(self):
-        x = list(self.buffer_timestamps)
-        if self.chk_val1.isChecked():
-            self.curve1.setData(x, list(self.buffer_values1))
-        else:
-            self.curve1.clear()
-        if self.chk_val2.isChecked():
-            self.curve2.setData(x, list(self.buffer_values2))
-        else:
-            self.curve2.clear()
-        if self.chk_val3.isChecked():
-            self.curve3.setData(x, list(self.buffer_values3))
-        else:
-            self.curve3.clear()
+        metrics = self.metrics
+        chunks = self.subscription.drain()
+        if chunks:
+            start = metrics.start()
+            for chunk in chunks:
+                self.buffer.extend(chunk)
+                self.time_index.extend(self.timeline.feed(chunk[:, 0]))
+            self.time_index.discard_before(self.buffer.start())
+            metrics.stop("buffer", start)
+            self.update_timeline_label()
+            if self.is_running:
+                metrics.count("samples_shown", sum(len(chunk) for chunk in chunks))
+                self.scheduler.mark_dirty()
 
-        self.plot_widget.setYRange(0, 4095, padding=0)
-        if x:
-            self.plot_widget.setXRange(min(x), max(x), padding=0.05)
+        if self.recorder is not None:
+            if not self.recorder.sample_rate and self.timeline.sample_rate:
+                self.recorder.sample_rate = self.timeline.sample_rate
+            dropped = self.recorder.dropped_samples
+            self.record_button.setText(f"Recording ({self.recorder.count:,}"
+                                       + (f", {dropped:,} dropped)" if dropped else ")"))
+        elif self.saving is not None:
+            if self.saving.is_alive():
+                self.record_button.setText("Saving...")
+            else:
+                self.saving = None
+                self.record_button.setText("Record")
+                self.record_button.setEnabled(True)
+
+        # The worker only stops on its own when the source or a consumer failed
+        if not self.failure_shown and self.worker.failure() is not None:
+            self.failure_shown = True
+            self.timeline_label.setStyleSheet("color: red;")
+            self.update_timeline_label()
+
+        # Measure the newest samples only as often as the table is refreshed
+        if self.is_running and len(self.buffer) > 1 and self.measure_panel.due():
+            start = metrics.start()
+            first = max(self.buffer.start(), self.buffer.total - MEASURE_SAMPLES)
+            self.measure_panel.add_capture(self.buffer.raw.read(first, self.buffer.total))
+            metrics.stop("measure", start)
+        self.measure_panel.refresh_panel()
+        self.stats_overlay.refresh_stats()
+
+    # Show the estimated sample rate, gaps and timestamp resets
+    def update_timeline_label(self):
+        rate = self.timeline.sample_rate
+        self.timeline_label.setText(
+            f"Rate: {'-' if rate is None else f'{rate:,.1f} S/s'}\n"
+            f"Gaps: {sum(len(g) for g in self.timeline.gap_times)} ({self.timeline.missing:,} missing)\n"
+            f"Resets: {self.timeline.resets}"
+            + (f"\n{self.worker.failure()}" if self.failure_shown else ""))
+
+    # Redraw a frozen plot when the user zooms or pans, once per frame however many events come
+    def view_range_changed(self, _, x_range):
+        if not self.is_running and len(self.buffer):
+            self.frozen_range = x_range
+            self.scheduler.mark_dirty()
+
+    # Redraw on the next frame, e.g. after a curve is shown again
+    def redraw(self, *_):
+        if not self.is_running and len(self.buffer):
+            self.frozen_range = self.plot_widget.getViewBox().viewRange()[0]
+        self.scheduler.mark_dirty()
+
+    # Draw the newest samples while running, or the zoomed range of a frozen plot (display timer)
+    def render(self):
+        if not len(self.buffer):
+            return
+        start = self.metrics.start()
+        if self.is_running:
+            self.update_plot(self.buffer.start(), self.buffer.total)
+            self.ranges.set_x(self.buffer.start(), self.buffer.total, padding=0.05)
+        elif self.frozen_range is not None:
+            self.update_plot(*self.frozen_range)
+            self.frozen_range = None
+        self.metrics.stop("plot", start)
+        self.metrics.count("frames")
+
+    # Update the plot with samples [start, stop), about one min/max pair per pixel
+    def update_plot(self, start, stop):
+        pixels = max(int(self.plot_widget.getViewBox().width()), 100)
+        x, y = self.buffer.query(start, stop, pixels)
+        for check, curve, values in ((self.chk_val1, self.curve1, y[0]), (self.chk_val2, self.curve2, y[1]),
+                                     (self.chk_val3, self.curve3, y[2])):
+            if check.isChecked():
+                curve.setData(x, values)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = QMainWindow()
-    plotter = UARTMultiChannelPlotter()
+    metrics, show_stats = metrics_from_args(sys.argv[1:])
+    plotter = UARTMultiChannelPlotter(source=source_from_args(sys.argv[1:]), metrics=metrics)
+    plotter.stats_check.setChecked(show_stats)
     window.setCentralWidget(plotter)
     window.setWindowTitle("UART Multi-Channel Roll Plotter")
     window.resize(1200, 600)
     window.show()
+    app.aboutToQuit.connect(plotter.worker.stop)
+    app.aboutToQuit.connect(plotter.finish_recording)
     sys.exit(app.exec())
@@ -4,46 +4,83 @@ Author: Surya Turaga
 Date: 24 July 2025
 
 A script for single shot triggering and plotting of ADC values.
+With more than one segment it captures a sequence of triggers back to back into segmented memory
+(see segments.py) without drawing anything until it is done, then any segment can be stepped
+through or all of them overlaid. Captures can be averaged across arms and segments or hi-res
+decimated (see averaging.py), the result is drawn once the capture is done.
 '''
 
 import sys
-from collections import deque
-import serial
+import numpy as np
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel,
-    QHBoxLayout, QPushButton, QSlider, QComboBox
+    QHBoxLayout, QPushButton, QSlider, QComboBox, QSpinBox, QFormLayout, QCheckBox
 )
-from PySide6.QtCore import QTimer, Qt
+from PySide6.QtCore import Qt
 import pyqtgraph as pg
+from acquisition import AcquisitionWorker
+from sources import SerialSource, source_from_args
+from metrics import metrics_from_args
+from stats_overlay import StatsOverlay
+from measurement_panel import MeasurementPanel
+from trigger import EdgeTrigger, TRIGGER_SOURCES
+from segments import SegmentedCapture
+from averaging import ACQUISITION_MODES, make_averager
+from render_scheduler import RenderScheduler, RangeCache, fast_curve
+from timeline import unwrap
 
 # Class for trigger plotter
 class UARTTriggerPlotter(QWidget):
     # Initialize the UARTTriggerPlotter
-    def __init__(self, port="COM8", baud=115200):
+    def __init__(self, port="COM8", baud=115200, source=None, metrics=None, worker=None):
         super().__init__()
 
-        self.serial = serial.Serial(port, baud, timeout=0.05)
+        # Share another view's acquisition worker, or read the source here
+        if worker is None:
+            worker = AcquisitionWorker(source if source is not None else SerialSource(port, baud),
+                                       metrics=metrics)
+        self.worker = worker
+        # Hot-path timings and counters, collected only while shown or exported
+        self.metrics = worker.metrics
+        self.subscription = worker.subscribe()
         self.buffer_len = 1024
         self.trigger_threshold = 2048
 
-        self.buffer_timestamps = deque(maxlen=self.buffer_len)
-        self.buffer_values = deque(maxlen=self.buffer_len)
+        # Single shot capture on channel 1, its ring buffer rows are timestamp and the 3 channel values
+        # More segments capture that many triggers in a row before disarming
+        self.capture = SegmentedCapture(EdgeTrigger(self.trigger_threshold), length=self.buffer_len,
+                                        pre_trigger=0.5, source=1, segments=1)
+        self.buffer = self.capture.buffer
 
         self.is_armed = False
         self.show_live = False
+        # Averaging or hi-res accumulator fed with every capture, None draws captures as they are
+        self.averager = None
+        self.averaged = None    # (trigger index, window) of the accumulator's latest output
+        self.shown = None       # Draws the stopped view again when a channel is shown
+        self.failure_shown = False  # The indicator already says why acquisition stopped
 
         self.init_ui()
+        self.worker.start()
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.read_and_update)
-        self.timer.start(10)
+        # Triggers are searched every 10 ms, the live window is only redrawn when samples came in
+        self.scheduler = RenderScheduler(self.read_and_update, self.render, metrics=self.metrics)
+        self.scheduler.start()
 
     # Initialize the UI components
     def init_ui(self):
-        self.plot_widget = pg.PlotWidget(title="Trigger Ch1: ADC Values vs Time")
-        self.plot_curve = self.plot_widget.plot(pen=pg.mkPen('g', width=2))
+        self.plot_widget = pg.PlotWidget(title="Trigger Mode: ADC Values vs Time")
+        self.curves = [fast_curve(self.plot_widget, pen=pg.mkPen(color, width=2), name=f'Channel {i + 1}')
+                       for i, color in enumerate('rgb')]
         self.plot_widget.setYRange(0, 4095, padding=0)
+        self.ranges = RangeCache(self.plot_widget)
         self.plot_widget.showGrid(x=True, y=True)
+        self.plot_widget.setLabel('bottom', 'Time [ms]')
+        # Dashed marker at the trigger sample of the last capture
+        self.trigger_marker = pg.InfiniteLine(angle=90, pen=pg.mkPen('y', style=Qt.DashLine))
+        self.trigger_marker.hide()
+        self.plot_widget.addItem(self.trigger_marker)
+        self.stats_overlay = StatsOverlay(self.plot_widget, self.metrics)
 
         self.indicator_label = QLabel("Ready")
         self.indicator_label.setAlignment(Qt.AlignCenter)
@@ -60,11 +97,32 @@ class UARTTriggerPlotter(QWidget):
         self.edge_selector.addItems(["Posedge", "Negedge"])
         self.edge_selector.setToolTip("Select trigger edge")
         self.edge_selector.setFixedWidth(100)
+        self.edge_selector.currentTextChanged.connect(self.change_edge)
+
+        # Checkboxes to show or hide each channel
+        self.channel_checks = []
+        for i, color in enumerate(("red", "green", "blue")):
+            chk = QCheckBox(f"Channel {i + 1}")
+            chk.setChecked(True)
+            chk.setStyleSheet(f"color: {color};")
+            chk.toggled.connect(self.change_channels)
+            self.channel_checks.append(chk)
 
         # Layout for top-left row: arm button and edge selector side by side
         top_left_row = QHBoxLayout()
         top_left_row.addWidget(self.arm_button)
         top_left_row.addWidget(self.edge_selector)
+
+        # Hot-path metrics over the plot
+        self.stats_check = QCheckBox("Stats")
+        self.stats_check.toggled.connect(self.stats_overlay.set_shown)
+        top_left_row.addWidget(self.stats_check)
+
+        # Automatic measurements of every capture, next to the plot
+        self.measure_panel = MeasurementPanel()
+        self.measure_check = QCheckBox("Measure")
+        self.measure_check.toggled.connect(self.measure_panel.set_shown)
+        top_left_row.addWidget(self.measure_check)
         top_left_row.addStretch(1)  # push widgets to left
 
         # Buffer length slider and label
@@ -101,16 +159,81 @@ class UARTTriggerPlotter(QWidget):
         sliders_layout.addLayout(sliders_left_layout)
         sliders_layout.addLayout(sliders_right_layout)
 
-        # Left side total layout: top row (button+combobox) + sliders below
+        # Trigger settings: hysteresis band, holdoff and trigger position in the window
+        self.hysteresis_box = QSpinBox()
+        self.hysteresis_box.setRange(0, 1000)
+        self.hysteresis_box.setValue(self.capture.trigger.hysteresis)
+        self.hysteresis_box.valueChanged.connect(self.change_hysteresis)
+        self.holdoff_box = QSpinBox()
+        self.holdoff_box.setRange(0, 1000000)
+        self.holdoff_box.setSuffix(" samples")
+        self.holdoff_box.valueChanged.connect(self.change_holdoff)
+        self.pre_trigger_box = QSpinBox()
+        self.pre_trigger_box.setRange(0, 100)
+        self.pre_trigger_box.setSuffix(" %")
+        self.pre_trigger_box.setValue(int(self.capture.pre_trigger * 100))
+        self.pre_trigger_box.valueChanged.connect(self.change_pre_trigger)
+        # Trigger source: one channel or a crossing on any of them
+        self.source_selector = QComboBox()
+        self.source_selector.addItems(list(TRIGGER_SOURCES))
+        self.source_selector.currentTextChanged.connect(self.change_source)
+        trigger_form = QFormLayout()
+        trigger_form.addRow("Source:", self.source_selector)
+        trigger_form.addRow("Hysteresis:", self.hysteresis_box)
+        trigger_form.addRow("Holdoff:", self.holdoff_box)
+        trigger_form.addRow("Pre-trigger:", self.pre_trigger_box)
+        # Segmented memory: triggers captured per arm
+        self.segments_box = QSpinBox()
+        self.segments_box.setRange(1, 10000)
+        self.segments_box.valueChanged.connect(self.change_segments)
+        trigger_form.addRow("Segments:", self.segments_box)
+        # Acquisition mode: averaging over captures or hi-res, count is sweeps, weight or samples per point
+        self.acquire_selector = QComboBox()
+        self.acquire_selector.addItems(list(ACQUISITION_MODES))
+        self.acquire_selector.currentTextChanged.connect(self.change_acquisition)
+        self.acquire_count_box = QSpinBox()
+        self.acquire_count_box.setRange(2, 1024)
+        self.acquire_count_box.setValue(16)
+        self.acquire_count_box.valueChanged.connect(self.change_acquisition)
+        trigger_form.addRow("Acquire:", self.acquire_selector)
+        trigger_form.addRow("Count:", self.acquire_count_box)
+
+        # History browser for the segments of the last sequence
+        self.segment_box = QSpinBox()
+        self.segment_box.setPrefix("Segment ")
+        self.segment_box.valueChanged.connect(self.show_segment)
+        self.prev_button = QPushButton("<")
+        self.prev_button.setFixedWidth(30)
+        self.prev_button.clicked.connect(lambda: self.segment_box.stepBy(-1))
+        self.next_button = QPushButton(">")
+        self.next_button.setFixedWidth(30)
+        self.next_button.clicked.connect(lambda: self.segment_box.stepBy(1))
+        self.overlay_check = QCheckBox("Overlay all")
+        self.overlay_check.toggled.connect(self.show_segment)
+        self.segment_label = QLabel("")
+        browser_row = QHBoxLayout()
+        browser_row.addWidget(self.prev_button)
+        browser_row.addWidget(self.segment_box)
+        browser_row.addWidget(self.next_button)
+        browser_row.addWidget(self.overlay_check)
+        self.update_browser()
+
+        # Left side total layout: top row (button+combobox) + trigger settings + sliders below
         left_layout = QVBoxLayout()
         left_layout.addLayout(top_left_row)
+        left_layout.addLayout(trigger_form)
+        left_layout.addLayout(browser_row)
+        left_layout.addWidget(self.segment_label)
         left_layout.addLayout(sliders_layout)
+        for chk in self.channel_checks:
+            left_layout.addWidget(chk)
         left_layout.addStretch()
 
         # Main layout horizontally: left controls + plot to right
         main_layout = QHBoxLayout()
         main_layout.addLayout(left_layout)
         main_layout.addWidget(self.plot_widget, stretch=1)
+        main_layout.addWidget(self.measure_panel)
 
         # Overall vertical with indicator label on top
         overall_layout = QVBoxLayout()
@@ -125,116 +248,237 @@ class UARTTriggerPlotter(QWidget):
         self.buffer_len = value
         self.buffer_slider_label.setText(f"Buffer length: {value}")
 
-        keep_len = min(len(self.buffer_values), value)
-        new_timestamps = deque(list(self.buffer_timestamps)[-keep_len:], maxlen=value)
-        new_values = deque(list(self.buffer_values)[-keep_len:], maxlen=value)
-        self.buffer_timestamps = new_timestamps
-        self.buffer_values = new_values
+        # Keeps the newest samples without copying anything, the segments of the last sequence are dropped
+        self.capture.set_length(value)
+        self.update_browser()
+        self.reset_averager()
 
-        if self.buffer_timestamps:
-            self.plot_widget.setXRange(min(self.buffer_timestamps),
-                                       max(self.buffer_timestamps),
-                                       padding=0.05)
+        if len(self.buffer):
+            x = unwrap(self.buffer.view(0))
+            self.ranges.set_x(x[0], x[-1], padding=0.05)
         else:
-            self.plot_widget.setXRange(0, 1, padding=0.05)
+            self.ranges.set_x(0, 1, padding=0.05)
 
     # Change the trigger threshold for triggering
     def change_trigger_threshold(self, value):
         self.trigger_threshold = value
+        self.capture.trigger.level = value
         self.trigger_slider_label.setText(f"Trigger threshold: {value}")
 
+    # Change the channel (or channels) the trigger watches
+    def change_source(self, name):
+        self.capture.set_source(TRIGGER_SOURCES[name])
+
+    # Change the trigger edge
+    def change_edge(self, edge):
+        self.capture.trigger.rising = edge == "Posedge"
+
+    # Change the hysteresis band below (posedge) or above (negedge) the threshold
+    def change_hysteresis(self, value):
+        self.capture.trigger.hysteresis = value
+
+    # Change the minimum number of samples between two triggers
+    def change_holdoff(self, value):
+        self.capture.trigger.holdoff = value
+
+    # Change where the trigger sample sits in the captured window
+    def change_pre_trigger(self, value):
+        self.capture.pre_trigger = value / 100
+        self.reset_averager()
+
+    # Show the checked channels' curves, a curve shown again gets what is on screen
+    def change_channels(self, checked):
+        for chk, curve in zip(self.channel_checks, self.curves):
+            curve.setVisible(chk.isChecked())
+        if self.show_live:
+            self.scheduler.mark_dirty()
+        elif checked and self.shown is not None:
+            self.shown()
+
+    # Change the acquisition mode or its count, averaging starts over
+    def change_acquisition(self, *_):
+        self.averager = make_averager(self.acquire_selector.currentText(), self.acquire_count_box.value())
+        self.averaged = None
+
+    # Start averaging over
+    def reset_averager(self):
+        if self.averager is not None:
+            self.averager.reset()
+        self.averaged = None
+
     # Toggle arm/disarm state
     def toggle_arm_disarm(self, checked):
         if checked:
             self.is_armed = True
-            self.show_live = True
+            # Live drawing while waiting is skipped for segmented captures
+            self.show_live = self.capture.segments == 1
             self.arm_button.setText("Disarm")
             self.arm_button.setStyleSheet("background-color: red; color: white;")
             self.indicator_label.setText("Waiting")
             self.indicator_label.setStyleSheet("color: yellow; font-weight: bold; font-size: 16px;")
-            self.clear_buffer()
-            self.plot_curve.clear()
+            self.capture.arm()
+            self.update_browser()
+            for curve in self.curves:
+                curve.clear()
+            self.shown = None
+            self.trigger_marker.hide()
         else:
             self.is_armed = False
             self.show_live = False
+            self.capture.disarm()
             self.arm_button.setText("Arm")
             self.arm_button.setStyleSheet("background-color: green; color: white;")
             self.indicator_label.setText("Ready")
             self.indicator_label.setStyleSheet("color: green; font-weight: bold; font-size: 16px;")
+            # Segments captured before disarming can still be browsed
+            self.update_browser()
+            self.show_segment()
 
-    # Clear the buffer
-    def clear_buffer(self):
-        self.buffer_timestamps.clear()
-        self.buffer_values.clear()
-
-    # Read from serial and update the plot
+    # Take samples from the acquisition worker and search them for triggers (ingest timer)
     def read_and_update(self):
-        try:
-            while self.serial.in_waiting:
-                line = self.serial.readline().decode("utf-8", errors="ignore").strip()
-                if not line:
-                    continue
-                parts = line.split()
-                if len(parts) < 4:
-                    continue
-                try:
-                    timestamp = float(parts[0])
-                    value = float(parts[1])
-                except ValueError:
-                    continue
-
-                self.buffer_timestamps.append(timestamp)
-                self.buffer_values.append(value)
-
-                if self.is_armed and len(self.buffer_values) == self.buffer_len:
-                    mid_index = self.buffer_len // 2
-                    middle_value = self.buffer_values[mid_index]
-                    edge = self.edge_selector.currentText()
-                    triggered = False
-                    if edge == "Posedge":
-                        if middle_value > self.trigger_threshold:
-                            triggered = True
-                    else:  # Negedge
-                        if middle_value < self.trigger_threshold:
-                            triggered = True
-                    if triggered:
-                        self.is_armed = False
-                        self.show_live = False
-                        self.arm_button.setChecked(False)
-                        self.arm_button.setText("Arm")
-                        self.arm_button.setStyleSheet("background-color: green; color: white;")
-                        self.indicator_label.setText("Triggered")
-                        self.indicator_label.setStyleSheet("color: blue; font-weight: bold; font-size: 16px;")
-                        self.plot_full_buffer()
-                        break
-
-            if self.show_live and self.buffer_values and self.buffer_timestamps:
-                self.plot_live()
-        except serial.SerialException:
-            pass
+        metrics = self.metrics
+        chunks = self.subscription.drain()
+        start = metrics.start()
+        for chunk in chunks:
+            for trigger_index, k in self.capture.feed(chunk):
+                if self.measure_panel.isVisible() or self.averager is not None:
+                    window = self.capture.window(k)
+                    self.measure_panel.add_capture(window)
+                    if self.averager is not None:
+                        self.averaged = (self.averager.index(trigger_index), self.averager.add(window))
+        if chunks:
+            metrics.stop("trigger", start)
+
+        # Nothing is drawn until every segment is captured, disarming shows the capture
+        if self.is_armed and not self.capture.armed:
+            self.is_armed = False
+            self.show_live = False
+            self.arm_button.setChecked(False)
+            self.arm_button.setText("Arm")
+            self.arm_button.setStyleSheet("background-color: green; color: white;")
+            self.indicator_label.setText("Triggered" if self.capture.segments == 1
+                                         else f"Captured {self.capture.count} segments")
+            self.indicator_label.setStyleSheet("color: blue; font-weight: bold; font-size: 16px;")
+            if self.averaged is not None:
+                self.plot_averaged()
+            metrics.count("frames")
+        elif self.is_armed and self.capture.segments > 1:
+            self.indicator_label.setText(f"Capturing {self.capture.count}/{self.capture.segments}")
+
+        if self.show_live and chunks:
+            metrics.count("samples_shown", sum(len(chunk) for chunk in chunks))
+            self.scheduler.mark_dirty()
+
+        # The worker only stops on its own when the source or a consumer failed
+        if not self.failure_shown and self.worker.failure() is not None:
+            self.failure_shown = True
+            self.indicator_label.setText(self.worker.failure())
+            self.indicator_label.setStyleSheet("color: red; font-weight: bold; font-size: 16px;")
+
+        self.measure_panel.refresh_panel()
+        self.stats_overlay.refresh_stats()
     
+    # Draw the live window while waiting for a trigger (display timer)
+    def render(self):
+        if self.show_live and len(self.buffer):
+            start = self.metrics.start()
+            self.plot_live()
+            self.metrics.stop("plot", start)
+            self.metrics.count("frames")
+
     # Plot the live data
     def plot_live(self):
-        x_data = list(self.buffer_timestamps)
-        y_data = list(self.buffer_values)
-        self.plot_curve.setData(x_data, y_data)
-        if x_data:
-            self.plot_widget.setXRange(min(x_data), max(x_data), padding=0.05)
-
-    # Plot the full buffer when triggered
-    def plot_full_buffer(self):
-        x_data = list(self.buffer_timestamps)
-        y_data = list(self.buffer_values)
-        self.plot_curve.setData(x_data, y_data)
-        if x_data:
-            self.plot_widget.setXRange(min(x_data), max(x_data), padding=0.05)
+        self.plot_window(self.buffer.view())
+
+    # Change the number of segments captured per arm
+    def change_segments(self, value):
+        self.capture.set_segments(value)
+        # Live drawing while waiting only makes sense for a single shot
+        self.show_live = self.is_armed and value == 1
+        self.update_browser()
+
+    # Enable the history browser for the captured segments
+    def update_browser(self):
+        count = self.capture.count
+        for widget in (self.segment_box, self.prev_button, self.next_button, self.overlay_check):
+            widget.setEnabled(count > 1)
+        self.segment_box.blockSignals(True)
+        self.segment_box.setRange(1, max(count, 1))
+        self.segment_box.blockSignals(False)
+        self.segment_label.setText("")
+
+    # Show the chosen segment of the last sequence, or all of them overlaid on their trigger points
+    def show_segment(self, *_):
+        count = self.capture.count
+        if count == 0 or self.is_armed:
+            return
+        self.shown = self.show_segment
+        if self.overlay_check.isChecked() and count > 1:
+            self.plot_overlay()
+            self.segment_label.setText(f"{count} segments over "
+                                       f"{self.capture.trigger_time[count - 1] - self.capture.trigger_time[0]:,} ms")
+            return
+        k = self.segment_box.value() - 1
+        x = self.plot_window(self.capture.window(k), self.capture.segment_times(k))
+        self.trigger_marker.setValue(x[self.capture.trigger_index[k]])
+        self.trigger_marker.show()
+        if k > 0:
+            self.segment_label.setText(f"Trigger at {self.capture.trigger_time[k]:,} ms, "
+                                       f"{self.capture.trigger_time[k] - self.capture.trigger_time[k - 1]:,} ms after the last")
+        else:
+            self.segment_label.setText(f"Trigger at {self.capture.trigger_time[k]:,} ms")
+
+    # Draw the accumulator's output over every capture so far, the browser still shows raw segments
+    def plot_averaged(self):
+        trigger_index, window = self.averaged
+        self.shown = self.plot_averaged
+        x = self.plot_window(window)
+        self.trigger_marker.setValue(x[min(trigger_index, len(x) - 1)])
+        self.trigger_marker.show()
+        mode = self.acquire_selector.currentText()
+        if mode == "Hi-res":
+            self.segment_label.setText(f"Hi-res, {self.averager.factor} samples per point "
+                                       f"(+{self.averager.extra_bits:.1f} bits)")
+        else:
+            self.segment_label.setText(f"{mode} of {self.averager.count} captures")
+
+    # Draw every captured segment on top of each other, times relative to each trigger
+    def plot_overlay(self):
+        count = self.capture.count
+        length = self.capture.length
+        # One curve per channel, segments separated by a NaN so they are not joined up
+        x = np.full((count, length + 1), np.nan)
+        for k in range(count):
+            x[k, :length] = self.capture.segment_times(k) - self.capture.trigger_time[k]
+        y = np.full((count, length + 1), np.nan)
+        for i, curve in enumerate(self.curves):
+            if self.channel_checks[i].isChecked():
+                y[:, :length] = self.capture.data[:count, :, i]
+                curve.setData(x.ravel(), y.ravel(), connect="finite", skipFiniteCheck=False)
+        self.trigger_marker.setValue(0)
+        self.trigger_marker.show()
+        self.ranges.set_x(np.nanmin(x), np.nanmax(x), padding=0.05)
+
+    # Draw every shown channel of a (columns, length) window, all from the same timestamps
+    # Timestamps are unwrapped so a window across a wrap or a button reset doesn't fold back
+    def plot_window(self, window, x=None):
+        if x is None:
+            x = unwrap(window[0])
+        for i, curve in enumerate(self.curves):
+            if self.channel_checks[i].isChecked():
+                curve.setData(x, window[i + 1], connect="all", skipFiniteCheck=True)
+        self.ranges.set_x(x[0], x[-1], padding=0.05)
+        return x
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = QMainWindow()
-    plotter = UARTTriggerPlotter()
+    metrics, show_stats = metrics_from_args(sys.argv[1:])
+    plotter = UARTTriggerPlotter(source=source_from_args(sys.argv[1:]), metrics=metrics)
+    plotter.stats_check.setChecked(show_stats)
     window.setCentralWidget(plotter)
     window.setWindowTitle("UART Trigger Plotter")
     window.resize(1200, 600)
     window.show()
+    app.aboutToQuit.connect(plotter.worker.stop)
     sys.exit(app.exec())
@@ -0,0 +1,129 @@
+'''
+File: persistence.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Intensity graded persistence for triggered waveforms.
+Every waveform is accumulated into a screen columns x 4096 ADC codes histogram. Neighbouring
+samples are joined by lines that add the codes they pass through in every column they cross, so
+steep edges and sparse samples are drawn solid. The code ranges go into a difference histogram
+(+weight at the low code, -weight past the high code) with np.add.at, and the image is its
+cumulative sum along the codes, taken only when it is displayed. Decay is applied by growing the
+weight of every new waveform instead of scaling the histogram down, so adding a waveform costs
+the same however many came before it.
+EyeDiagram folds each waveform on a recovered period around its trigger point instead.
+'''
+
+import numpy as np
+from measurements import channel_timing
+
+CODES = 4096
+RENORMALIZE = 1e12    # Weight at which the histogram is scaled back down
+
+# Class for the persistence histogram of one channel
+class Persistence:
+    # Initialize empty, decay is the fraction of intensity lost per waveform added
+    def __init__(self, columns=512, codes=CODES, decay=0.0):
+        self.columns = columns
+        self.codes = codes
+        self.decay = decay
+        self.diff = np.zeros((columns, codes), dtype=np.float32)
+        self.reset()
+
+    # Forget every waveform
+    def reset(self):
+        self.diff[:] = 0
+        self.weight = 1.0
+        self.waveforms = 0
+
+    # Change the number of columns, which starts over
+    def set_columns(self, columns):
+        if columns != self.columns:
+            self.columns = columns
+            self.diff = np.zeros((columns, self.codes), dtype=np.float32)
+        self.reset()
+
+    # Add a trace of sample values at fractional column positions, pairs for which joined is
+    # False (e.g. where a fold starts over) are not connected
+    def add_trace(self, positions, values, joined=None):
+        if len(values) == 0:
+            return
+        if self.decay > 0:
+            self.weight /= 1.0 - self.decay
+            if self.weight > RENORMALIZE:
+                self.diff /= self.weight
+                self.weight = 1.0
+        x0 = np.clip(np.asarray(positions, dtype=np.float64), 0, self.columns - 1e-9)
+        y0 = np.clip(np.asarray(values, dtype=np.float64), 0, self.codes - 1)
+        # Each sample is joined by a line to the next one, the last and unjoined ones are points
+        x1 = np.append(x0[1:], x0[-1])
+        y1 = np.append(y0[1:], y0[-1])
+        if joined is not None:
+            keep = np.append(joined, False) | (np.arange(len(x0)) == len(x0) - 1)
+            x1 = np.where(keep, x1, x0)
+            y1 = np.where(keep, y1, y0)
+
+        # Split every line into the columns it crosses
+        c0 = x0.astype(np.int64)
+        counts = x1.astype(np.int64) - c0 + 1
+        line = np.repeat(np.arange(len(x0)), counts)
+        cols = c0[line] + np.arange(len(line)) - np.repeat(np.cumsum(counts) - counts, counts)
+        # Code range of each line within each of its columns
+        dx = x1 - x0
+        slope = np.divide(y1 - y0, dx, out=np.zeros_like(dx), where=dx > 0)
+        xa = np.maximum(cols, x0[line])
+        xb = np.minimum(cols + 1, x1[line])
+        ya = y0[line] + (xa - x0[line]) * slope[line]
+        yb = np.where(dx[line] > 0, y0[line] + (xb - x0[line]) * slope[line], y1[line])
+        low = np.rint(np.minimum(ya, yb)).astype(np.int64)
+        high = np.rint(np.maximum(ya, yb)).astype(np.int64)
+        np.add.at(self.diff, (cols, low), self.weight)
+        below_top = high + 1 < self.codes
+        np.add.at(self.diff, (cols[below_top], high[below_top] + 1), -self.weight)
+        self.waveforms += 1
+
+    # Add a (length,) window, spread evenly over the columns
+    def add_window(self, values, trigger_index=0):
+        self.add_trace(np.arange(len(values)) * (self.columns / len(values)), values)
+
+    # (columns, codes / code_step) intensities, 1.0 is one fresh waveform through a bin, code_step
+    # codes (a power of two) are summed into each row to match the screen
+    def image(self, code_step=1):
+        if code_step == 1:
+            image = np.cumsum(self.diff, axis=1)
+        else:
+            # The sum of the running sum over a block is code_step times the running sum before the
+            # block plus the block's differences weighted by how many of its codes they reach,
+            # both from one matrix product instead of a cumulative sum over every code
+            weights = np.stack((np.ones(code_step), code_step - np.arange(code_step)), axis=1)
+            blocks = (self.diff.reshape(-1, code_step) @ weights.astype(np.float32)).reshape(self.columns, -1, 2)
+            before = np.cumsum(blocks[:, :, 0], axis=1) - blocks[:, :, 0]
+            image = code_step * before + blocks[:, :, 1]
+        image *= 1.0 / self.weight
+        return image
+
+# Class for an eye diagram, waveforms folded on a recovered period
+class EyeDiagram(Persistence):
+    # Initialize empty, the image spans unit_intervals periods with the trigger half a period in
+    def __init__(self, columns=512, codes=CODES, decay=0.0, unit_intervals=2, smoothing=0.1):
+        self.unit_intervals = unit_intervals
+        self.smoothing = smoothing
+        super().__init__(columns, codes, decay)
+
+    # Forget every waveform and the recovered period
+    def reset(self):
+        super().reset()
+        self.period = None    # Recovered period in samples
+
+    # Fold a (length,) window on the period recovered so far, trigger_index is its trigger sample
+    def add_window(self, values, trigger_index=0):
+        values = np.asarray(values)
+        period = channel_timing(values.astype(np.float64), float(values.min()), float(values.max()))[0]
+        if np.isfinite(period):
+            self.period = period if self.period is None else self.period + self.smoothing * (period - self.period)
+        if self.period is None:
+            return
+        phase = ((np.arange(len(values)) - trigger_index) / self.period + 0.5) % self.unit_intervals
+        positions = phase * (self.columns / self.unit_intervals)
+        # Don't join the last sample of one fold to the first of the next
+        self.add_trace(positions, values, joined=np.diff(positions) >= 0)
@@ -1,61 +1,100 @@
 '''
-File: logger_plt.py
+File: plotter_plt.py
 Author: Surya Turaga
 Date: 22 July 2025
 
 A more robust script to plot data from a UART serial port as oscilloscope data with a given trigger.
-Capable of handling higher frequencies due to larger buffer size.
+Samples are collected into batches of MAX_BUFFER_SIZE and the newest complete batch is shown.
+Every frame parses everything the port has received in one go, and only the trace is redrawn:
+FuncAnimation blits the persistent Line2D over axes that are drawn once.
+--png DIR renders every batch offscreen with Agg instead of opening a window.
+
+Usage: python plotter_plt.py [--png DIR] [--captures 100]
+       plus the source options (--port, --replay FILE, --synthetic, --rate, --speed, ...).
 '''
 
-import serial
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+import argparse
+import sys
+import numpy as np
+from sources import source_from_args
+from sample_parser import ValueParser, codes_to_volts
+from plt_render import render_pngs
 
 MAX_BUFFER_SIZE = 128  # Maximum buffer size for plotting
 
-# Initialize serial port
-ser = serial.Serial('COM8', 115200, timeout=1)
-
-buffer = []
-
-def read_serial_value():
-    """
-    Read one line from serial, decode, convert to float.
-    Returns float value or None if invalid.
-    """
-    try:
-        line = ser.readline().decode('utf-8').strip()
-        return float(line)
-    except (UnicodeDecodeError, ValueError):
-        return None
-
-def update(frame):
-    global buffer
-
-    # Keep reading values until buffer is filled
-    while len(buffer) < MAX_BUFFER_SIZE:
-        value = read_serial_value()
-        if value is not None:
-            buffer.append(value)
-        else:
-            # No valid data, break to allow animation to update plot
-            break
-
-    if len(buffer) == MAX_BUFFER_SIZE:
-        ax.clear()
-        ax.plot(buffer)
+# Class for the batch plot
+class BatchPlot:
+    # Set the axes up once and create the persistent trace
+    def __init__(self, ax, source, size=MAX_BUFFER_SIZE):
+        self.source = source
+        self.size = size
+        self.partial = np.empty(size, dtype=np.float32)   # Start of the next batch
+        self.fill = 0
+        self.batches_skipped = 0    # Complete batches replaced by a newer one before being drawn
+        self.x = np.arange(size)
         ax.set_title("Oscilloscope Normal Mode")
         ax.set_xlabel("Sample Number")
         ax.set_ylabel("Voltage [V]")
+        ax.set_xlim(0, size - 1)
         ax.set_ylim(-0.1, 3.5)  # Assuming a 3.3V system
         ax.grid(True)
+        self.line, = ax.plot([], [], animated=True)
+
+    # Empty trace for the first blit
+    def init(self):
+        self.line.set_data([], [])
+        return (self.line,)
+
+    # Add values, returns the batches they complete as a (batches, size) array
+    def feed(self, values):
+        values = codes_to_volts(values)
+        if self.fill:
+            values = np.concatenate((self.partial[:self.fill], values))
+        complete = len(values) // self.size
+        rest = values[complete * self.size:]
+        self.partial[:len(rest)] = rest
+        self.fill = len(rest)
+        return values[:complete * self.size].reshape(complete, self.size)
 
-        # Clear buffer after plotting for next batch
-        buffer = []
+    # Read everything pending and show the newest complete batch
+    def update(self, frame):
+        batches = self.feed(self.source.read())
+        if len(batches):
+            self.batches_skipped += len(batches) - 1
+            self.line.set_data(self.x, batches[-1])
+        return (self.line,)
 
+    # Artists of every batch in turn for offscreen rendering, stops early at the end of a replay
+    def captures(self, count):
+        drawn = 0
+        while drawn < count:
+            batches = self.feed(self.source.read())
+            for batch in batches[:count - drawn]:
+                self.line.set_data(self.x, batch)
+                drawn += 1
+                yield (self.line,)
+            if len(batches) == 0 and getattr(self.source, "finished", False):
+                return
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(add_help=False)
+    arg_parser.add_argument("--png", metavar="DIR")
+    arg_parser.add_argument("--captures", type=int, default=100)
+    args, _ = arg_parser.parse_known_args(sys.argv[1:])
+
+    import matplotlib
+    if args.png:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+
+    source = source_from_args(sys.argv[1:], parser=ValueParser())
     fig, ax = plt.subplots()
-    ani = FuncAnimation(fig, update, interval=1)
-    plt.show()
-    ser.close()
\ No newline at end of file
+    plot = BatchPlot(ax, source)
+    if args.png:
+        print(f"Wrote {render_pngs(fig, plot.captures(args.captures), args.png)} captures to {args.png}")
+    else:
+        ani = FuncAnimation(fig, plot.update, init_func=plot.init, interval=10, blit=True,
+                            cache_frame_data=False)
+        plt.show()
+    source.close()
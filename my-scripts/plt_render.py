@@ -0,0 +1,52 @@
+'''
+File: plt_render.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Blitting helpers for the matplotlib scripts, the fallback display on machines without Qt.
+The axes, labels and grid are drawn once into a saved background. Each frame restores that
+background and draws only the animated artists over it, the way FuncAnimation does with
+blit=True. The same path renders captures offscreen with Agg: the canvas pixels are written
+straight to PNG without the figure being drawn again for every file.
+'''
+
+import os
+import numpy as np
+import matplotlib.image
+
+# Class that redraws a figure's animated artists over a saved background
+class Blitter:
+    # Initialize for a figure whose changing artists were created with animated=True
+    def __init__(self, fig):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.background = None
+
+    # Draw everything except the animated artists once and keep the pixels
+    def capture(self):
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    # Restore the background and draw only the given artists
+    def draw(self, artists):
+        if self.background is None:
+            self.capture()
+        self.canvas.restore_region(self.background)
+        for artist in artists:
+            self.fig.draw_artist(artist)
+        self.canvas.blit(self.fig.bbox)
+
+    # Write the current pixels of an Agg canvas to a PNG file
+    def save_png(self, path):
+        matplotlib.image.imsave(path, np.asarray(self.canvas.buffer_rgba()))
+
+# Render every frame of artists to directory/frame_NNNNN.png with Agg, returns the number written
+def render_pngs(fig, frames, directory):
+    os.makedirs(directory, exist_ok=True)
+    blitter = Blitter(fig)
+    count = 0
+    for artists in frames:
+        blitter.draw(artists)
+        blitter.save_png(os.path.join(directory, f"frame_{count:05d}.png"))
+        count += 1
+    return count
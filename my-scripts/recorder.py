@@ -0,0 +1,245 @@
+'''
+File: recorder.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Streaming capture-to-disk recorder and reader for long logging sessions.
+Every decoded sample (timestamp + all channels) is appended to a preallocated, growable
+memory-mapped file. Writes are batched on a background thread, so neither the GUI nor the
+acquisition worker waits on the disk. The hand-off queue is bounded: when the disk cannot keep up
+the oldest queued chunks are dropped and counted instead of memory growing for as long as the
+capture runs. Recording reads the file back as zero-copy NumPy views, and unwraps timestamps
+only for the slices asked for, from the timeline state it keeps at the start of every block.
+
+File layout: a 64 byte header followed by (N, 1 + channels) little endian uint16 rows.
+'''
+
+import copy
+import os
+import queue
+import struct
+import threading
+import time
+import numpy as np
+from timeline import Timeline
+
+MAGIC = b"OSCREC1\0"
+HEADER_FORMAT = "<8sHHdd Q"   # magic, version, channels, sample rate, start time, sample count
+HEADER_LEN = 64
+VERSION = 1
+
+# Write the file header, count is the number of valid sample rows
+def write_header(f, channels, sample_rate, start_time, count):
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, channels, sample_rate, start_time, count)
+    f.seek(0)
+    f.write(header.ljust(HEADER_LEN, b"\0"))
+
+# Read the file header, returns (channels, sample rate, start time, count)
+def read_header(f):
+    f.seek(0)
+    magic, version, channels, sample_rate, start_time, count = struct.unpack(
+        HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not an oscilloscope recording")
+    return channels, sample_rate, start_time, count
+
+# Class for the background disk writer
+class Recorder(threading.Thread):
+    # Create the file with room for capacity samples, sample_rate 0 means unknown and can be set
+    # later (it is written with every flush), queue_len chunks wait for the disk at most
+    def __init__(self, path, channels=3, sample_rate=0.0, capacity=1 << 20, flush_interval=1.0,
+                 queue_len=1024):
+        super().__init__(daemon=True)
+        self.path = path
+        self.channels = channels
+        self.columns = channels + 1
+        self.sample_rate = sample_rate
+        self.start_time = time.time()
+        self.flush_interval = flush_interval
+        self.count = 0
+        self.queue = queue.Queue(maxsize=queue_len)
+        self.dropped_samples = 0   # Samples thrown away because the disk fell behind
+        self.dropped_chunks = 0
+        self._stop_event = threading.Event()
+
+        self.file = open(path, "w+b")
+        write_header(self.file, channels, sample_rate, self.start_time, 0)
+        self.capacity = 0
+        self.map = None
+        self.grow(capacity)
+
+    # Queue an (N, 1 + channels) chunk for writing, dropping the oldest queued one when the disk
+    # is not keeping up, safe to call from any thread
+    def write(self, chunk):
+        if not len(chunk):
+            return
+        while True:
+            try:
+                self.queue.put_nowait(chunk)
+                return
+            except queue.Full:
+                try:
+                    dropped = len(self.queue.get_nowait())
+                except queue.Empty:
+                    continue
+                self.dropped_samples += dropped
+                self.dropped_chunks += 1
+
+    # Resize the file and map it again with room for capacity samples
+    def grow(self, capacity):
+        if self.map is not None:
+            self.map.flush()
+            del self.map
+        self.file.truncate(HEADER_LEN + capacity * self.columns * 2)
+        self.capacity = capacity
+        self.map = np.memmap(self.file, dtype="<u2", mode="r+", offset=HEADER_LEN,
+                             shape=(capacity, self.columns))
+
+    # Write queued chunks in large batches until stopped
+    def run(self):
+        last_flush = time.monotonic()
+        while not (self._stop_event.is_set() and self.queue.empty()):
+            try:
+                batch = [self.queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.append(np.concatenate(batch) if len(batch) > 1 else batch[0])
+
+            # Keep the on-disk sample count reasonably fresh for readers
+            if time.monotonic() - last_flush > self.flush_interval:
+                self.flush()
+                last_flush = time.monotonic()
+        self.finish()
+
+    # Copy a batch into the mapped file, doubling the file when it is full
+    def append(self, rows):
+        n = len(rows)
+        if self.count + n > self.capacity:
+            capacity = self.capacity
+            while self.count + n > capacity:
+                capacity += min(capacity, 1 << 26)
+            self.grow(capacity)
+        self.map[self.count:self.count + n] = rows
+        self.count += n
+
+    # Push mapped data and the sample count to disk
+    def flush(self):
+        self.map.flush()
+        write_header(self.file, self.channels, self.sample_rate, self.start_time, self.count)
+        self.file.flush()
+
+    # Trim the preallocated tail and close the file
+    def finish(self):
+        self.flush()
+        del self.map
+        self.map = None
+        self.file.truncate(HEADER_LEN + self.count * self.columns * 2)
+        self.file.close()
+
+    # Write everything still queued, then close the file
+    # Waits at most timeout seconds (None until done), returns False while the queue is still draining
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        return not self.is_alive()
+
+# Class for reading a recording back
+class Recording:
+    # Open a recording, it may still be growing while a Recorder writes it
+    # Times are unwrapped block samples at a time, only a few numbers per block stay in memory
+    def __init__(self, path, tick_rate=1000.0, block=1 << 20):
+        self.path = path
+        self.block = block
+        # Timeline fed with every sample scanned so far, extended as the recording grows
+        self.timeline = Timeline(tick_rate)
+        self.scanned = 0
+        self.checkpoints = []   # Copy of the timeline before the first sample of every block
+        self.block_times = []   # Unwrapped time of the first sample of every block
+        self.cached_start = -1  # First sample of the block time_at() unwrapped last
+        self.cached_times = np.empty(0, dtype=np.int64)
+        self.refresh()
+
+    # Map the file again to pick up samples written since opening
+    def refresh(self):
+        with open(self.path, "rb") as f:
+            self.channels, self.sample_rate, self.start_time, count = read_header(f)
+        self.columns = self.channels + 1
+        # A recording still being written may be shorter on disk than its header count
+        on_disk = (os.path.getsize(self.path) - HEADER_LEN) // (self.columns * 2)
+        self.count = min(count, on_disk)
+        if self.count:
+            self.data = np.memmap(self.path, dtype="<u2", mode="r", offset=HEADER_LEN,
+                                  shape=(self.count, self.columns))
+        else:
+            self.data = np.empty((0, self.columns), dtype="<u2")
+
+    # Number of samples in the recording
+    def __len__(self):
+        return self.count
+
+    # Zero-copy (N, 1 + channels) view of samples [start, stop)
+    def samples(self, start=0, stop=None):
+        return self.data[start:stop]
+
+    # Zero-copy view of the timestamp column of samples [start, stop)
+    def timestamps(self, start=0, stop=None):
+        return self.data[start:stop, 0]
+
+    # Zero-copy view of one channel (1-based like the plots) of samples [start, stop)
+    def channel(self, index, start=0, stop=None):
+        return self.data[start:stop, index]
+
+    # Unwrap the samples not scanned yet, keeping the timeline state at the start of every block
+    def scan(self):
+        while self.scanned < self.count:
+            start = self.scanned
+            stop = min((start // self.block + 1) * self.block, self.count)
+            if start % self.block == 0:
+                checkpoint = copy.copy(self.timeline)
+                checkpoint.gap_times, checkpoint.gap_missing = [], []
+                self.checkpoints.append(checkpoint)
+            times = self.timeline.feed(self.data[start:stop, 0])
+            if start % self.block == 0:
+                self.block_times.append(int(times[0]))
+            self.scanned = stop
+
+    # Monotonic int64 times (timestamp ticks) of samples [start, stop), unwrapped from the
+    # checkpoint of the block start is in
+    def times(self, start=0, stop=None):
+        self.scan()
+        stop = self.count if stop is None else min(stop, self.count)
+        if start >= stop:
+            return np.empty(0, dtype=np.int64)
+        first = start // self.block * self.block
+        timeline = copy.copy(self.checkpoints[start // self.block])
+        timeline.gap_times, timeline.gap_missing = [], []
+        return timeline.feed(self.data[first:stop, 0])[start - first:]
+
+    # Unwrapped time of one sample, its block is kept so samples asked for in order unwrap each block once
+    def time_at(self, sample):
+        start = sample // self.block * self.block
+        if start != self.cached_start or sample - start >= len(self.cached_times):
+            self.cached_times = self.times(start, start + self.block)
+            self.cached_start = start
+        return int(self.cached_times[sample - start])
+
+    # Sample range [start, stop) of the samples with times in [t0, t1], found by binary search
+    # over the block start times and then within the one block each end falls in
+    def find_time(self, t0, t1):
+        self.scan()
+        return self.find_sample(t0, "left"), self.find_sample(t1, "right")
+
+    # First sample with a time after t ("right") or at or after t ("left")
+    def find_sample(self, t, side):
+        b = int(np.searchsorted(self.block_times, t, side=side)) - 1
+        if b < 0:
+            return 0
+        start = b * self.block
+        times = self.times(start, start + self.block)
+        return start + int(np.searchsorted(times, t, side=side))
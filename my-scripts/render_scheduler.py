@@ -0,0 +1,133 @@
+'''
+File: render_scheduler.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Display refresh scheduling for the pyqtgraph views, kept apart from taking samples in.
+The ingest timer drains the view's subscription, runs its triggers and fills its buffers every
+few milliseconds so queues stay short. The display timer runs at a target frame rate but only
+redraws when ingest (or a control) marked the view dirty, so a frozen view or a source with no
+new data costs next to nothing. The time spent ingesting and drawing is measured every frame:
+when it takes more than about half the frame interval the frame rate is lowered, and once frames
+are cheap again it climbs back to the target, so samples keep flowing and the controls stay
+responsive under load.
+RangeCache only passes axis ranges on to pyqtgraph when they change, and fast_curve creates
+curves with the fast path PlotDataItem options.
+'''
+
+import time
+from PySide6.QtCore import QTimer
+
+# Class for the ingest and display timers of one view
+class RenderScheduler:
+    # Initialize with the view's ingest and render callbacks, nothing runs until start()
+    def __init__(self, ingest, render, ingest_interval=10, fps=60, min_fps=5, metrics=None,
+                 busy_limit=0.5, cheap_limit=0.2, cheap_frames=10):
+        self.ingest = ingest
+        self.render = render
+        self.ingest_interval = ingest_interval
+        self.target_interval = 1000.0 / fps
+        self.max_interval = 1000.0 / min_fps
+        self.interval = self.target_interval
+        self.metrics = metrics
+        self.busy_limit = busy_limit      # Busy fraction of a frame that lowers the frame rate
+        self.cheap_limit = cheap_limit    # Busy fraction of a frame counted as cheap
+        self.cheap_frames = cheap_frames  # Cheap frames in a row before the frame rate goes back up
+        self.cheap_count = 0
+        self.busy = 0.0                   # Seconds spent ingesting since the last frame
+        self.dirty = False
+
+        self.ingest_timer = QTimer()
+        self.ingest_timer.timeout.connect(self.run_ingest)
+        self.display_timer = QTimer()
+        self.display_timer.timeout.connect(self.run_render)
+
+    # Start both timers
+    def start(self):
+        self.ingest_timer.start(self.ingest_interval)
+        self.display_timer.start(round(self.interval))
+
+    # Stop both timers
+    def stop(self):
+        self.ingest_timer.stop()
+        self.display_timer.stop()
+
+    # Current target frames per second
+    @property
+    def fps(self):
+        return 1000.0 / self.interval
+
+    # Redraw on the next display tick
+    def mark_dirty(self, *_):
+        self.dirty = True
+
+    # Take samples in and time it
+    def run_ingest(self):
+        start = time.perf_counter()
+        self.ingest()
+        self.busy += time.perf_counter() - start
+
+    # Redraw if anything changed, then adapt the frame rate to the time spent
+    def run_render(self):
+        if self.dirty:
+            self.dirty = False
+            start = time.perf_counter()
+            self.render()
+            self.busy += time.perf_counter() - start
+        self.adapt(self.busy * 1000.0)
+        self.busy = 0.0
+        if self.metrics is not None:
+            self.metrics.set("target_fps", self.fps)
+
+    # Lower the frame rate when a frame's work took too much of it, raise it when frames are cheap
+    def adapt(self, busy_ms):
+        if busy_ms > self.busy_limit * self.interval and self.interval < self.max_interval:
+            self.set_interval(min(self.interval * 1.5, self.max_interval))
+            self.cheap_count = 0
+        elif busy_ms < self.cheap_limit * self.interval and self.interval > self.target_interval:
+            self.cheap_count += 1
+            if self.cheap_count >= self.cheap_frames:
+                self.set_interval(max(self.interval / 1.25, self.target_interval))
+                self.cheap_count = 0
+        else:
+            self.cheap_count = 0
+
+    # Change the display interval in ms
+    def set_interval(self, interval):
+        self.interval = interval
+        self.display_timer.setInterval(round(interval))
+
+# Class that applies plot ranges only when they change
+class RangeCache:
+    # Initialize for a PlotWidget, ranges the user sets by zooming or panning are picked up
+    def __init__(self, plot_widget):
+        self.plot_widget = plot_widget
+        self.x = None
+        self.y = None
+        plot_widget.getViewBox().sigRangeChangedManually.connect(self.invalidate)
+
+    # Forget the applied ranges, the next ones are always set
+    def invalidate(self, *_):
+        self.x = None
+        self.y = None
+
+    # Set the x range unless it is already shown
+    def set_x(self, low, high, padding=0.0):
+        x = (float(low), float(high), padding)
+        if x != self.x:
+            self.plot_widget.setXRange(low, high, padding=padding)
+            self.x = x
+
+    # Set the y range unless it is already shown
+    def set_y(self, low, high, padding=0.0):
+        y = (float(low), float(high), padding)
+        if y != self.y:
+            self.plot_widget.setYRange(low, high, padding=padding)
+            self.y = y
+
+# Add a curve with the fast path options: only the visible part is drawn, long traces are peak
+# decimated to the screen and the finite check is skipped (pass skipFiniteCheck=False to setData
+# when the data holds NaN separators)
+def fast_curve(plot_widget, **kwargs):
+    return plot_widget.plot(clipToView=True, autoDownsample=True, downsampleMethod='peak',
+                            skipFiniteCheck=True, **kwargs)
@@ -0,0 +1,79 @@
+'''
+File: ring_buffer.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Preallocated multi-channel ring buffer that replaces the per-sample deques.
+Samples are stored column-major as uint16 (2 bytes per value instead of a Python float in a deque),
+so each channel comes out as a contiguous array for setData. Reading is zero-copy unless the
+window wraps around the end of the storage, in which case it costs exactly one copy.
+'''
+
+import numpy as np
+
+# Class for the sample ring buffer
+class RingBuffer:
+    # Initialize with a window length, storage is allocated once for max_length samples
+    def __init__(self, length, columns=4, max_length=None, dtype=np.uint16):
+        self.max_length = max(length, max_length or length)
+        self.length = length
+        self.columns = columns
+        self.data = np.zeros((columns, self.max_length), dtype=dtype)
+        self.head = 0    # Index the next sample is written to
+        self.count = 0   # Valid samples in the window, never more than length
+
+    # Number of samples currently held
+    def __len__(self):
+        return self.count
+
+    # True when the window holds length samples
+    def is_full(self):
+        return self.count == self.length
+
+    # Append an (N, columns) chunk, or (N,) for a single column buffer
+    def extend(self, chunk):
+        chunk = np.asarray(chunk)
+        if chunk.ndim == 1:
+            chunk = chunk[:, None]
+        n = len(chunk)
+        if n == 0:
+            return
+        if n > self.max_length:
+            chunk = chunk[-self.max_length:]
+            self.head = (self.head + n - self.max_length) % self.max_length
+            n = self.max_length
+
+        # At most two slice copies, one up to the end of storage and one from the start
+        first = min(n, self.max_length - self.head)
+        self.data[:, self.head:self.head + first] = chunk[:first].T
+        if first < n:
+            self.data[:, :n - first] = chunk[first:].T
+        self.head = (self.head + n) % self.max_length
+        self.count = min(self.count + n, self.length)
+
+    # Change the window length, keeping the newest samples (no copy up to max_length)
+    def set_length(self, length):
+        if length > self.max_length:
+            kept = self.view()
+            self.data = np.zeros((self.columns, length), dtype=self.data.dtype)
+            self.data[:, :kept.shape[1]] = kept
+            self.max_length = length
+            self.head = kept.shape[1] % length
+        self.length = length
+        self.count = min(self.count, length)
+
+    # Forget all samples
+    def clear(self):
+        self.count = 0
+
+    # Oldest to newest samples of one column, or of all columns as a (columns, N) array
+    def view(self, column=None):
+        return self.tail(self.count, column)
+
+    # Newest n samples, like view, only they are copied if they wrap
+    def tail(self, n, column=None):
+        rows = slice(None) if column is None else column
+        start = self.head - min(n, self.count)
+        if start >= 0:
+            return self.data[rows, start:self.head]
+        return np.concatenate((self.data[rows, start:], self.data[rows, :self.head]), axis=-1)
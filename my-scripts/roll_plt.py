@@ -4,45 +4,79 @@ Author: Surya Turaga
 Date: 22 July 2025
 
 A simple script to read data from a UART serial port and log it in real-time using matplotlib.
-It works best for frequency ranges of 100mHz to 50Hz.
+Every frame reads everything the port has received into a fixed size NumPy ring and only the
+trace is redrawn: the axes, labels and grid are drawn once and FuncAnimation blits the persistent
+Line2D over them. This is the roll mode for machines without Qt.
+--png DIR renders frames offscreen with Agg instead of opening a window.
+
+Usage: python roll_plt.py [--length 1000] [--png DIR] [--frames 100]
+       plus the source options (--port, --replay FILE, --synthetic, --rate, --speed, ...).
 '''
 
-import serial
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-
-# Configure serial port
-ser = serial.Serial('COM8', 115200, timeout=10)
-
-data = []
-
-# Function to read data from the serial port
-def read_serial():
-    line = ser.readline().decode('utf-8').strip()
-    try:
-        value = float(line)
-        return value
-    except ValueError:
-        return None
-
-# Function to update the plot
-def update(frame):
-    value = read_serial()
-    if value is not None:
-        data.append(value)
-        if len(data) > 100:
-            data.pop(0)
-        ax.clear()
-        ax.plot(data)
+import argparse
+import sys
+import numpy as np
+from sources import source_from_args
+from sample_parser import ValueParser, codes_to_volts
+from ring_buffer import RingBuffer
+from plt_render import render_pngs
+
+# Class for the roll mode plot
+class RollPlot:
+    # Set the axes up once and create the persistent trace
+    def __init__(self, ax, source, length=1000):
+        self.source = source
+        self.ring = RingBuffer(length, columns=1, dtype=np.float32)
+        self.x = np.arange(length)
         ax.set_title("Log Mode Oscilloscope")
         ax.set_ylabel("Voltage [V]")
         ax.set_xlabel("Sample Number")
+        ax.set_xlim(0, length - 1)
         ax.set_ylim(-0.1, 3.5)  # Assuming a 3.3V system
         ax.grid(True)
+        self.line, = ax.plot([], [], animated=True)
+
+    # Empty trace for the first blit
+    def init(self):
+        self.line.set_data([], [])
+        return (self.line,)
+
+    # Read everything pending and show the newest samples
+    def update(self, frame):
+        values = self.source.read()
+        if len(values):
+            self.ring.extend(codes_to_volts(values))
+            y = self.ring.view(0)
+            self.line.set_data(self.x[:len(y)], y)
+        return (self.line,)
+
+    # Artists of count frames for offscreen rendering, stops early at the end of a replay
+    def frames(self, count):
+        for frame in range(count):
+            if getattr(self.source, "finished", False):
+                return
+            yield self.update(frame)
 
 if __name__ == "__main__":
-    #plt.style.use('seaborn-darkgrid')
+    arg_parser = argparse.ArgumentParser(add_help=False)
+    arg_parser.add_argument("--length", type=int, default=1000)
+    arg_parser.add_argument("--png", metavar="DIR")
+    arg_parser.add_argument("--frames", type=int, default=100)
+    args, _ = arg_parser.parse_known_args(sys.argv[1:])
+
+    import matplotlib
+    if args.png:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+
+    source = source_from_args(sys.argv[1:], parser=ValueParser())
     fig, ax = plt.subplots()
-    ani = FuncAnimation(fig, update, interval=1)
-    plt.show()
-    ser.close()
\ No newline at end of file
+    plot = RollPlot(ax, source, args.length)
+    if args.png:
+        print(f"Wrote {render_pngs(fig, plot.frames(args.frames), args.png)} frames to {args.png}")
+    else:
+        ani = FuncAnimation(fig, plot.update, init_func=plot.init, interval=10, blit=True,
+                            cache_frame_data=False)
+        plt.show()
+    source.close()
@@ -0,0 +1,461 @@
+'''
+File: sample_parser.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Bulk parsers for the firmware's UART stream.
+A whole read is turned into a NumPy array in one vectorized pass instead of
+one readline(), split() and float() per sample. Partial lines are carried over
+to the next call and malformed lines are counted.
+
+Besides the printf text format there is a compact binary frame format, and
+StreamDecoder picks whichever of the two the firmware is sending.
+
+Run this file directly to compare its throughput with the old per-line loop.
+'''
+
+import io
+import time
+import numpy as np
+
+# Count the whole lines of buf as skipped samples of parser, returns the partial last line
+def skip_lines(parser, buf):
+    last_nl = buf.rfind(b"\n")
+    parser.samples_skipped += buf.count(b"\n")
+    return buf[last_nl + 1:]
+
+# Class for the "%5u %4u %4u %4u\r\n" line stream (timestamp + 3 ADC channels)
+class LineParser:
+    # Initialize the parser for fixed width fields separated by single spaces
+    def __init__(self, widths=(5, 4, 4, 4)):
+        self.widths = widths
+        self.columns = len(widths)
+        self.line_len = sum(widths) + len(widths) - 1
+        self.pending = b""
+        self.lines_parsed = 0
+        self.malformed = 0
+        self.samples_skipped = 0
+
+        # Decimal weight of every character position for its field
+        self.weights = np.zeros((self.line_len, self.columns), dtype=np.float32)
+        # A line is valid when its digit positions form one of these bit patterns,
+        # i.e. every field is right aligned digits behind optional leading spaces
+        patterns = np.zeros(1, dtype=np.int64)
+        pos = 0
+        for col, width in enumerate(widths):
+            self.weights[pos:pos + width, col] = 10.0 ** np.arange(width - 1, -1, -1)
+            field_patterns = [sum(1 << (pos + width - 1 - k) for k in range(n)) for n in range(1, width + 1)]
+            patterns = (patterns[:, None] + np.array(field_patterns)[None, :]).ravel()
+            pos += width + 1
+        self.valid_patterns = np.sort(patterns)
+        self.bit_weights = (2.0 ** np.arange(self.line_len)).astype(np.float32)
+        self.offsets = np.arange(self.line_len)
+
+    # Parse a chunk of raw bytes, returns an (N, columns) uint16 array
+    def feed(self, data):
+        buf = self.pending + data
+        last_nl = buf.rfind(b"\n")
+        if last_nl < 0:
+            self.pending = buf
+            return np.empty((0, self.columns), dtype=np.uint16)
+        self.pending = buf[last_nl + 1:]
+
+        raw = np.frombuffer(buf, dtype=np.uint8, count=last_nl + 1)
+        ends = np.flatnonzero(raw == 10)
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        has_cr = (ends > starts) & (raw[ends - 1] == 13)
+        lengths = ends - has_cr - starts
+
+        # Blank lines are skipped like before, they are not errors
+        nonblank = lengths > 0
+        starts = starts[nonblank]
+        lengths = lengths[nonblank]
+        out = np.empty((len(starts), self.columns), dtype=np.uint16)
+        valid = np.zeros(len(starts), dtype=bool)
+
+        # Fast path: every line of the expected width is decoded in one pass
+        fixed = np.flatnonzero(lengths == self.line_len)
+        if len(fixed):
+            if len(fixed) == len(ends) and np.all(np.diff(starts) == self.line_len + 2) \
+                    and starts[-1] + self.line_len + 2 == len(raw):
+                # Clean "\r\n" terminated stream: lines are just rows of a 2D view
+                chars = raw.reshape(-1, self.line_len + 2)[:, :self.line_len]
+            else:
+                chars = raw[starts[fixed, None] + self.offsets]
+            digits = chars - np.uint8(48)
+            is_digit = digits < 10
+            ok = np.all(is_digit | (chars == 32), axis=1)
+            bits = (is_digit @ self.bit_weights).astype(np.int64)
+            pos = np.searchsorted(self.valid_patterns, bits)
+            ok &= self.valid_patterns[np.minimum(pos, len(self.valid_patterns) - 1)] == bits
+            values = np.where(is_digit, digits, np.uint8(0)).astype(np.float32) @ self.weights
+            ok &= values[:, 0] <= 0xFFFF
+            out[fixed] = values
+            valid[fixed] = ok
+
+        # Slow path for anything else, e.g. a different printf width
+        for i in np.flatnonzero(lengths != self.line_len):
+            line = buf[starts[i]:starts[i] + lengths[i]]
+            parts = line.split()
+            if len(parts) < self.columns:
+                continue
+            try:
+                row = [int(p) for p in parts[:self.columns]]
+            except ValueError:
+                continue
+            if all(0 <= v <= 0xFFFF for v in row):
+                out[i] = row
+                valid[i] = True
+
+        good = int(np.count_nonzero(valid))
+        self.lines_parsed += good
+        self.malformed += len(valid) - good
+        if good == len(valid):
+            return out
+        return out[valid]
+
+    # Throw data away unparsed, counting its lines and keeping the partial last line
+    def skip(self, data):
+        self.pending = skip_lines(self, self.pending + data)
+
+    # Drop any partial line, e.g. after the stream was interrupted
+    def reset(self):
+        self.pending = b""
+
+# Class for the single value per line stream used by the basic plotters
+class ValueParser:
+    # Initialize the parser
+    def __init__(self):
+        self.pending = b""
+        self.lines_parsed = 0
+        self.malformed = 0
+        self.samples_skipped = 0
+
+    # Parse a chunk of raw bytes, returns a float32 array of values
+    def feed(self, data):
+        lines = (self.pending + data).split(b"\n")
+        self.pending = lines.pop()
+        lines = [line for line in lines if line.strip()]
+        try:
+            values = np.array(lines, dtype=np.float32)
+        except ValueError:
+            # Only fall back to a per-line loop when the chunk has a bad line
+            parsed = []
+            for line in lines:
+                try:
+                    parsed.append(float(line))
+                except ValueError:
+                    self.malformed += 1
+            values = np.array(parsed, dtype=np.float32)
+        self.lines_parsed += len(values)
+        return values
+
+    # Throw data away unparsed, counting its lines and keeping the partial last line
+    def skip(self, data):
+        self.pending = skip_lines(self, self.pending + data)
+
+    # Drop any partial line, e.g. after the stream was interrupted
+    def reset(self):
+        self.pending = b""
+
+# Volts for the single value plotters, (N, 4) code chunks from replay or synthetic sources use channel 1
+def codes_to_volts(chunk, vref=3.3):
+    if chunk.ndim == 1:
+        return chunk
+    return chunk[:, 1] * np.float32(vref / 4095)
+
+# Binary frame layout, all fields little endian:
+#   sync word (2) | sequence (2) | timestamp of first sample (2) | packed samples | Fletcher-16 (2)
+# Unlike the text stream's SysTick milliseconds, the frame timestamp counts samples. The decoder turns
+# it into 16 bit milliseconds at the firmware's sample rate, so both formats carry the same timestamps.
+# Samples are 12-bit, sample-major (s0c0 s0c1 s0c2 s1c0 ...), two values packed in three bytes.
+# The checksum covers everything between the sync word and itself.
+ADC_CHANS = 3
+FRAME_SYNC = b"\xa5\x5a"
+SAMPLES_PER_FRAME = 16
+FRAME_HEADER_LEN = 6
+FRAME_PAYLOAD_LEN = SAMPLES_PER_FRAME * ADC_CHANS * 3 // 2
+FRAME_LEN = FRAME_HEADER_LEN + FRAME_PAYLOAD_LEN + 2
+MAX_STAMP_STEP = 16384   # Longer forward steps of the sample counter after going backwards are resets
+
+# Fletcher-16 of every row of a 2D uint8 array, computed for all rows at once
+def fletcher16(rows):
+    n = rows.shape[1]
+    rows = rows.astype(np.int64)
+    sum1 = rows.sum(axis=1) % 255
+    sum2 = (rows @ np.arange(n, 0, -1, dtype=np.int64)) % 255
+    return (sum2 << 8) | sum1
+
+# Checksum stored at the end of every row of a 2D array of whole frames
+def stored_checksum(frames):
+    return frames[:, FRAME_LEN - 2].astype(np.int64) | (frames[:, FRAME_LEN - 1].astype(np.int64) << 8)
+
+# Pack (N, ADC_CHANS) samples into binary frames, N must be a whole number of frames
+def encode_frames(samples, seq=0, timestamp=0):
+    samples = np.asarray(samples, dtype=np.uint16).reshape(-1, SAMPLES_PER_FRAME * ADC_CHANS)
+    n_frames = len(samples)
+    frames = np.empty((n_frames, FRAME_LEN), dtype=np.uint8)
+    frames[:, 0:2] = np.frombuffer(FRAME_SYNC, dtype=np.uint8)
+    seqs = (seq + np.arange(n_frames)) & 0xFFFF
+    stamps = (timestamp + SAMPLES_PER_FRAME * np.arange(n_frames)) & 0xFFFF
+    frames[:, 2:4] = seqs.astype("<u2").view(np.uint8).reshape(-1, 2)
+    frames[:, 4:6] = stamps.astype("<u2").view(np.uint8).reshape(-1, 2)
+    a = samples[:, 0::2] & 0xFFF
+    b = samples[:, 1::2] & 0xFFF
+    payload = frames[:, FRAME_HEADER_LEN:FRAME_LEN - 2]
+    payload[:, 0::3] = a & 0xFF
+    payload[:, 1::3] = (a >> 8) | ((b & 0xF) << 4)
+    payload[:, 2::3] = b >> 4
+    check = fletcher16(frames[:, 2:FRAME_LEN - 2])
+    frames[:, FRAME_LEN - 2:] = check.astype("<u2").view(np.uint8).reshape(-1, 2)
+    return frames.tobytes()
+
+# Class for the binary frame stream, output matches LineParser's (N, 4) layout
+class BinaryFrameDecoder:
+    # Initialize the decoder, sample_rate converts the frame timestamps to milliseconds and can be
+    # updated while decoding; with None frames are held back until it is set (SerialSource
+    # estimates it when the rate is not given)
+    def __init__(self, sample_rate=1000.0):
+        self.columns = ADC_CHANS + 1
+        self.sample_rate = sample_rate
+        self.held = []             # (sample counters, values) of frames waiting for the sample rate
+        self.last_stamp = None     # Sample counter of the last frame
+        self.last_ms = 0.0         # Its time in ms since the counter was last reset
+        self.pending = b""
+        self.last_seq = None
+        self.frames_decoded = 0
+        self.frames_lost = 0       # Frames missing according to the sequence counter
+        self.checksum_errors = 0   # Sync words followed by a corrupt frame
+        self.bytes_skipped = 0     # Bytes thrown away while resynchronizing
+        self.samples_skipped = 0   # Samples thrown away on purpose with skip()
+        self.skip_gap = False      # The next sequence gap comes from skip(), not from line errors
+        self.offsets = np.arange(FRAME_LEN)
+        self.sample_offsets = np.arange(SAMPLES_PER_FRAME, dtype=np.uint16)
+
+    # Decode a chunk of raw bytes, returns an (N, 1 + ADC_CHANS) uint16 array
+    def feed(self, data):
+        buf = self.pending + data
+        raw = np.frombuffer(buf, dtype=np.uint8)
+        empty = np.empty((0, self.columns), dtype=np.uint16)
+        if len(raw) < FRAME_LEN:
+            self.pending = buf
+            return empty
+
+        # Every sync word with a whole frame behind it is a candidate
+        last_start = len(raw) - FRAME_LEN
+        cand = np.flatnonzero((raw[:last_start + 1] == FRAME_SYNC[0]) & (raw[1:last_start + 2] == FRAME_SYNC[1]))
+        frames = raw[cand[:, None] + self.offsets]
+        good = fletcher16(frames[:, 2:FRAME_LEN - 2]) == stored_checksum(frames)
+
+        # A sync pattern inside a good frame is not a frame start
+        good_pos = cand[good]
+        keep = np.ones(len(good_pos), dtype=bool)
+        keep[1:] = np.diff(good_pos) >= FRAME_LEN
+        good_pos = good_pos[keep]
+        frames = frames[good][keep]
+        bad_pos = cand[~good]
+        if len(good_pos):
+            owner = np.maximum(np.searchsorted(good_pos, bad_pos, side="right") - 1, 0)
+            stray = (bad_pos < good_pos[owner]) | (bad_pos >= good_pos[owner] + FRAME_LEN)
+            self.checksum_errors += int(np.count_nonzero(stray))
+        else:
+            self.checksum_errors += len(bad_pos)
+
+        # Anything not covered by a good frame is skipped, except a possibly unfinished frame at the end
+        consumed = int(good_pos[-1]) + FRAME_LEN if len(good_pos) else 0
+        tail = max(consumed, last_start + 1)
+        self.bytes_skipped += tail - len(good_pos) * FRAME_LEN
+        self.pending = buf[tail:]
+        if not len(frames):
+            return empty
+
+        seqs = frames[:, 2].astype(np.int64) | (frames[:, 3].astype(np.int64) << 8)
+        prev = np.empty_like(seqs)
+        prev[0] = seqs[0] - 1 if self.last_seq is None else self.last_seq
+        prev[1:] = seqs[:-1]
+        gaps = (seqs - prev - 1) & 0xFFFF
+        if self.skip_gap:
+            # The sequence counter tells exactly how many frames skip() threw away
+            self.samples_skipped += int(gaps[0]) * SAMPLES_PER_FRAME
+            gaps[0] = 0
+            self.skip_gap = False
+        self.frames_lost += int(np.sum(gaps))
+        self.last_seq = int(seqs[-1])
+        self.frames_decoded += len(frames)
+
+        payload = frames[:, FRAME_HEADER_LEN:FRAME_LEN - 2].astype(np.uint16)
+        values = np.empty((len(frames), SAMPLES_PER_FRAME * ADC_CHANS), dtype=np.uint16)
+        values[:, 0::2] = payload[:, 0::3] | ((payload[:, 1::3] & 0xF) << 8)
+        values[:, 1::2] = (payload[:, 1::3] >> 4) | (payload[:, 2::3] << 4)
+        stamps = frames[:, 4].astype(np.int64) | (frames[:, 5].astype(np.int64) << 8)
+
+        if self.sample_rate is None:
+            self.held.append((stamps, values))
+            return empty
+        if self.held:
+            stamps = np.concatenate([held[0] for held in self.held] + [stamps])
+            values = np.concatenate([held[1] for held in self.held] + [values])
+            self.held = []
+        out = np.empty((len(stamps) * SAMPLES_PER_FRAME, self.columns), dtype=np.uint16)
+        ms = self.frame_times(stamps)
+        out[:, 0] = (np.floor(ms[:, None] + self.sample_offsets * (1000.0 / self.sample_rate))
+                     .astype(np.int64) & 0xFFFF).ravel()
+        out[:, 1:] = values.reshape(-1, ADC_CHANS)
+        return out
+
+    # Milliseconds since the last counter reset of the first sample of each frame, from the frames'
+    # sample counters; the counter wraps at 16 bits and the user button resets it like SysTick
+    def frame_times(self, stamps):
+        steps = np.diff(stamps, prepend=stamps[0] if self.last_stamp is None else self.last_stamp)
+        forward = steps & 0xFFFF
+        reset = (steps < 0) & (forward > MAX_STAMP_STEP)
+        if self.last_stamp is None:
+            reset[0] = True
+        forward[reset] = 0
+        ms = self.last_ms + np.cumsum(forward) * (1000.0 / self.sample_rate)
+        # After a reset the time starts over from the reset frame's counter
+        if np.any(reset):
+            last = np.maximum.accumulate(np.where(reset, np.arange(len(ms)), -1))
+            restart = np.where(reset, stamps * (1000.0 / self.sample_rate) - ms, 0.0)
+            ms = ms + np.where(last >= 0, restart[np.maximum(last, 0)], 0.0)
+        self.last_stamp = int(stamps[-1])
+        self.last_ms = float(ms[-1])
+        return ms
+
+    # Throw data away undecoded, the next frame is found by its sync word
+    # and the skipped samples are counted from the sequence gap it leaves
+    def skip(self, data):
+        self.pending = b""
+        self.skip_gap = self.last_seq is not None
+
+    # Drop any partial frame, e.g. after the stream was interrupted
+    def reset(self):
+        self.pending = b""
+        self.last_seq = None
+        self.held = []
+        self.last_stamp = None
+        self.last_ms = 0.0
+
+# Class that detects the firmware's output format and decodes with the matching parser
+class StreamDecoder:
+    # Initialize with both decoders, neither is chosen until data arrives
+    # sample_rate is the firmware's, binary frames need it for their timestamps
+    def __init__(self, detect_len=256, sample_rate=1000.0):
+        self.text = LineParser()
+        self.binary = BinaryFrameDecoder(sample_rate)
+        self.detect_len = detect_len
+        self.decoder = None
+        self.columns = self.text.columns
+        self.pending = b""
+        self.idle_bytes = 0   # Bytes since the chosen decoder last produced a sample
+
+    # Name of the detected format, None while still detecting
+    @property
+    def mode(self):
+        if self.decoder is None:
+            return None
+        return "binary" if self.decoder is self.binary else "text"
+
+    # Malformed lines plus corrupt frames seen so far
+    @property
+    def malformed(self):
+        return self.text.malformed + self.binary.checksum_errors
+
+    # Samples thrown away with skip()
+    @property
+    def samples_skipped(self):
+        return self.text.samples_skipped + self.binary.samples_skipped
+
+    # Throw data away undecoded, before detection there is nothing to count
+    def skip(self, data):
+        if self.decoder is None:
+            self.pending = b""
+        else:
+            self.decoder.skip(data)
+
+    # Decode a chunk of raw bytes in whichever format was detected
+    def feed(self, data):
+        if self.decoder is None:
+            self.pending += data
+            self.decoder = self.detect()
+            if self.decoder is None:
+                return np.empty((0, self.columns), dtype=np.uint16)
+            data, self.pending = self.pending, b""
+
+        held = len(self.binary.held)
+        out = self.decoder.feed(data)
+        # Detect again if the stream stops making sense, e.g. the board was reflashed
+        # Frames held back until the sample rate is known were decoded, they are not idle bytes
+        decoded = len(out) or len(self.binary.held) > held
+        self.idle_bytes = 0 if decoded else self.idle_bytes + len(data)
+        if self.idle_bytes > 16 * self.detect_len:
+            self.reset()
+        return out
+
+    # Pick a decoder once enough bytes were seen to tell the formats apart
+    def detect(self):
+        raw = np.frombuffer(self.pending, dtype=np.uint8)
+        # Two back to back frames with good checksums can't be text
+        for start in np.flatnonzero((raw[:-1] == FRAME_SYNC[0]) & (raw[1:] == FRAME_SYNC[1])):
+            if start + 2 * FRAME_LEN > len(raw):
+                break
+            frames = raw[start:start + 2 * FRAME_LEN].reshape(2, FRAME_LEN)
+            if frames[1, 0] == FRAME_SYNC[0] and frames[1, 1] == FRAME_SYNC[1] \
+                    and np.all(fletcher16(frames[:, 2:FRAME_LEN - 2]) == stored_checksum(frames)):
+                return self.binary
+        if len(raw) >= self.detect_len:
+            is_text = np.isin(raw, np.frombuffer(b"0123456789 \r\n", dtype=np.uint8))
+            if np.count_nonzero(is_text) >= 0.95 * len(raw) and self.pending.count(b"\n") >= 2:
+                return self.text
+            # Neither format yet, keep only the newest bytes for the next try
+            self.pending = self.pending[-2 * FRAME_LEN:]
+        return None
+
+    # Drop any partial data and detect again
+    def reset(self):
+        self.text.reset()
+        self.binary.reset()
+        self.decoder = None
+        self.pending = b""
+        self.idle_bytes = 0
+
+# The per-line loop the plotters used before, kept for the comparison below
+def legacy_parse(data):
+    stream = io.BytesIO(data)
+    samples = []
+    while True:
+        line = stream.readline()
+        if not line:
+            break
+        line = line.decode(errors="ignore").strip()
+        if not line:
+            continue
+        parts = line.split()
+        if len(parts) < 4:
+            continue
+        try:
+            samples.append((float(parts[0]), float(parts[1]), float(parts[2]), float(parts[3])))
+        except ValueError:
+            continue
+    return samples
+
+if __name__ == "__main__":
+    n_lines = 200000
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, 4096, size=(n_lines, 4))
+    data = "".join(f"{t % 65536:5d} {a:4d} {b:4d} {c:4d}\r\n" for t, a, b, c in rows).encode()
+
+    start = time.perf_counter()
+    legacy_parse(data)
+    legacy_rate = n_lines / (time.perf_counter() - start)
+
+    parser = LineParser()
+    start = time.perf_counter()
+    for i in range(0, len(data), 4096):
+        parser.feed(data[i:i + 4096])
+    bulk_rate = n_lines / (time.perf_counter() - start)
+
+    print(f"Per-line loop: {legacy_rate:12,.0f} lines/s")
+    print(f"LineParser:    {bulk_rate:12,.0f} lines/s ({bulk_rate / legacy_rate:.1f}x)")
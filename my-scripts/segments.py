@@ -0,0 +1,98 @@
+'''
+File: segments.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Segmented memory for the trigger engine.
+SegmentedCapture triggers repeatedly and copies each window straight into the next row of one
+preallocated (segments, samples, channels) array, together with its raw timestamps, the absolute
+index of its trigger sample and the trigger time on the unwrapped timebase. Nothing is drawn or
+copied anywhere else while the sequence runs, so bursts of events right after each other are all
+kept. It disarms itself once every segment is filled.
+'''
+
+import numpy as np
+from trigger import TriggeredCapture
+from timeline import Timeline, TimeIndex, unwrap
+
+# Class for a sequence of triggered capture windows in one array
+class SegmentedCapture(TriggeredCapture):
+    # Initialize with room for segments windows of length samples
+    def __init__(self, trigger, length=1024, pre_trigger=0.5, source=1, columns=4,
+                 segments=100, max_length=2048, tick_rate=1000.0):
+        super().__init__(trigger, length=length, pre_trigger=pre_trigger, source=source,
+                         columns=columns, max_length=max_length)
+        self.channels = columns - 1
+        self.segments = segments
+        self.timeline = Timeline(tick_rate)
+        self.index = TimeIndex()
+        self.allocate()
+
+    # Allocate the segment memory for the current length and number of segments
+    def allocate(self):
+        self.data = np.zeros((self.segments, self.length, self.channels), dtype=np.uint16)
+        self.timestamps = np.zeros((self.segments, self.length), dtype=np.uint16)
+        self.trigger_index = np.zeros(self.segments, dtype=np.int64)     # Trigger sample in each segment
+        self.trigger_sample = np.zeros(self.segments, dtype=np.int64)    # Absolute trigger sample since arming
+        self.trigger_time = np.zeros(self.segments, dtype=np.int64)      # Unwrapped trigger time in ticks
+        self.count = 0
+
+    # Change the number of segments, the current sequence is abandoned
+    def set_segments(self, segments):
+        self.segments = max(int(segments), 1)
+        self.allocate()
+
+    # Change the window length, the current sequence is abandoned
+    def set_length(self, length):
+        super().set_length(length)
+        self.allocate()
+
+    # Start a new sequence with every segment empty
+    def arm(self):
+        super().arm()
+        self.index = TimeIndex()
+        self.count = 0
+
+    # Watch other channel columns, trigger sample numbers start over
+    def set_source(self, source):
+        super().set_source(source)
+        self.index = TimeIndex()
+
+    # Feed an (N, columns) chunk, returns a list of (trigger index in window, segment number)
+    def feed(self, chunk):
+        times = self.timeline.feed(chunk[:, 0])
+        if not self.armed:
+            return super().feed(chunk)
+        # Unwrapped times of the samples that may still hold a trigger, numbered like the trigger does
+        self.index.extend(times)
+        captures = super().feed(chunk)
+        self.index.discard_before(self.trigger.samples_seen - self.length)
+        return captures
+
+    # Copy a complete window into the next segment
+    def take(self, hit, end):
+        k = self.count
+        window = self.buffer.view()
+        self.data[k] = window[1:].T
+        self.timestamps[k] = window[0]
+        self.trigger_index[k] = hit - (end - self.length + 1)
+        self.trigger_sample[k] = hit
+        self.trigger_time[k] = self.index.time_at(hit)
+        self.count += 1
+        if self.count == self.segments:
+            self.armed = False
+        return int(self.trigger_index[k]), k
+
+    # True once every segment holds a capture
+    def is_full(self):
+        return self.count == self.segments
+
+    # (columns, length) window of segment k, like the ones TriggeredCapture returns
+    def window(self, k):
+        return np.vstack((self.timestamps[k], self.data[k].T))
+
+    # Unwrapped times of the samples of segment k in ticks, on the same timebase as trigger_time
+    def segment_times(self, k):
+        # Unwrapped on their own, so a window across a wrap or a button reset doesn't fold back
+        times = unwrap(self.timestamps[k])
+        return times - times[self.trigger_index[k]] + self.trigger_time[k]
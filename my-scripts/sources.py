@@ -0,0 +1,284 @@
+'''
+File: sources.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Pluggable sample sources for the acquisition worker.
+Every source has read(), which blocks briefly and returns an (N, 4) uint16 chunk
+(timestamp + 3 channels, possibly empty), and close().
+SerialSource reads the board, ReplaySource plays a recording back, SyntheticSource
+generates the emulated firmware signals and NetworkSource reads what a stream server publishes.
+Replay and synthetic sources run in real time, at N times speed, or as fast as possible
+(speed=None) to stress the trigger and render paths.
+
+All plotters accept --port, --replay FILE, --synthetic, --connect ADDRESS, --rate and --speed on the
+command line.
+For a serial port --rate is the firmware's sample rate in binary frame mode, which the frame
+timestamps are converted to milliseconds at; without it the rate is measured from the byte rate.
+--latency-budget SECONDS makes the serial source shed backlog older than that, by jumping to the
+newest data (--catch-up skip, the default) or by decimating the backlog (--catch-up decimate).
+'''
+
+import argparse
+import math
+import socket
+import time
+from collections import deque
+import numpy as np
+import serial
+from sample_parser import StreamDecoder, BinaryFrameDecoder, SAMPLES_PER_FRAME, FRAME_LEN
+from recorder import Recording
+from fw_emulator import generate_samples, systick_timestamps
+from metrics import Metrics
+from stream_protocol import (FrameDecoder, META, SAMPLES, TRIGGERS, decode_meta, decode_samples,
+                             decode_triggers, parse_address)
+
+# Class for the UART connection to the board
+class SerialSource:
+    # Open the port, parser turns raw bytes into chunks (format auto-detect by default)
+    # latency_budget is the oldest backlog in seconds kept before catching up, None to keep everything
+    # sample_rate is the firmware's for binary frame timestamps, None to estimate it from the byte rate
+    def __init__(self, port="COM8", baud=115200, parser=None, read_size=4096, timeout=0.02,
+                 latency_budget=None, catch_up="skip", sample_rate=None):
+        self.serial = serial.Serial(port, baud, timeout=timeout)
+        self.parser = parser if parser is not None else StreamDecoder()
+        self.read_size = read_size
+        self.metrics = Metrics()   # Replaced by the acquisition worker's metrics
+        self.latency_budget = latency_budget
+        self.catch_up_mode = catch_up
+        self.decimated = 0         # Samples dropped by decimating a backlog
+
+        # Input byte rate estimate, starts at the line rate (10 bits per byte)
+        self.byte_rate = baud / 10
+        self.bytes_read = 0
+        self.rate_time = time.monotonic()
+        self.rate_bytes = 0
+        self.sample_rate = sample_rate
+        self.update_sample_rate()
+
+    # Samples thrown away to stay within the latency budget
+    @property
+    def samples_skipped(self):
+        return self.parser.samples_skipped + self.decimated
+
+    # Blocking bulk read of everything available, parsed into a chunk
+    def read(self):
+        metrics = self.metrics
+        waiting = self.serial.in_waiting
+        metrics.set("backlog_bytes", waiting)
+        self.update_byte_rate(waiting)
+        if self.latency_budget is not None and waiting > self.latency_budget * self.byte_rate:
+            return self.catch_up(waiting)
+
+        # Includes waiting for data, a read stage close to the timeout means the worker is idle
+        start = metrics.start()
+        data = self.serial.read(max(self.read_size, waiting))
+        metrics.stop("read", start)
+        metrics.count("bytes_in", len(data))
+        self.bytes_read += len(data)
+
+        start = metrics.start()
+        chunk = self.parser.feed(data)
+        metrics.stop("parse", start)
+        metrics.set("parse_errors", self.parser.malformed)
+        return chunk
+
+    # Measure the input byte rate from bytes read plus bytes still waiting in the OS
+    def update_byte_rate(self, waiting):
+        now = time.monotonic()
+        arrived = self.bytes_read + waiting
+        # The first measurement starts with the first data, not with the port being opened
+        if arrived == 0:
+            self.rate_time = now
+            return
+        if now - self.rate_time < 0.5:
+            return
+        self.byte_rate = (arrived - self.rate_bytes) / (now - self.rate_time)
+        self.rate_time = now
+        self.rate_bytes = arrived
+        self.update_sample_rate()
+
+    # Give a binary frame decoder the sample rate its timestamps are converted at
+    def update_sample_rate(self):
+        binary = getattr(self.parser, "binary", self.parser)
+        if not isinstance(binary, BinaryFrameDecoder):
+            return
+        if self.sample_rate is not None:
+            binary.sample_rate = self.sample_rate
+        # Until the first byte rate measurement frames wait in the decoder
+        elif self.rate_bytes > 0:
+            binary.sample_rate = self.byte_rate * SAMPLES_PER_FRAME / FRAME_LEN
+        else:
+            binary.sample_rate = None
+
+    # Shed a backlog older than the latency budget, keeping about half a budget of the newest data
+    def catch_up(self, waiting):
+        data = self.serial.read(waiting)
+        self.bytes_read += len(data)
+        self.metrics.count("bytes_in", len(data))
+        keep = min(int(self.latency_budget * self.byte_rate / 2), len(data))
+
+        if self.catch_up_mode == "decimate":
+            # Parse everything but only keep every step-th sample
+            chunk = self.parser.feed(data)
+            step = max(math.ceil(len(data) / max(keep, 1)), 1)
+            kept = chunk[::step]
+            self.decimated += len(chunk) - len(kept)
+        else:
+            # The parser counts what it skips and resynchronizes on the next line or frame
+            split = len(data) - keep
+            self.parser.skip(data[:split])
+            kept = self.parser.feed(data[split:])
+        self.metrics.set("skipped", self.samples_skipped)
+        self.metrics.set("parse_errors", self.parser.malformed)
+        return kept
+
+    # Close the port
+    def close(self):
+        self.serial.close()
+
+# Base class for sources that produce samples on a clock of their own
+class PacedSource:
+    # Initialize pacing, speed is a multiple of real time or None for as fast as possible
+    def __init__(self, sample_rate, speed=1.0, chunk_size=4096, poll=0.005):
+        self.sample_rate = sample_rate
+        self.speed = speed
+        self.chunk_size = chunk_size
+        self.poll = poll
+        self.position = 0      # Samples handed out so far
+        self.start_time = None
+
+    # Number of samples to hand out now, sleeping a little if none are due yet
+    def due(self):
+        if self.speed is None:
+            return self.chunk_size
+        now = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = now
+        target = int((now - self.start_time) * self.sample_rate * self.speed)
+        n = min(target - self.position, self.chunk_size)
+        if n <= 0:
+            time.sleep(self.poll)
+            return 0
+        return n
+
+    # Nothing to release by default
+    def close(self):
+        pass
+
+# Class that plays a recording back as if it came from the board
+class ReplaySource(PacedSource):
+    # Open the recording, sample_rate overrides the rate stored in its header
+    def __init__(self, path, speed=1.0, sample_rate=None, loop=False, chunk_size=4096):
+        self.recording = Recording(path)
+        rate = sample_rate or self.recording.sample_rate or 1000.0
+        super().__init__(rate, speed, chunk_size)
+        self.loop = loop
+        self.finished = False
+
+    # Next chunk of the recording, empty once it is over (unless looping)
+    def read(self):
+        n = self.due()
+        if n == 0:
+            return np.empty((0, 4), dtype=np.uint16)
+        offset = self.position % len(self.recording) if self.loop and len(self.recording) else self.position
+        chunk = self.recording.samples(offset, offset + n)
+        if len(chunk) == 0:
+            self.finished = True
+            time.sleep(self.poll)
+        self.position += len(chunk)
+        return chunk
+
+# Class that generates the emulated firmware signals without any port
+class SyntheticSource(PacedSource):
+    # Initialize the generator at the given sample rate
+    def __init__(self, sample_rate=1000.0, speed=1.0, chunk_size=4096):
+        super().__init__(sample_rate, speed, chunk_size)
+
+    # Next chunk of generated samples
+    def read(self):
+        n = self.due()
+        chunk = np.empty((n, 4), dtype=np.uint16)
+        chunk[:, 0] = systick_timestamps(self.position, n, self.sample_rate)
+        chunk[:, 1:] = generate_samples(self.position, n, self.sample_rate)
+        self.position += n
+        return chunk
+
+# Class that reads the samples a stream server publishes (see stream_server.py)
+class NetworkSource:
+    # Connect to address, "host:port" or "unix:/path"
+    def __init__(self, address, timeout=0.02, read_size=1 << 20):
+        family, address = parse_address(address)
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.connect(address)
+        self.socket.settimeout(timeout)
+        self.read_size = read_size
+        self.decoder = FrameDecoder()
+        self.metrics = Metrics()   # Replaced by the acquisition worker's metrics
+        self.meta = {}
+        self.triggers = deque(maxlen=1024)    # Absolute sample indices of the server's latest triggers
+        self.next_sample = None    # Absolute index of the next sample expected
+        self.samples_skipped = 0   # Samples the server dropped for this client
+        self.finished = False      # True once the server has closed the connection
+
+    # Everything received so far, parsed into one chunk
+    def read(self):
+        if self.finished:
+            time.sleep(0.02)
+            return np.empty((0, 4), dtype=np.uint16)
+        try:
+            data = self.socket.recv(self.read_size)
+        except socket.timeout:
+            return np.empty((0, 4), dtype=np.uint16)
+        except OSError:
+            data = b""
+        if not data:
+            self.finished = True
+            return np.empty((0, 4), dtype=np.uint16)
+        self.metrics.count("bytes_in", len(data))
+
+        chunks = []
+        for kind, payload in self.decoder.feed(data):
+            if kind == SAMPLES:
+                first, chunk = decode_samples(payload)
+                if self.next_sample is not None and first > self.next_sample:
+                    self.samples_skipped += first - self.next_sample
+                self.next_sample = first + len(chunk)
+                chunks.append(chunk)
+            elif kind == TRIGGERS:
+                self.triggers.extend(decode_triggers(payload).tolist())
+            elif kind == META:
+                self.meta = decode_meta(payload)
+        self.metrics.set("skipped", self.samples_skipped)
+        if not chunks:
+            return np.empty((0, 4), dtype=np.uint16)
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+    # Disconnect from the server
+    def close(self):
+        self.socket.close()
+
+# Build the sample source picked on the command line, parser is used for serial ports only
+def source_from_args(argv, parser=None):
+    arg_parser = argparse.ArgumentParser(add_help=False)
+    arg_parser.add_argument("--port", default="COM8")
+    arg_parser.add_argument("--baud", type=int, default=115200)
+    arg_parser.add_argument("--replay", metavar="FILE")
+    arg_parser.add_argument("--synthetic", action="store_true")
+    arg_parser.add_argument("--connect", metavar="ADDRESS", help="stream server, HOST:PORT or unix:/path")
+    arg_parser.add_argument("--rate", type=float, default=None,
+                            help="samples per second, of the binary frame stream for a serial port")
+    arg_parser.add_argument("--speed", default="1", help="replay speed multiple, or 'max'")
+    arg_parser.add_argument("--latency-budget", type=float, default=None, metavar="SECONDS")
+    arg_parser.add_argument("--catch-up", choices=("skip", "decimate"), default="skip")
+    args, _ = arg_parser.parse_known_args(argv)
+
+    speed = None if args.speed == "max" else float(args.speed)
+    if args.connect:
+        return NetworkSource(args.connect)
+    if args.replay:
+        return ReplaySource(args.replay, speed=speed, sample_rate=args.rate)
+    if args.synthetic:
+        return SyntheticSource(args.rate or 1000.0, speed=speed)
+    return SerialSource(args.port, args.baud, parser=parser, latency_budget=args.latency_budget,
+                        catch_up=args.catch_up, sample_rate=args.rate)
@@ -0,0 +1,181 @@
+'''
+File: spectrum.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Incremental FFT spectrum of all three channels.
+Spectrum takes chunks of samples as they arrive and computes a windowed rfft frame every hop
+samples (nfft times one minus the overlap). All frames completed by a chunk are windowed and
+transformed in one batched call over (channels, frames, nfft), using a staging buffer and a
+windowed buffer that are allocated once and reused. Power spectra are Welch averaged over the
+latest frames and a peak-hold trace keeps the highest power seen per bin.
+
+SpectrumWorker runs a Spectrum in its own thread on a subscription to the acquisition worker,
+so frames are computed as soon as enough new samples are in, independent of the display rate.
+'''
+
+import threading
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from timeline import Timeline
+
+FULL_SCALE = 4095    # 12 bit ADC codes
+
+# 5 term flat top window, amplitude accurate to about 0.01 dB wherever the tone falls in a bin
+def flattop(n):
+    k = np.arange(n) * (2 * np.pi / max(n - 1, 1))
+    return (0.21557895 - 0.41663158 * np.cos(k) + 0.277263158 * np.cos(2 * k)
+            - 0.083578947 * np.cos(3 * k) + 0.006947368 * np.cos(4 * k))
+
+WINDOWS = {
+    "Hann": np.hanning,
+    "Hamming": np.hamming,
+    "Blackman": np.blackman,
+    "Flat top": flattop,
+    "Rectangular": np.ones,
+}
+
+# Class for the running spectrum of several channels
+class Spectrum:
+    # Initialize, overlap is the fraction of each frame shared with the next one and averages the
+    # number of frames in the Welch average
+    def __init__(self, nfft=1024, overlap=0.5, window="Hann", averages=8, channels=3):
+        self.channels = channels
+        self.configure(nfft, overlap, window, averages)
+
+    # Change the settings, which starts over with empty buffers
+    def configure(self, nfft=None, overlap=None, window=None, averages=None):
+        self.nfft = nfft or getattr(self, "nfft", 1024)
+        self.overlap = min(max(overlap if overlap is not None else getattr(self, "overlap", 0.5), 0.0), 0.95)
+        self.window_name = window or getattr(self, "window_name", "Hann")
+        self.averages = max(averages or getattr(self, "averages", 8), 1)
+        self.hop = max(int(round(self.nfft * (1 - self.overlap))), 1)
+        self.bins = self.nfft // 2 + 1
+
+        self.window = WINDOWS[self.window_name](self.nfft).astype(np.float32)
+        # Power to amplitude of a sine in codes, corrected for the window's coherent gain,
+        # DC and Nyquist have no negative frequency twin
+        self.scale = np.full(self.bins, 2.0 / self.window.sum())
+        self.scale[0] /= 2
+        if self.nfft % 2 == 0:
+            self.scale[-1] /= 2
+        self.staging = np.zeros((self.channels, 4 * self.nfft), dtype=np.float32)
+        self.windowed = np.empty((self.channels, 4, self.nfft), dtype=np.float32)
+        self.history = np.zeros((self.averages, self.channels, self.bins))
+        self.last_frame = np.zeros((self.channels, self.nfft), dtype=np.float32)
+        self.reset()
+
+    # Forget the samples and frames seen so far
+    def reset(self):
+        self.fill = 0           # Samples waiting in staging
+        self.frames = 0         # Frames computed since the last reset
+        self.history[:] = 0
+        self.average = np.zeros((self.channels, self.bins))
+        self.reset_peak()
+
+    # Start the peak-hold trace over
+    def reset_peak(self):
+        self.peak = np.zeros((self.channels, self.bins))
+
+    # Feed an (N, channels) block of samples, returns the number of new frames
+    def feed(self, samples):
+        n = len(samples)
+        if self.fill + n > self.staging.shape[1]:
+            staging = np.empty((self.channels, 2 * (self.fill + n)), dtype=np.float32)
+            staging[:, :self.fill] = self.staging[:, :self.fill]
+            self.staging = staging
+        self.staging[:, self.fill:self.fill + n] = samples.T
+        self.fill += n
+        if self.fill < self.nfft:
+            return 0
+
+        # Every frame the buffered samples complete, windowed and transformed in one go
+        count = (self.fill - self.nfft) // self.hop + 1
+        frames = sliding_window_view(self.staging[:, :self.fill], self.nfft, axis=1)[:, ::self.hop][:, :count]
+        if self.windowed.shape[1] < count:
+            self.windowed = np.empty((self.channels, count, self.nfft), dtype=np.float32)
+        windowed = self.windowed[:, :count]
+        np.multiply(frames, self.window, out=windowed)
+        spectra = np.fft.rfft(windowed, axis=2)
+        power = spectra.real ** 2 + spectra.imag ** 2    # (channels, count, bins)
+
+        # Welch average over the latest frames, older frames than that would only be overwritten
+        kept = min(count, self.averages)
+        slots = (self.frames + count - kept + np.arange(kept)) % self.averages
+        self.history[slots] = power[:, count - kept:].transpose(1, 0, 2)
+        self.frames += count
+        self.average = self.history[:min(self.frames, self.averages)].mean(axis=0)
+        np.maximum(self.peak, power.max(axis=1), out=self.peak)
+        self.last_frame[:] = frames[:, -1]
+
+        # Keep the samples the next frame starts with
+        consumed = count * self.hop
+        rest = self.fill - consumed
+        self.staging[:, :rest] = self.staging[:, consumed:self.fill]
+        self.fill = rest
+        return count
+
+    # Amplitude per bin in codes, or in dB relative to full scale
+    def amplitude(self, power, db=True):
+        amplitude = np.sqrt(power) * self.scale
+        if db:
+            return 20 * np.log10(np.maximum(amplitude / FULL_SCALE, 1e-12))
+        return amplitude
+
+    # Bin frequencies in Hz, or in cycles per sample when the sample rate is unknown
+    def frequencies(self, sample_rate=None):
+        return np.fft.rfftfreq(self.nfft, 1.0 / sample_rate if sample_rate else 1.0)
+
+# Class for the thread computing the spectrum of everything the acquisition worker publishes
+class SpectrumWorker(threading.Thread):
+    # Initialize on a subscription to worker
+    def __init__(self, worker, spectrum=None, tick_rate=1000.0):
+        super().__init__(daemon=True)
+        self.spectrum = spectrum if spectrum is not None else Spectrum()
+        self.subscription = worker.subscribe()
+        self.metrics = worker.metrics
+        self.timeline = Timeline(tick_rate)    # Sample rate estimate for the frequency axis
+        self.lock = threading.Lock()           # Guards the spectrum against the GUI thread
+        self.version = 0                       # Bumped on every batch of new frames
+        self._stop_event = threading.Event()
+
+    def run(self):
+        metrics = self.metrics
+        while not self._stop_event.is_set():
+            chunks = self.subscription.wait(0.05)
+            if not chunks:
+                continue
+            data = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+            self.timeline.feed(data[:, 0])
+            start = metrics.start()
+            with self.lock:
+                if self.spectrum.feed(data[:, 1:]):
+                    self.version += 1
+            metrics.stop("fft", start)
+
+    def stop(self):
+        self._stop_event.set()
+
+    # Change the spectrum settings (GUI thread)
+    def configure(self, **settings):
+        with self.lock:
+            self.spectrum.configure(**settings)
+            self.version += 1
+
+    # Start the peak-hold trace over (GUI thread)
+    def reset_peak(self):
+        with self.lock:
+            self.spectrum.reset_peak()
+            self.version += 1
+
+    # Copies of the latest results for drawing (GUI thread), returns
+    # (frequencies, average, peak, last frame) or None before the first frame
+    def results(self, db=True):
+        with self.lock:
+            spectrum = self.spectrum
+            if spectrum.frames == 0:
+                return None
+            return (spectrum.frequencies(self.timeline.sample_rate),
+                    spectrum.amplitude(spectrum.average, db),
+                    spectrum.amplitude(spectrum.peak, db),
+                    spectrum.last_frame.copy())
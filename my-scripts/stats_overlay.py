@@ -0,0 +1,49 @@
+'''
+File: stats_overlay.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+On-plot overlay for the hot-path metrics of a plotter (see metrics.py).
+It refreshes a few times a second from the plotter's QTimer callback and also drives the
+periodic metrics export, so exporting works with the overlay hidden.
+'''
+
+import time
+from PySide6.QtWidgets import QLabel
+from metrics import format_snapshot
+
+# Class for the metrics text shown in the corner of a plot
+class StatsOverlay(QLabel):
+    # Initialize the overlay over plot_widget, hidden until toggled on
+    def __init__(self, plot_widget, metrics, refresh=0.25):
+        super().__init__(plot_widget)
+        self.metrics = metrics
+        self.refresh = refresh
+        self.last_refresh = 0.0
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 170); color: white; "
+                           "font-family: monospace; font-size: 11px; padding: 4px;")
+        self.move(60, 30)
+        self.hide()
+
+    # Show or hide the overlay, metrics are only collected while shown or exported
+    def set_shown(self, checked):
+        self.setVisible(checked)
+        self.metrics.enabled = checked or self.metrics.export_path is not None
+        if checked:
+            self.metrics.reset()
+            self.setText("Collecting...")
+            self.adjustSize()
+
+    # Take a snapshot when one is due, export it and show it
+    def refresh_stats(self):
+        if not self.metrics.enabled:
+            return
+        now = time.monotonic()
+        if now - self.last_refresh < self.refresh:
+            return
+        self.last_refresh = now
+        snapshot = self.metrics.snapshot()
+        self.metrics.export(snapshot)
+        if self.isVisible():
+            self.setText(format_snapshot(snapshot))
+            self.adjustSize()
@@ -0,0 +1,93 @@
+'''
+File: stream_protocol.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Binary framing for streaming decoded samples over TCP or a Unix socket.
+Every frame is a 7 byte header (magic "OS", kind, payload length) and a payload:
+    META      UTF-8 JSON with the stream's layout, sent first to every client
+    SAMPLES   absolute index of the first sample (uint64) and the column count (uint16), then the
+              (N, columns) uint16 chunk as it is in memory, little-endian and row-major
+    TRIGGERS  absolute sample indices (int64) of the trigger events the server found
+A batch of chunks is one SAMPLES frame encoded once and sent as is to every client, so nothing is
+serialized per sample or per client. Gaps in the first-sample index tell a client how many
+samples were dropped for it.
+'''
+
+import json
+import socket
+import struct
+import numpy as np
+
+MAGIC = b"OS"
+HEADER = struct.Struct("<2sBI")
+SAMPLES_HEADER = struct.Struct("<QH")
+META, SAMPLES, TRIGGERS = 1, 2, 3
+
+DEFAULT_PORT = 5025
+
+# Encode one frame
+def encode_frame(kind, payload):
+    return HEADER.pack(MAGIC, kind, len(payload)) + payload
+
+# Encode the metadata frame from a dict
+def encode_meta(meta):
+    return encode_frame(META, json.dumps(meta).encode())
+
+# Encode an (N, columns) uint16 chunk whose first sample has absolute index first
+def encode_samples(first, chunk):
+    data = np.ascontiguousarray(chunk, dtype="<u2")
+    return encode_frame(SAMPLES, SAMPLES_HEADER.pack(first, data.shape[1]) + data.tobytes())
+
+# Encode absolute trigger sample indices
+def encode_triggers(indices):
+    return encode_frame(TRIGGERS, np.asarray(indices, dtype="<i8").tobytes())
+
+# Class that splits a byte stream back into frames
+class FrameDecoder:
+    # Initialize with an empty buffer
+    def __init__(self):
+        self.buffer = bytearray()
+
+    # Add received bytes, returns a list of complete (kind, payload) frames
+    def feed(self, data):
+        self.buffer += data
+        frames = []
+        pos = 0
+        buffer = self.buffer
+        while len(buffer) - pos >= HEADER.size:
+            magic, kind, length = HEADER.unpack_from(buffer, pos)
+            if magic != MAGIC:
+                raise ValueError("Lost frame sync in the sample stream")
+            end = pos + HEADER.size + length
+            if end > len(buffer):
+                break
+            frames.append((kind, bytes(buffer[pos + HEADER.size:end])))
+            pos = end
+        del buffer[:pos]
+        return frames
+
+# Decode a SAMPLES payload, returns (first sample index, (N, columns) uint16 chunk)
+def decode_samples(payload):
+    first, columns = SAMPLES_HEADER.unpack_from(payload)
+    chunk = np.frombuffer(payload, dtype="<u2", offset=SAMPLES_HEADER.size).reshape(-1, columns)
+    return first, chunk.astype(np.uint16, copy=False)
+
+# Decode a TRIGGERS payload
+def decode_triggers(payload):
+    return np.frombuffer(payload, dtype="<i8").astype(np.int64, copy=False)
+
+# Decode a META payload
+def decode_meta(payload):
+    return json.loads(payload.decode())
+
+# Socket family and address for "host:port", ":port", "unix:/path" or a filesystem path
+def parse_address(address):
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    if "/" in address:
+        return socket.AF_UNIX, address
+    if ":" not in address:
+        return socket.AF_INET, (address, DEFAULT_PORT)
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port) if port else DEFAULT_PORT)
@@ -0,0 +1,225 @@
+'''
+File: stream_server.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Streaming server stage, so viewers on other machines or processes can share one capture.
+The server subscribes to an acquisition worker like any view does. Every batch interval it takes
+every chunk queued since the last one, encodes them as a single SAMPLES frame (see
+stream_protocol.py) and hands the same bytes to every connected client, along with a TRIGGERS
+frame when the optional edge trigger fired. Each client has its own sender thread and a bounded
+queue of frames, so a slow client drops its oldest frames (counted per client) instead of holding
+up the others or the acquisition. Clients read the stream with NetworkSource (--connect ADDRESS
+on any of the osc_* windows).
+
+Usage: python stream_server.py [--listen HOST:PORT | --listen unix:/path] [--batch 0.01]
+                               [--trigger-level CODE] [--trigger-edge rising] [--trigger-source 1]
+       plus the source options of every plotter (--port, --baud, --replay, --synthetic, --rate, ...)
+'''
+
+import argparse
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+import numpy as np
+from acquisition import AcquisitionWorker
+from sources import source_from_args
+from timeline import Timeline
+from trigger import EdgeTrigger
+from stream_protocol import encode_meta, encode_samples, encode_triggers, parse_address
+
+# Class for one connected client and the thread that sends to it
+class ClientConnection(threading.Thread):
+    # Initialize for an accepted socket with room for queue_len frames
+    def __init__(self, sock, name, queue_len=64):
+        super().__init__(daemon=True)
+        self.sock = sock
+        self.name = name
+        self.queue = queue.Queue(maxsize=queue_len)
+        self.dropped_samples = 0  # Samples in frames thrown away because this client fell behind
+        self.dropped_frames = 0
+        self.bytes_sent = 0
+        self._stop_event = threading.Event()
+
+    # Queue a frame holding samples samples, dropping the oldest one when the client is not keeping up
+    # (publisher thread)
+    def put(self, frame, samples=0):
+        while True:
+            try:
+                self.queue.put_nowait((frame, samples))
+                return
+            except queue.Full:
+                try:
+                    _, dropped = self.queue.get_nowait()
+                except queue.Empty:
+                    continue
+                self.dropped_frames += 1
+                self.dropped_samples += dropped
+
+    # Send queued frames, everything queued at once in one call, until stopped or disconnected
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                frames = [self.queue.get(timeout=0.1)[0]]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    frames.append(self.queue.get_nowait()[0])
+                except queue.Empty:
+                    break
+            data = frames[0] if len(frames) == 1 else b"".join(frames)
+            try:
+                self.sock.sendall(data)
+            except OSError:
+                break
+            self.bytes_sent += len(data)
+        self.sock.close()
+
+    # Ask the sender to finish
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout=1.0)
+
+# Class for the server publishing one acquisition worker's samples
+class StreamServer:
+    # Listen on address, trigger is an optional EdgeTrigger watching column trigger_source
+    def __init__(self, worker, address=":5025", trigger=None, trigger_source=1, batch_interval=0.01,
+                 queue_len=64, tick_rate=1000.0):
+        self.worker = worker
+        self.subscription = worker.subscribe()
+        self.trigger = trigger
+        self.trigger_source = trigger_source
+        self.batch_interval = batch_interval
+        self.queue_len = queue_len
+        self.timeline = Timeline(tick_rate)
+        self.clients = []           # Replaced, never changed in place, so the publisher can iterate it freely
+        self.next_sample = 0        # Absolute index of the next sample published
+        self.skipped_seen = 0       # Samples this server's own subscription dropped, already accounted for
+
+        family, address = parse_address(address)
+        self.unix_path = address if family == socket.AF_UNIX else None
+        if self.unix_path and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+        self.listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(address)
+        self.listener.listen()
+        self.listener.settimeout(0.2)
+        self.address = self.listener.getsockname()
+
+        self._stop_event = threading.Event()
+        self.accept_thread = threading.Thread(target=self.accept_clients, daemon=True)
+        self.publish_thread = threading.Thread(target=self.publish, daemon=True)
+
+    # Start accepting clients and publishing, and the worker unless it already runs
+    def start(self):
+        self.accept_thread.start()
+        self.publish_thread.start()
+        self.worker.start()
+
+    # Stream layout sent to every client when it connects
+    def meta(self):
+        return {
+            "version": 1,
+            "columns": 4,
+            "channels": 3,
+            "tick_rate": self.timeline.tick_rate,
+            "sample_rate": self.timeline.sample_rate,
+            "first_sample": self.next_sample,
+            "trigger": None if self.trigger is None else {
+                "level": self.trigger.level, "rising": self.trigger.rising, "source": self.trigger_source},
+        }
+
+    # Accept clients until stopped (accept thread)
+    def accept_clients(self):
+        count = 0
+        while not self._stop_event.is_set():
+            try:
+                sock, peer = self.listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            count += 1
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+            client = ClientConnection(sock, str(peer or f"unix client {count}"), self.queue_len)
+            client.put(encode_meta(self.meta()))
+            client.start()
+            self.clients = [c for c in self.clients if c.is_alive()] + [client]
+
+    # Encode everything queued once per batch interval and queue it for every client (publisher thread)
+    def publish(self):
+        while not self._stop_event.wait(self.batch_interval):
+            chunks = self.subscription.drain()
+            if not chunks:
+                continue
+            chunk = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+            # Samples dropped before reaching the server leave a gap in the indices the clients see
+            skipped = self.subscription.dropped_samples - self.skipped_seen
+            self.skipped_seen += skipped
+            self.next_sample += skipped
+            self.timeline.feed(chunk[:, 0])
+
+            frames = [(encode_samples(self.next_sample, chunk), len(chunk))]
+            if self.trigger is not None:
+                self.trigger.samples_seen += skipped
+                hits = self.trigger.scan(chunk[:, self.trigger_source])
+                if len(hits):
+                    frames.append((encode_triggers(hits), 0))
+            self.next_sample += len(chunk)
+
+            for client in self.clients:
+                if client.is_alive():
+                    for frame, samples in frames:
+                        client.put(frame, samples)
+
+    # Per client name, bytes sent and samples dropped
+    def client_stats(self):
+        return [(c.name, c.bytes_sent, c.dropped_samples, c.is_alive()) for c in self.clients]
+
+    # Stop publishing, disconnect every client and close the socket
+    def stop(self):
+        self._stop_event.set()
+        for thread in (self.accept_thread, self.publish_thread):
+            if thread.is_alive():
+                thread.join(timeout=1.0)
+        for client in self.clients:
+            client.stop()
+        self.listener.close()
+        if self.unix_path and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+        self.worker.unsubscribe(self.subscription)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Stream the acquired samples to network clients")
+    arg_parser.add_argument("--listen", default=":5025", help="HOST:PORT, or unix:/path")
+    arg_parser.add_argument("--batch", type=float, default=0.01, help="seconds between sample frames")
+    arg_parser.add_argument("--queue", type=int, default=64, help="frames queued per client before dropping")
+    arg_parser.add_argument("--trigger-level", type=int, help="ADC code, sends trigger events when given")
+    arg_parser.add_argument("--trigger-edge", choices=("rising", "falling"), default="rising")
+    arg_parser.add_argument("--trigger-source", type=int, choices=(1, 2, 3), default=1)
+    args, _ = arg_parser.parse_known_args(sys.argv[1:])
+
+    worker = AcquisitionWorker(source_from_args(sys.argv[1:]))
+    trigger = None
+    if args.trigger_level is not None:
+        trigger = EdgeTrigger(args.trigger_level, args.trigger_edge == "rising")
+    server = StreamServer(worker, args.listen, trigger, args.trigger_source, args.batch, args.queue)
+    server.start()
+    print(f"Streaming on {server.address}", flush=True)
+    try:
+        while True:
+            time.sleep(5.0)
+            for name, sent, dropped, alive in server.client_stats():
+                if alive:
+                    print(f"{name}: {sent:,} bytes sent, {dropped:,} samples dropped", flush=True)
+    except KeyboardInterrupt:
+        pass
+    server.stop()
+    worker.stop()
@@ -0,0 +1,59 @@
+'''
+File: test_acquisition.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Regression tests for the acquisition worker and its subscriptions.
+
+Usage: python -m pytest test_acquisition.py
+'''
+
+import numpy as np
+from acquisition import AcquisitionWorker, Subscription
+
+# Source that returns a few chunks and then fails like a bad decoder would
+class FailingSource:
+    # Initialize to fail on read number fail_after + 1
+    def __init__(self, fail_after=3):
+        self.fail_after = fail_after
+        self.reads = 0
+        self.closed = False
+
+    # One (4, 3) chunk per read until it fails
+    def read(self):
+        self.reads += 1
+        if self.reads > self.fail_after:
+            raise ValueError("bad frame")
+        return np.full((4, 3), self.reads, dtype=np.uint16)
+
+    # Remember that the worker closed it
+    def close(self):
+        self.closed = True
+
+# A source failure ends the worker, is kept for the views and still closes the source
+def test_worker_keeps_failure():
+    source = FailingSource()
+    worker = AcquisitionWorker(source)
+    subscription = worker.subscribe()
+    worker.start()
+    worker.join(timeout=5.0)
+    assert not worker.is_alive()
+    assert isinstance(worker.error, ValueError)
+    assert worker.failure() == "Acquisition stopped: ValueError: bad frame"
+    assert source.closed
+    assert [int(chunk[0, 0]) for chunk in subscription.drain()] == [1, 2, 3]
+
+# A worker stopped on purpose reports no failure
+def test_worker_stop_is_not_a_failure():
+    worker = AcquisitionWorker(FailingSource(fail_after=10 ** 9))
+    worker.start()
+    worker.stop()
+    assert worker.error is None and worker.failure() is None
+
+# A full subscription drops its oldest chunks and counts their samples
+def test_subscription_drops_oldest():
+    subscription = Subscription(queue_len=2)
+    for value in range(4):
+        subscription.put_chunk(np.full((5, 4), value))
+    assert [int(chunk[0, 0]) for chunk in subscription.drain()] == [2, 3]
+    assert subscription.dropped_samples == 10
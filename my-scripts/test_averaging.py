@@ -0,0 +1,53 @@
+'''
+File: test_averaging.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Regression tests for the averaging acquisition modes.
+
+Usage: python -m pytest test_averaging.py
+'''
+
+import numpy as np
+from averaging import SweepAverage, ExponentialAverage, HiRes, make_averager
+
+# A (4, length) window with timestamps 0.. and a constant value per channel
+def make_window(length, values=(1.0, 2.0, 3.0)):
+    window = np.empty((4, length))
+    window[0] = np.arange(length)
+    window[1:] = np.array(values)[:, None]
+    return window
+
+# Every factor samples become one, stamped with the block's first timestamp
+def test_hires_decimates():
+    window = make_window(64)
+    window[1] = np.arange(64)
+    out = HiRes(4).add(window)
+    assert out.shape == (4, 16)
+    assert np.array_equal(out[0], np.arange(0, 64, 4))
+    assert np.allclose(out[1], np.arange(0, 64, 4) + 1.5)
+    assert np.allclose(out[2:], [[2.0], [3.0]])
+
+# A factor longer than the window still leaves one point to draw
+def test_hires_factor_longer_than_window():
+    hires = make_averager("Hi-res", 64)
+    out = hires.add(make_window(32))
+    assert out.shape == (4, 1)
+    assert np.allclose(out[1:, 0], [1.0, 2.0, 3.0])
+    assert hires.index(20) == 0
+    # The requested factor applies again once the windows are long enough
+    assert hires.add(make_window(256)).shape == (4, 4)
+
+# The sweep average is the mean of only the last sweeps windows
+def test_sweep_average_window():
+    average = SweepAverage(2)
+    for value in (1.0, 5.0, 9.0):
+        out = average.add(make_window(8, (value, value, value)))
+    assert np.allclose(out[1:], 7.0)
+
+# The exponential average is a plain mean until it has weight sweeps
+def test_exponential_average_start():
+    average = ExponentialAverage(4)
+    average.add(make_window(8, (2.0, 2.0, 2.0)))
+    out = average.add(make_window(8, (4.0, 4.0, 4.0)))
+    assert np.allclose(out[1:], 3.0)
@@ -0,0 +1,54 @@
+'''
+File: test_metrics.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Regression tests for the hot-path metrics.
+
+Usage: python -m pytest test_metrics.py
+'''
+
+import sys
+import threading
+from metrics import Metrics
+
+# Stages timed on one thread survive resets and snapshots from another
+def test_reset_while_timing():
+    metrics = Metrics(enabled=True, history=64)
+    done = threading.Event()
+    errors = []
+
+    # Time stages as fast as the acquisition worker would
+    def worker():
+        try:
+            while not done.is_set():
+                for stage in ("read", "parse", "trigger"):
+                    metrics.stop(stage, metrics.start())
+        except Exception as error:
+            errors.append(error)
+
+    # Switch threads as often as possible so the calls interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    thread = threading.Thread(target=worker)
+    thread.start()
+    try:
+        for _ in range(2000):
+            metrics.reset()
+            metrics.snapshot()
+    finally:
+        done.set()
+        thread.join()
+        sys.setswitchinterval(interval)
+    assert not errors
+    assert all(v["count"] >= 1 for v in metrics.snapshot()["stages"].values())
+
+# A start taken while disabled records nothing once metrics are turned on
+def test_start_while_disabled_is_not_timed():
+    metrics = Metrics()
+    start = metrics.start()
+    metrics.enabled = True
+    metrics.stop("plot", start)
+    assert metrics.snapshot()["stages"] == {}
+    metrics.stop("plot", metrics.start())
+    assert metrics.snapshot()["stages"]["plot"]["count"] == 1
@@ -0,0 +1,81 @@
+'''
+File: test_recorder.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Regression tests for the capture-to-disk recorder and the recording reader.
+
+Usage: python -m pytest test_recorder.py
+'''
+
+import numpy as np
+from recorder import Recorder, Recording
+from timeline import Timeline
+
+# (n, 4) samples at 2 samples per millisecond, with 16-bit wraps and one button reset
+def make_samples(n):
+    stamps = np.arange(n) // 2
+    stamps[n // 2:] -= stamps[n // 2] - 7
+    samples = np.zeros((n, 4), dtype=np.uint16)
+    samples[:, 0] = stamps & 0xFFFF
+    samples[:, 1] = np.arange(n) % 4096
+    return samples
+
+# Write samples to a finished recording at path in chunks of chunk samples
+def record(path, samples, chunk=1000, **options):
+    recorder = Recorder(str(path), **options)
+    recorder.start()
+    for start in range(0, len(samples), chunk):
+        recorder.write(samples[start:start + chunk])
+    assert recorder.stop(timeout=10.0)
+    return recorder
+
+# Everything written comes back in order, with the header filled in
+def test_round_trip(tmp_path):
+    samples = make_samples(50000)
+    record(tmp_path / "a.osc", samples, sample_rate=2000.0, capacity=4096)
+    recording = Recording(str(tmp_path / "a.osc"))
+    assert len(recording) == len(samples) and recording.sample_rate == 2000.0
+    assert np.array_equal(recording.samples(), samples)
+
+# A full queue drops its oldest chunks and counts them instead of growing
+def test_queue_is_bounded(tmp_path):
+    recorder = Recorder(str(tmp_path / "b.osc"), queue_len=4)
+    chunks = [np.full((10, 4), k, dtype=np.uint16) for k in range(10)]
+    for chunk in chunks:
+        recorder.write(chunk)
+    assert recorder.queue.qsize() == 4
+    assert recorder.dropped_chunks == 6 and recorder.dropped_samples == 60
+    recorder.start()
+    assert recorder.stop(timeout=10.0)
+    kept = Recording(str(tmp_path / "b.osc")).samples()
+    assert np.array_equal(kept, np.concatenate(chunks[6:]))
+
+# Times of any slice match unwrapping the whole recording at once
+def test_times_of_slices(tmp_path):
+    samples = make_samples(300000)
+    record(tmp_path / "c.osc", samples)
+    expected = Timeline().feed(samples[:, 0])
+    recording = Recording(str(tmp_path / "c.osc"), block=4096)
+    for start, stop in ((0, 10), (4090, 4200), (149990, 150020), (299000, 300000), (123457, 234567)):
+        assert np.array_equal(recording.times(start, stop), expected[start:stop])
+    assert np.array_equal(recording.times(), expected)
+
+# find_time gives the same sample range as a search over every time
+def test_find_time(tmp_path):
+    samples = make_samples(100000)
+    record(tmp_path / "d.osc", samples)
+    expected = Timeline().feed(samples[:, 0])
+    recording = Recording(str(tmp_path / "d.osc"), block=1000)
+    for t0, t1 in ((-5, 3), (0, 0), (499, 501), (20000, 20500), (expected[-1] - 3, expected[-1] + 10)):
+        assert recording.find_time(t0, t1) == (int(np.searchsorted(expected, t0, side="left")),
+                                               int(np.searchsorted(expected, t1, side="right")))
+
+# time_at agrees with the full unwrap in and across blocks
+def test_time_at(tmp_path):
+    samples = make_samples(20000)
+    record(tmp_path / "e.osc", samples)
+    expected = Timeline().feed(samples[:, 0])
+    recording = Recording(str(tmp_path / "e.osc"), block=1000)
+    for sample in (0, 999, 1000, 10001, 10000, 19999, 5):
+        assert recording.time_at(sample) == expected[sample]
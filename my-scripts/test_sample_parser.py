@@ -0,0 +1,98 @@
+'''
+File: test_sample_parser.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Regression tests for the text and binary stream decoders.
+
+Usage: python -m pytest test_sample_parser.py
+'''
+
+import numpy as np
+from sample_parser import LineParser, BinaryFrameDecoder, StreamDecoder, encode_frames, SAMPLES_PER_FRAME, ADC_CHANS
+
+# Random 12-bit samples filling the given number of frames
+def make_samples(n_frames, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 4096, size=(n_frames * SAMPLES_PER_FRAME, ADC_CHANS), dtype=np.uint16)
+
+# Feed data to a decoder in pieces of the given size, returns everything it decoded
+def feed_pieces(decoder, data, size):
+    out = [decoder.feed(data[i:i + size]) for i in range(0, len(data), size)]
+    return np.concatenate(out)
+
+# Frames decode back to the samples and timestamps they were encoded from
+def test_binary_round_trip():
+    samples = make_samples(50)
+    decoder = BinaryFrameDecoder(sample_rate=1000.0)
+    out = feed_pieces(decoder, encode_frames(samples, seq=7, timestamp=100), 333)
+    assert np.array_equal(out[:, 1:], samples)
+    assert np.array_equal(out[:, 0], 100 + np.arange(len(samples)))
+    assert decoder.frames_decoded == 50
+    assert decoder.frames_lost == 0 and decoder.checksum_errors == 0
+
+# The sample counter becomes milliseconds at the sample rate, wrapping at 16 bits
+def test_binary_timestamps_follow_sample_rate():
+    samples = make_samples(20)
+    decoder = BinaryFrameDecoder(sample_rate=2000.0)
+    out = decoder.feed(encode_frames(samples, timestamp=0xFFF0))
+    expected = (0xFFF0 / 2 + np.arange(len(samples)) / 2).astype(np.int64) & 0xFFFF
+    assert np.array_equal(out[:, 0], expected)
+
+# A corrupt frame is counted and the frames around it still decode
+def test_binary_corrupt_frame():
+    samples = make_samples(10)
+    data = bytearray(encode_frames(samples))
+    frame_len = len(data) // 10
+    data[4 * frame_len + 10] ^= 0xFF
+    decoder = BinaryFrameDecoder()
+    out = decoder.feed(bytes(data))
+    assert len(out) == 9 * SAMPLES_PER_FRAME
+    assert decoder.checksum_errors == 1 and decoder.frames_lost == 1
+
+# StreamDecoder picks the binary decoder and loses nothing while detecting
+def test_stream_decoder_binary():
+    samples = make_samples(64)
+    decoder = StreamDecoder()
+    out = feed_pieces(decoder, encode_frames(samples), 100)
+    assert decoder.mode == "binary"
+    assert np.array_equal(out[:, 1:], samples)
+
+# StreamDecoder picks the line parser for the printf stream
+def test_stream_decoder_text():
+    rows = make_samples(4)
+    data = "".join(f"{t:5d} {a:4d} {b:4d} {c:4d}\r\n" for t, (a, b, c) in enumerate(rows)).encode()
+    decoder = StreamDecoder()
+    out = feed_pieces(decoder, data, 50)
+    assert decoder.mode == "text"
+    assert np.array_equal(out[:, 1:], rows)
+    assert np.array_equal(out[:, 0], np.arange(len(rows)))
+
+# Frames held back until the sample rate is known are not mistaken for a dead stream
+def test_held_frames_survive_until_rate_is_set():
+    samples = make_samples(101)
+    data = encode_frames(samples)
+    split = 100 * (len(data) // 101)
+    decoder = StreamDecoder(sample_rate=None)
+    held = feed_pieces(decoder, data[:split], 400)
+    assert len(held) == 0 and decoder.mode == "binary"
+    decoder.binary.sample_rate = 1000.0
+    out = np.concatenate([held, decoder.feed(data[split:])])
+    assert np.array_equal(out[:, 1:], samples)
+    assert decoder.binary.frames_lost == 0 and decoder.samples_skipped == 0
+
+# A stream that stops decoding still makes StreamDecoder detect the format again
+def test_stream_decoder_redetects_garbage():
+    decoder = StreamDecoder()
+    decoder.feed(encode_frames(make_samples(4)))
+    assert decoder.mode == "binary"
+    decoder.feed(bytes(17 * decoder.detect_len))
+    assert decoder.mode is None
+
+# Lines of the wrong shape are counted as malformed and skipped
+def test_line_parser_malformed():
+    parser = LineParser()
+    out = parser.feed(b"    1    2    3    4\r\nxx\r\n    5    6    7    8\r\n    9")
+    assert np.array_equal(out, [[1, 2, 3, 4], [5, 6, 7, 8]])
+    assert parser.malformed == 1
+    assert np.array_equal(parser.feed(b"   10   11   12\r\n"), [[9, 10, 11, 12]])
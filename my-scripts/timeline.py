@@ -0,0 +1,155 @@
+'''
+File: timeline.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Timeline stage for the firmware's 16 bit timestamps.
+The timestamp counts SysTick milliseconds, wraps at 65535 and is reset to 0 by the user button
+(HAL_GPIO_EXTI_Callback). Timeline turns it into a monotonic int64 timebase, chunk by chunk and
+with NumPy only: a step backwards that a wrap explains is a wrap, anything else is a reset and is
+bridged with one sampling period. Steps much longer than the estimated period are flagged as gaps
+of dropped samples. TimeIndex keeps the unwrapped times sorted, so the samples of any time window
+are found with a binary search.
+'''
+
+import numpy as np
+
+# Class that unwraps the raw timestamp stream
+class Timeline:
+    # Initialize, tick_rate is timestamp ticks per second, longer forward steps than max_step after
+    # going backwards are resets, steps over gap_factor periods are gaps
+    def __init__(self, tick_rate=1000.0, max_step=16384, gap_factor=1.5):
+        self.tick_rate = tick_rate
+        self.max_step = max_step
+        self.gap_factor = gap_factor
+        self.reset()
+
+    # Forget everything seen so far
+    def reset(self):
+        self.last_raw = None    # Raw timestamp of the last sample
+        self.last_time = 0      # Unwrapped time of the last sample
+        self.ticks = 0          # Ticks covered by regular sample to sample steps
+        self.steps = 0          # Number of regular steps
+        self.resets = 0
+        self.gap_times = []     # Unwrapped times of the first sample after each gap, one array per chunk
+        self.gap_missing = []   # Samples missing in each gap
+        self.missing = 0
+
+    # Estimated ticks per sample, None before any regular step
+    @property
+    def period(self):
+        return self.ticks / self.steps if self.steps and self.ticks else None
+
+    # Estimated samples per second, None before any regular step
+    @property
+    def sample_rate(self):
+        period = self.period
+        return self.tick_rate / period if period else None
+
+    # Unwrap a chunk of raw timestamps, returns their int64 times in ticks
+    def feed(self, raw):
+        n = len(raw)
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        raw = np.asarray(raw, dtype=np.int64)
+        first = self.last_raw is None
+        steps = np.diff(raw, prepend=raw[0] if first else self.last_raw)
+        forward = steps & 0xFFFF
+
+        # Going back further than a wrap explains means the counter was reset
+        reset = (steps < 0) & (forward > self.max_step)
+        regular = ~reset
+        if first:
+            regular[0] = False
+
+        # Gaps are judged against the period so far, or this chunk's average on the first chunk
+        period = self.period
+        if period is None:
+            period = forward[regular].mean() if np.any(regular) else 1.0
+        gap = regular & (forward > self.gap_factor * period + 1)
+        normal = regular & ~gap
+        self.ticks += int(forward[normal].sum())
+        self.steps += int(np.count_nonzero(normal))
+        period = self.period or period
+
+        # A reset hides the real step, bridge it with one period
+        forward[reset] = max(int(round(period)), 1)
+        if first:
+            forward[0] = 0
+        times = self.last_time + np.cumsum(forward)
+
+        if np.any(gap):
+            self.gap_times.append(times[gap])
+            missing = np.maximum(np.rint(forward[gap] / max(period, 1e-9)).astype(np.int64) - 1, 0)
+            self.gap_missing.append(missing)
+            self.missing += int(missing.sum())
+        self.resets += int(np.count_nonzero(reset))
+        self.last_raw = int(raw[-1])
+        self.last_time = int(times[-1])
+        return times
+
+    # Times of the first sample after each gap and the samples missing before it
+    def gaps(self):
+        if not self.gap_times:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(self.gap_times), np.concatenate(self.gap_missing)
+
+# Unwrap the timestamps of one capture window on their own, for plotting
+def unwrap(raw, tick_rate=1000.0):
+    return Timeline(tick_rate).feed(raw) + int(raw[0]) if len(raw) else np.empty(0, dtype=np.int64)
+
+# Class for the sorted times of a long capture, addressed by absolute sample number
+class TimeIndex:
+    # Initialize empty, the first sample added has number start
+    def __init__(self, capacity=1 << 16, start=0):
+        self.data = np.empty(capacity, dtype=np.int64)
+        self.offset = 0        # Position of the oldest kept time in data
+        self.start = start     # Sample number of the oldest kept time
+        self.count = 0
+
+    # Number of indexed samples
+    def __len__(self):
+        return self.count
+
+    # Sample number after the last indexed sample
+    @property
+    def stop(self):
+        return self.start + self.count
+
+    # Zero-copy view of the kept times
+    @property
+    def times(self):
+        return self.data[self.offset:self.offset + self.count]
+
+    # Append the unwrapped times of the next samples
+    def extend(self, times):
+        n = len(times)
+        if self.offset + self.count + n > len(self.data):
+            # Move the kept times to the front, and double the storage if that is not enough
+            capacity = len(self.data)
+            while self.count + n > capacity:
+                capacity *= 2
+            data = self.data if capacity == len(self.data) else np.empty(capacity, dtype=np.int64)
+            data[:self.count] = self.times
+            self.data = data
+            self.offset = 0
+        self.data[self.offset + self.count:self.offset + self.count + n] = times
+        self.count += n
+
+    # Forget samples numbered before sample
+    def discard_before(self, sample):
+        drop = min(max(sample - self.start, 0), self.count)
+        self.offset += drop
+        self.start += drop
+        self.count -= drop
+
+    # Sample numbers [start, stop) of the samples with times in [t0, t1], by binary search
+    def find(self, t0, t1):
+        times = self.times
+        first = int(np.searchsorted(times, t0, side="left"))
+        last = int(np.searchsorted(times, t1, side="right"))
+        return self.start + first, self.start + last
+
+    # Time of an absolute sample number
+    def time_at(self, sample):
+        return int(self.data[self.offset + sample - self.start])
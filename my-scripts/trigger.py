@@ -0,0 +1,171 @@
+'''
+File: trigger.py
+Author: Surya Turaga
+Date: 17 October 2026
+
+Edge trigger engine shared by normal and single shot trigger modes.
+Each incoming chunk is scanned once with NumPy for every threshold crossing in the chosen
+direction. Hysteresis rejects noise around the level, holdoff spaces triggers apart, and the
+pre-trigger fraction places the captured window around the exact trigger sample.
+State is carried between chunks, so nothing already scanned is looked at again.
+Several channels can be watched at once, a crossing on any of them triggers. The check is one
+2D NumPy pass over all of them, and every capture holds all channels from the same trigger point.
+'''
+
+import numpy as np
+from ring_buffer import RingBuffer
+
+# Trigger source choices offered by the plotters, values are sample chunk columns
+TRIGGER_SOURCES = {"Channel 1": 1, "Channel 2": 2, "Channel 3": 3, "Any channel": [1, 2, 3]}
+
+# Class for the streaming edge detector
+class EdgeTrigger:
+    # Initialize the trigger, hysteresis and holdoff are in ADC codes and samples
+    def __init__(self, level=2048, rising=True, hysteresis=0, holdoff=0):
+        self.level = level
+        self.rising = rising
+        self.hysteresis = hysteresis
+        self.holdoff = holdoff
+        self.reset()
+
+    # Forget everything seen so far, the next trigger needs a fresh crossing
+    def reset(self):
+        self.samples_seen = 0     # Absolute index of the next sample
+        self.state = 0            # Per channel: +1 past the level, -1 re-armed beyond the hysteresis band, 0 unknown
+        self.next_allowed = 0     # First absolute index allowed by the holdoff
+
+    # Per sample and channel of 1D or (N, channels) values: +1 where the level is reached, -1 where
+    # the signal is back beyond the hysteresis band and 0 inside it, as (N, channels) int8
+    def events(self, values, out=None):
+        n = len(values)
+        # Work on signals that always trigger upwards, one column per channel
+        values = values.astype(np.int32).reshape(n, -1)
+        level = self.level
+        if not self.rising:
+            values = -values
+            level = -level
+        if out is None:
+            out = np.zeros(values.shape, dtype=np.int8)
+        out[values >= level] = 1
+        out[values <= level - max(self.hysteresis, 1)] = -1
+        return out
+
+    # Return the absolute indices of all triggers in a chunk of values,
+    # either 1D or (N, channels) to trigger on a crossing in any of the channels
+    def scan(self, values):
+        n = len(values)
+        start = self.samples_seen
+        self.samples_seen += n
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Row 0 holds the state left by the previous chunk
+        channels = values.shape[1] if values.ndim > 1 else 1
+        events = np.zeros((n + 1, channels), dtype=np.int8)
+        events[0] = self.state
+        self.events(values, out=events[1:])
+        # Carry the last event forward over samples inside the band, per channel
+        last = np.where(events != 0, np.arange(n + 1)[:, None], 0)
+        np.maximum.accumulate(last, axis=0, out=last)
+        state = np.take_along_axis(events, last, axis=0)
+        self.state = state[-1].copy()
+
+        crossed = (state[1:] == 1) & (state[:-1] == -1)
+        hits = np.flatnonzero(crossed.any(axis=1)) + start
+        if self.holdoff <= 0:
+            return hits
+        accepted = []
+        for hit in hits[hits >= self.next_allowed]:
+            if hit >= self.next_allowed:
+                accepted.append(hit)
+                self.next_allowed = hit + self.holdoff
+        return np.array(accepted, dtype=np.int64)
+
+# Class that turns a sample stream into triggered capture windows
+class TriggeredCapture:
+    # Initialize with the window length and the channel column (or list of columns) the trigger watches
+    def __init__(self, trigger, length=1024, pre_trigger=0.5, source=1, columns=4,
+                 single_shot=False, max_length=2048):
+        self.trigger = trigger
+        self.source = source
+        self.single_shot = single_shot
+        self.buffer = RingBuffer(length, columns=columns, max_length=max_length)
+        self.pre_trigger = pre_trigger
+        self.armed = False
+        self.pending = None     # (trigger index, index of the last sample of its window)
+        self.rearm_at = 0       # Triggers before this index fall in an earlier capture
+
+    # Samples in a capture window
+    @property
+    def length(self):
+        return self.buffer.length
+
+    # Change the window length, the current capture is abandoned
+    def set_length(self, length):
+        self.buffer.set_length(length)
+        self.pending = None
+
+    # Watch other channel columns, the trigger needs a fresh crossing on them
+    def set_source(self, source):
+        self.source = source
+        self.trigger.reset()
+        self.pending = None
+        self.rearm_at = 0
+
+    # Samples kept before the trigger point
+    def pre_samples(self):
+        return min(int(round(self.pre_trigger * self.length)), self.length - 1)
+
+    # Start waiting for a trigger with an empty buffer
+    def arm(self):
+        self.buffer.clear()
+        self.trigger.reset()
+        self.pending = None
+        self.rearm_at = 0
+        self.armed = True
+
+    # Stop looking for triggers, samples are still buffered
+    def disarm(self):
+        self.armed = False
+        self.pending = None
+
+    # Feed an (N, columns) chunk, returns a list of (trigger index in window, (columns, length) window)
+    def feed(self, chunk):
+        if not self.armed:
+            self.buffer.extend(chunk)
+            return []
+
+        chunk_start = self.trigger.samples_seen
+        hits = self.trigger.scan(chunk[:, self.source])
+        captures = []
+        pos = 0
+        while self.armed:
+            if self.pending is None:
+                hits = hits[hits >= max(self.rearm_at, chunk_start + pos)]
+                if len(hits) == 0:
+                    break
+                hit = int(hits[0])
+                self.pending = (hit, hit - self.pre_samples() + self.length - 1)
+            hit, end = self.pending
+            end_pos = end - chunk_start
+            if end_pos >= len(chunk):
+                break
+
+            # The window is complete once its last sample is in the buffer
+            self.buffer.extend(chunk[pos:end_pos + 1])
+            pos = end_pos + 1
+            self.pending = None
+            self.rearm_at = end + 1
+            # Right after arming there may not be enough pre-trigger samples yet
+            if self.buffer.is_full():
+                captures.append(self.take(hit, end))
+                if self.single_shot:
+                    self.armed = False
+
+        self.buffer.extend(chunk[pos:])
+        return captures
+
+    # Keep the complete window of the trigger at absolute index hit, which ends at index end,
+    # returns (trigger index in window, (columns, length) window)
+    def take(self, hit, end):
+        return hit - (end - self.length + 1), self.buffer.view().copy()